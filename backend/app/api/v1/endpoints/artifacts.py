@@ -0,0 +1,35 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse, Response
+from app.services.artifact_store import artifact_store, ARTIFACT_NAME, MEDIA_TYPES, LocalArtifactBackend
+import asyncio
+
+router = APIRouter()
+
+# Names are content hashes, so a given URL always serves the same bytes
+CACHE_HEADERS = {"Cache-Control": "public, max-age=31536000, immutable"}
+
+
+@router.get("/{name}")
+async def get_artifact(name: str):
+    """
+    Serve a generated image by its content-addressed name (<sha256>.<ext>)
+
+    No auth: names are unguessable hashes that are only handed out with the
+    Content they belong to (same model as share tokens).
+    """
+    if not ARTIFACT_NAME.match(name):
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    media_type = MEDIA_TYPES[name.rsplit(".", 1)[1]]
+
+    backend = artifact_store.backend
+    if isinstance(backend, LocalArtifactBackend):
+        path = backend.path(name)
+        if not path.exists():
+            raise HTTPException(status_code=404, detail="Artifact not found")
+        return FileResponse(path, media_type=media_type, headers=CACHE_HEADERS)
+
+    try:
+        data = await asyncio.to_thread(artifact_store.read, name)
+    except (FileNotFoundError, KeyError):
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    return Response(content=data, media_type=media_type, headers=CACHE_HEADERS)
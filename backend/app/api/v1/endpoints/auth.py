@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
 from app.core.security import verify_password, get_password_hash, create_access_token, create_refresh_token, decode_token
 from app.models.models import User
 from app.schemas.schemas import UserCreate, UserLogin, UserResponse, Token, RefreshTokenRequest
@@ -11,7 +12,18 @@ router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+def _user_id_from_sub(sub) -> int:
+    """Token subjects are strings; asyncpg needs the integer primary key"""
+    try:
+        return int(sub)
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials"
+        )
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> User:
     """Get current authenticated user"""
     payload = decode_token(token)
     if not payload:
@@ -27,7 +39,13 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
             detail="Could not validate credentials"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == _user_id_from_sub(user_id)))
+    user = result.scalar_one_or_none()
+
+    # End the read transaction so the connection goes back to the pool before
+    # the handler awaits anything slow; the user stays loaded (expire_on_commit=False)
+    await db.commit()
+
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -44,7 +62,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
 
 
 @router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
+async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     import logging
     logger = logging.getLogger(__name__)
@@ -59,9 +77,10 @@ async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
     logger.info(f"Signup attempt for email: {user_data.email}")
     
     # Check if user already exists
-    existing_user = db.query(User).filter(
+    result = await db.execute(select(User).where(
         (User.email == user_data.email) | (User.username == user_data.username)
-    ).first()
+    ))
+    existing_user = result.scalars().first()
     
     if existing_user:
         logger.warning(f"User already exists: {user_data.email}")
@@ -84,8 +103,8 @@ async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     logger.info(f"User created successfully: {new_user.email} (ID: {new_user.id})")
     return new_user
@@ -95,14 +114,15 @@ async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     remember_me: bool = False,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Login user"""
     import logging
     logger = logging.getLogger(__name__)
 
     logger.info(f"Login attempt for email: {form_data.username} (remember_me: {remember_me})")
-    user = db.query(User).filter(User.email == form_data.username).first()
+    result = await db.execute(select(User).where(User.email == form_data.username))
+    user = result.scalars().first()
 
     if not user:
         logger.warning(f"User not found: {form_data.username}")
@@ -148,7 +168,7 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 
 
 @router.post("/refresh", response_model=Token)
-async def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
+async def refresh_token(request: RefreshTokenRequest, db: AsyncSession = Depends(get_async_db)):
     """Refresh access token"""
     payload = decode_token(request.refresh_token)
     if not payload or payload.get("type") != "refresh":
@@ -158,7 +178,8 @@ async def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_
         )
 
     user_id = payload.get("sub")
-    user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == _user_id_from_sub(user_id)))
+    user = result.scalar_one_or_none()
 
     if not user or not user.is_active:
         raise HTTPException(
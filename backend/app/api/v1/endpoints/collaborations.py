@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.models.models import User, Collaboration
 from app.schemas.schemas import CollaborationCreate, CollaborationUpdate, CollaborationResponse
 from app.api.v1.endpoints.auth import get_current_user
@@ -12,7 +13,7 @@ router = APIRouter()
 @router.post("/", response_model=CollaborationResponse, status_code=status.HTTP_201_CREATED)
 async def create_collaboration(
     collab_data: CollaborationCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new collaboration request (by brand)"""
@@ -23,7 +24,8 @@ async def create_collaboration(
         )
     
     # Verify creator exists
-    creator = db.query(User).filter(User.id == collab_data.creator_id).first()
+    result = await db.execute(select(User).where(User.id == collab_data.creator_id))
+    creator = result.scalars().first()
     if not creator or creator.role != "creator":
         raise HTTPException(status_code=404, detail="Creator not found")
     
@@ -38,8 +40,8 @@ async def create_collaboration(
     )
     
     db.add(collaboration)
-    db.commit()
-    db.refresh(collaboration)
+    await db.commit()
+    await db.refresh(collaboration)
     
     return collaboration
 
@@ -47,30 +49,32 @@ async def create_collaboration(
 @router.get("/", response_model=List[CollaborationResponse])
 async def get_collaborations(
     status_filter: str = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all collaborations for current user"""
     if current_user.role == "creator":
-        query = db.query(Collaboration).filter(Collaboration.creator_id == current_user.id)
+        query = select(Collaboration).where(Collaboration.creator_id == current_user.id)
     else:
-        query = db.query(Collaboration).filter(Collaboration.brand_id == current_user.id)
+        query = select(Collaboration).where(Collaboration.brand_id == current_user.id)
     
     if status_filter:
-        query = query.filter(Collaboration.status == status_filter)
+        query = query.where(Collaboration.status == status_filter)
     
-    collaborations = query.order_by(Collaboration.created_at.desc()).all()
+    result = await db.execute(query.order_by(Collaboration.created_at.desc()))
+    collaborations = result.scalars().all()
     return collaborations
 
 
 @router.get("/{collab_id}", response_model=CollaborationResponse)
 async def get_collaboration(
     collab_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get specific collaboration"""
-    collaboration = db.query(Collaboration).filter(Collaboration.id == collab_id).first()
+    result = await db.execute(select(Collaboration).where(Collaboration.id == collab_id))
+    collaboration = result.scalars().first()
     
     if not collaboration:
         raise HTTPException(status_code=404, detail="Collaboration not found")
@@ -86,11 +90,12 @@ async def get_collaboration(
 async def update_collaboration(
     collab_id: int,
     collab_update: CollaborationUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update collaboration status"""
-    collaboration = db.query(Collaboration).filter(Collaboration.id == collab_id).first()
+    result = await db.execute(select(Collaboration).where(Collaboration.id == collab_id))
+    collaboration = result.scalars().first()
     
     if not collaboration:
         raise HTTPException(status_code=404, detail="Collaboration not found")
@@ -102,7 +107,7 @@ async def update_collaboration(
     for field, value in collab_update.dict(exclude_unset=True).items():
         setattr(collaboration, field, value)
     
-    db.commit()
-    db.refresh(collaboration)
+    await db.commit()
+    await db.refresh(collaboration)
     
     return collaboration
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.models.models import User, Course, CourseProgress
 from app.schemas.schemas import CourseResponse
 from app.api.v1.endpoints.auth import get_current_user
@@ -15,31 +16,33 @@ async def get_courses(
     difficulty: str = None,
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all published courses"""
-    query = db.query(Course).filter(Course.is_published == True)
+    query = select(Course).where(Course.is_published == True)
     
     if category:
-        query = query.filter(Course.category == category)
+        query = query.where(Course.category == category)
     
     if difficulty:
-        query = query.filter(Course.difficulty_level == difficulty)
+        query = query.where(Course.difficulty_level == difficulty)
     
-    courses = query.offset(skip).limit(limit).all()
+    result = await db.execute(query.offset(skip).limit(limit))
+    courses = result.scalars().all()
     return courses
 
 
 @router.get("/{course_id}", response_model=CourseResponse)
 async def get_course(
     course_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get specific course"""
-    course = db.query(Course).filter(
+    result = await db.execute(select(Course).where(
         Course.id == course_id,
         Course.is_published == True
-    ).first()
+    ))
+    course = result.scalars().first()
     
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
@@ -50,19 +53,21 @@ async def get_course(
 @router.post("/{course_id}/enroll")
 async def enroll_course(
     course_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Enroll in a course"""
-    course = db.query(Course).filter(Course.id == course_id).first()
+    result = await db.execute(select(Course).where(Course.id == course_id))
+    course = result.scalars().first()
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     
     # Check if already enrolled
-    existing = db.query(CourseProgress).filter(
+    result = await db.execute(select(CourseProgress).where(
         CourseProgress.user_id == current_user.id,
         CourseProgress.course_id == course_id
-    ).first()
+    ))
+    existing = result.scalars().first()
     
     if existing:
         return {"message": "Already enrolled", "progress": existing.progress_percentage}
@@ -76,7 +81,7 @@ async def enroll_course(
     )
     
     db.add(progress)
-    db.commit()
+    await db.commit()
     
     return {"message": "Successfully enrolled", "course_id": course_id}
 
@@ -84,14 +89,15 @@ async def enroll_course(
 @router.get("/{course_id}/progress")
 async def get_course_progress(
     course_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get user's progress for a course"""
-    progress = db.query(CourseProgress).filter(
+    result = await db.execute(select(CourseProgress).where(
         CourseProgress.user_id == current_user.id,
         CourseProgress.course_id == course_id
-    ).first()
+    ))
+    progress = result.scalars().first()
     
     if not progress:
         raise HTTPException(status_code=404, detail="Not enrolled in this course")
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
 from typing import List, Dict
-from app.core.database import get_db
-from app.models.models import User, Persona, Content
+from app.core.config import settings
+from app.core.database import async_session_scope
+from app.models.models import User, Persona, Content, ContentType
 from app.schemas.schemas import (
     ScriptGenerationRequest,
+    ScriptSectionRegenerateRequest,
     TitleGenerationRequest,
     ThumbnailIdeaRequest,
     SocialCaptionRequest,
@@ -17,22 +19,33 @@ from app.schemas.schemas import (
 )
 from app.api.v1.endpoints.auth import get_current_user
 from app.services.creator_tools_service import creator_tools_service
+from app.services.advanced_thumbnail_service import advanced_thumbnail_service
+from app.services.thumbnail_image_service import thumbnail_image_service
+from app.services.artifact_store import artifact_store
+import asyncio
 import time
 import json
-import asyncio
 
 router = APIRouter()
 
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no"
+}
+
 
-async def get_persona_dict(db: Session, persona_id: int, user_id: int) -> Dict:
-    """Helper to get persona as dict"""
+async def get_persona_dict(persona_id: int, user_id: int) -> Dict:
+    """Helper to get persona as dict (uses its own short-lived session)"""
     if not persona_id:
         return None
     
-    persona = db.query(Persona).filter(
-        Persona.id == persona_id,
-        Persona.user_id == user_id
-    ).first()
+    async with async_session_scope() as db:
+        result = await db.execute(select(Persona).where(
+            Persona.id == persona_id,
+            Persona.user_id == user_id
+        ))
+        persona = result.scalars().first()
     
     if not persona:
         return None
@@ -45,19 +58,20 @@ async def get_persona_dict(db: Session, persona_id: int, user_id: int) -> Dict:
     }
 
 
-def save_content(db: Session, user_id: int, content_data: dict) -> Content:
-    """Helper to save generated content"""
-    content = Content(**content_data)
-    db.add(content)
-    db.commit()
-    db.refresh(content)
+async def save_content(user_id: int, content_data: dict) -> Content:
+    """Helper to save generated content in a fresh session opened only for the write"""
+    # Inline images go to the artifact store; the row keeps only their URLs
+    content = Content(**await asyncio.to_thread(artifact_store.externalize_content, content_data))
+    async with async_session_scope() as db:
+        db.add(content)
+        await db.commit()
+        await db.refresh(content)
     return content
 
 
 @router.post("/generate-script", response_model=ContentResponse)
 async def generate_script(
     request: ScriptGenerationRequest,
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Generate video script"""
@@ -69,7 +83,7 @@ async def generate_script(
         print(f"[Script Regeneration] Has previous script: {bool(request.previous_script)}, Length: {len(request.previous_script) if request.previous_script else 0}")
     
     # Get persona if provided and it exists
-    persona = await get_persona_dict(db, request.persona_id, current_user.id)
+    persona = await get_persona_dict(request.persona_id, current_user.id)
     
     # Generate script
     script = await creator_tools_service.generate_script(request, persona)
@@ -84,7 +98,8 @@ async def generate_script(
         "topic": request.topic,
         "duration_minutes": request.duration_minutes,
         "tone": request.tone,
-        "target_audience": request.target_audience
+        "target_audience": request.target_audience,
+        "key_points": request.key_points
     }
     
     # Add version tracking if this is a regeneration
@@ -97,7 +112,7 @@ async def generate_script(
         meta_data['version_number'] = 1
     
     # Save to database
-    content = save_content(db, current_user.id, {
+    content = await save_content(current_user.id, {
         "user_id": current_user.id,
         "persona_id": persona_id_to_save,
         "type": "script",
@@ -115,47 +130,44 @@ async def generate_script(
 @router.post("/generate-script-stream")
 async def generate_script_stream(
     request: ScriptGenerationRequest,
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Generate video script with real-time streaming"""
 
+    # The generator outlives the request's dependencies, so it never holds a
+    # session: the persona load and the final save each open their own scope
     async def event_generator():
         try:
             start_time = time.time()
 
             # Send initial progress
             yield f"data: {json.dumps({'type': 'progress', 'message': 'Initializing...'})}\n\n"
-            await asyncio.sleep(0.1)
 
             # Get persona if provided
             yield f"data: {json.dumps({'type': 'progress', 'message': 'Loading persona...'})}\n\n"
-            persona = await get_persona_dict(db, request.persona_id, current_user.id)
-            await asyncio.sleep(0.1)
+            persona = await get_persona_dict(request.persona_id, current_user.id)
 
             # Start generation
             yield f"data: {json.dumps({'type': 'progress', 'message': 'Generating your script...'})}\n\n"
-            await asyncio.sleep(0.2)
-
-            # Generate script (non-streaming for now, but we'll simulate chunking)
-            script = await creator_tools_service.generate_script(request, persona)
-
-            # Simulate streaming by sending script in chunks
-            # Split script into sentences for smoother streaming effect
-            sentences = script.split('. ')
-            accumulated_script = ''
-
-            for i, sentence in enumerate(sentences):
-                if sentence.strip():
-                    # Add period back if not last sentence
-                    chunk = sentence + ('. ' if i < len(sentences) - 1 else '')
-                    accumulated_script += chunk
 
-                    # Send chunk
-                    yield f"data: {json.dumps({'type': 'chunk', 'content': chunk})}\n\n"
-
-                    # Small delay to make streaming visible (adjust for production)
-                    await asyncio.sleep(0.05)
+            # Forward provider deltas and validation progress as they arrive; a
+            # re-steered attempt starts with an empty 'replace' that resets the draft
+            raw_chunks = []
+            async for event in creator_tools_service.stream_script_events(request, persona):
+                if event['type'] == 'chunk':
+                    raw_chunks.append(event['content'])
+                elif event['type'] == 'replace':
+                    raw_chunks = []
+                yield f"data: {json.dumps(event)}\n\n"
+
+            raw_script = ''.join(raw_chunks)
+            if not raw_script.strip():
+                raise Exception("AI returned an empty script. Please try again.")
+
+            # Normalize markers and recompute timestamps once on the full text,
+            # then replace the client's streamed draft with the final version
+            script = creator_tools_service.post_process_script(raw_script, request)
+            yield f"data: {json.dumps({'type': 'replace', 'content': script})}\n\n"
 
             generation_time = time.time() - start_time
 
@@ -166,6 +178,7 @@ async def generate_script_stream(
                 "duration_minutes": request.duration_minutes,
                 "tone": request.tone,
                 "target_audience": request.target_audience,
+                "key_points": request.key_points,
                 "ai_model": request.ai_model
             }
 
@@ -181,7 +194,7 @@ async def generate_script_stream(
             # Save to database
             yield f"data: {json.dumps({'type': 'progress', 'message': 'Saving to database...'})}\n\n"
 
-            content = save_content(db, current_user.id, {
+            content = await save_content(current_user.id, {
                 "user_id": current_user.id,
                 "persona_id": persona_id_to_save,
                 "type": "script",
@@ -201,28 +214,81 @@ async def generate_script_stream(
             error_msg = str(e)
             yield f"data: {json.dumps({'type': 'error', 'message': error_msg})}\n\n"
 
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
+    return StreamingResponse(event_generator(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.post("/scripts/{content_id}/regenerate-sections", response_model=ContentResponse)
+async def regenerate_script_sections(
+    content_id: int,
+    request: ScriptSectionRegenerateRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Rewrite only the chosen sections of a saved script and splice them into it"""
+    start_time = time.time()
+
+    async with async_session_scope() as db:
+        result = await db.execute(select(Content).where(
+            Content.id == content_id,
+            Content.user_id == current_user.id,
+            Content.type == ContentType.SCRIPT
+        ))
+        content = result.scalars().first()
+        if not content:
+            raise HTTPException(status_code=404, detail="Script not found")
+        script = content.content_text
+        meta_data = dict(content.meta_data or {})
+        persona_id = content.persona_id
+        ai_model = content.ai_model or "openai"
+
+    persona = await get_persona_dict(persona_id, current_user.id)
+
+    # The stored generation settings stand in for the original request
+    script_request = ScriptGenerationRequest(
+        topic=meta_data.get("topic") or "",
+        duration_minutes=meta_data.get("duration_minutes") or 10,
+        tone=meta_data.get("tone") or "engaging",
+        target_audience=meta_data.get("target_audience"),
+        key_points=meta_data.get("key_points"),
+        ai_model=request.ai_model or ai_model
     )
 
+    try:
+        script, regenerated = await creator_tools_service.regenerate_script_sections(
+            script, request, script_request, persona
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    generation_time = time.time() - start_time
+    meta_data['section_regenerations'] = meta_data.get('section_regenerations', []) + [{
+        "sections": regenerated,
+        "feedback": request.regenerate_feedback,
+        "ai_model": script_request.ai_model,
+        "generation_time": generation_time
+    }]
+
+    async with async_session_scope() as db:
+        await db.execute(
+            update(Content)
+            .where(Content.id == content_id, Content.user_id == current_user.id)
+            .values(content_text=script, meta_data=meta_data, generation_time=generation_time)
+        )
+        await db.commit()
+        content = await db.get(Content, content_id)
+
+    return content
+
 
 @router.post("/generate-titles", response_model=ContentResponse)
 async def generate_titles(
     request: TitleGenerationRequest,
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Generate video titles"""
     start_time = time.time()
     
     # Get persona if provided
-    persona = await get_persona_dict(db, request.persona_id, current_user.id)
+    persona = await get_persona_dict(request.persona_id, current_user.id)
 
     # Generate titles
     titles = await creator_tools_service.generate_titles(request, persona)
@@ -233,7 +299,7 @@ async def generate_titles(
     persona_id_to_save = request.persona_id if persona else None
 
     # Save to database
-    content = save_content(db, current_user.id, {
+    content = await save_content(current_user.id, {
         "user_id": current_user.id,
         "persona_id": persona_id_to_save,
         "type": "title",
@@ -253,10 +319,55 @@ async def generate_titles(
     return content
 
 
+@router.post("/generate-titles-stream")
+async def generate_titles_stream(
+    request: TitleGenerationRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Generate video titles, sending each one as soon as the model finishes it"""
+
+    async def event_generator():
+        try:
+            start_time = time.time()
+            persona = await get_persona_dict(request.persona_id, current_user.id)
+
+            titles = []
+            async for title in creator_tools_service.stream_titles(request, persona):
+                titles.append(title)
+                yield f"data: {json.dumps({'type': 'title', 'index': len(titles) - 1, 'title': title})}\n\n"
+
+            if not titles:
+                raise Exception("AI returned no titles. Please try again.")
+
+            generation_time = time.time() - start_time
+            content = await save_content(current_user.id, {
+                "user_id": current_user.id,
+                "persona_id": request.persona_id if persona else None,
+                "type": "title",
+                "title": f"Titles for: {request.video_topic}",
+                "content_text": "\n".join(titles),
+                "meta_data": {
+                    "topic": request.video_topic,
+                    "keywords": request.keywords,
+                    "titles": titles,
+                    "count": len(titles)
+                },
+                "ai_model": request.ai_model,
+                "prompt_used": str(request.dict()),
+                "generation_time": generation_time
+            })
+
+            yield f"data: {json.dumps({'type': 'complete', 'id': content.id, 'titles': titles, 'generation_time': generation_time})}\n\n"
+
+        except Exception as e:
+            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @router.post("/generate-thumbnail-ideas", response_model=ContentResponse)
 async def generate_thumbnail_ideas(
     request: ThumbnailIdeaRequest,
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Generate thumbnail templates with editable layers"""
@@ -264,7 +375,7 @@ async def generate_thumbnail_ideas(
 
     try:
         # Get persona if provided
-        persona = await get_persona_dict(db, request.persona_id, current_user.id)
+        persona = await get_persona_dict(request.persona_id, current_user.id)
 
         # Generate thumbnail templates (now returns layer-based templates)
         print(f"[Thumbnail API] Generating templates for user {current_user.id}")
@@ -297,7 +408,7 @@ async def generate_thumbnail_ideas(
                 raise HTTPException(status_code=500, detail="Template missing required data (image_url or layers)")
 
         # Save to database with templates
-        content = save_content(db, current_user.id, {
+        content = await save_content(current_user.id, {
             "user_id": current_user.id,
             "persona_id": persona_id_to_save,
             "type": "thumbnail_idea",
@@ -328,17 +439,124 @@ async def generate_thumbnail_ideas(
         )
 
 
+@router.post("/generate-thumbnail-templates-stream")
+async def generate_thumbnail_templates_stream(
+    request: ThumbnailIdeaRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Generate layer-based thumbnail templates, sending each one as soon as it is complete"""
+
+    async def event_generator():
+        try:
+            start_time = time.time()
+            persona = await get_persona_dict(request.persona_id, current_user.id)
+
+            templates = []
+            async for template in advanced_thumbnail_service.stream_advanced_thumbnails(request, persona):
+                templates.append(template)
+                yield f"data: {json.dumps({'type': 'template', 'index': len(templates) - 1, 'template': template})}\n\n"
+
+            # Same order as the non-streaming service: best predicted CTR first
+            templates.sort(key=lambda t: t.get('ctr_score', 0), reverse=True)
+            generation_time = time.time() - start_time
+
+            content = await save_content(current_user.id, {
+                "user_id": current_user.id,
+                "persona_id": request.persona_id if persona else None,
+                "type": "thumbnail_idea",
+                "title": f"Thumbnail: {request.thumbnail_prompt[:50]}",
+                "content_text": f"{len(templates)} thumbnail templates generated",
+                "meta_data": {
+                    "thumbnail_prompt": request.thumbnail_prompt,
+                    "templates": templates,
+                    "count": len(templates)
+                },
+                "ai_model": request.ai_model,
+                "prompt_used": str(request.dict()),
+                "generation_time": generation_time
+            })
+
+            yield f"data: {json.dumps({'type': 'complete', 'id': content.id, 'templates': templates, 'generation_time': generation_time})}\n\n"
+
+        except Exception as e:
+            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.post("/generate-thumbnails-stream")
+async def generate_thumbnails_stream(
+    request: ThumbnailIdeaRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Generate thumbnail images, sending each one as soon as it is ready
+
+    Images still generating after THUMBNAIL_STREAM_DEADLINE_SECONDS are
+    dropped and the finished ones are saved; 'partial' on the complete
+    event says whether that happened.
+    """
+
+    async def event_generator():
+        try:
+            start_time = time.time()
+            persona = await get_persona_dict(request.persona_id, current_user.id)
+
+            thumbnails = []
+            async for thumbnail in thumbnail_image_service.stream_thumbnails(
+                request, persona, deadline=settings.THUMBNAIL_STREAM_DEADLINE_SECONDS
+            ):
+                thumbnails.append(thumbnail)
+                yield f"data: {json.dumps({'type': 'thumbnail', 'index': len(thumbnails) - 1, 'thumbnail': thumbnail})}\n\n"
+
+            if not thumbnails:
+                yield f"data: {json.dumps({'type': 'error', 'message': 'Failed to generate thumbnails. Please try again.'})}\n\n"
+                return
+
+            thumbnails.sort(key=lambda t: t['variation'])
+            generation_time = time.time() - start_time
+
+            content = await save_content(current_user.id, {
+                "user_id": current_user.id,
+                "persona_id": request.persona_id if persona else None,
+                "type": "thumbnail_idea",
+                "title": f"Thumbnail: {request.thumbnail_prompt[:50]}",
+                "content_text": f"{len(thumbnails)} thumbnail templates generated",
+                "meta_data": {
+                    "thumbnail_prompt": request.thumbnail_prompt,
+                    "templates": thumbnails,
+                    "count": len(thumbnails)
+                },
+                "ai_model": request.ai_model,
+                "prompt_used": str(request.dict()),
+                "generation_time": generation_time
+            })
+
+            complete = {
+                'type': 'complete',
+                'id': content.id,
+                'count': len(thumbnails),
+                'partial': len(thumbnails) < request.count,
+                'generation_time': generation_time
+            }
+            yield f"data: {json.dumps(complete)}\n\n"
+
+        except Exception as e:
+            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @router.post("/generate-social-caption", response_model=ContentResponse)
 async def generate_social_caption(
     request: SocialCaptionRequest,
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Generate social media caption"""
     start_time = time.time()
     
     # Get persona if provided
-    persona = await get_persona_dict(db, request.persona_id, current_user.id)
+    persona = await get_persona_dict(request.persona_id, current_user.id)
 
     # Generate caption
     caption = await creator_tools_service.generate_social_caption(request, persona)
@@ -349,7 +567,7 @@ async def generate_social_caption(
     persona_id_to_save = request.persona_id if persona else None
 
     # Save to database
-    content = save_content(db, current_user.id, {
+    content = await save_content(current_user.id, {
         "user_id": current_user.id,
         "persona_id": persona_id_to_save,
         "type": "social_caption",
@@ -371,14 +589,13 @@ async def generate_social_caption(
 @router.post("/optimize-seo", response_model=Dict)
 async def optimize_seo(
     request: SEOOptimizationRequest,
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Optimize content for SEO"""
     start_time = time.time()
     
     # Get persona if provided
-    persona = await get_persona_dict(db, request.persona_id, current_user.id)
+    persona = await get_persona_dict(request.persona_id, current_user.id)
 
     # Optimize content
     result = await creator_tools_service.optimize_seo(request, persona)
@@ -389,7 +606,7 @@ async def optimize_seo(
     persona_id_to_save = request.persona_id if persona else None
 
     # Save to database
-    content = save_content(db, current_user.id, {
+    content = await save_content(current_user.id, {
         "user_id": current_user.id,
         "persona_id": persona_id_to_save,
         "type": "seo_content",
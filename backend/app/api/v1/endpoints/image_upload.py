@@ -3,18 +3,20 @@ Image Upload API for Thumbnails
 Handles user image uploads, storage, and processing
 """
 
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_async_db
 from app.models.models import User
 from app.api.v1.endpoints.auth import get_current_user
+from app.services.image_worker import image_worker, optimize_image, ImageWorkerBusy, ImageTooLarge
+from app.services.image_worker import analyze_image as analyze_image_data
+import asyncio
 import base64
 import uuid
 import os
 from pathlib import Path
-from PIL import Image
-import io
 
 router = APIRouter()
 
@@ -24,7 +26,12 @@ UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 # Allowed file types
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_FILE_SIZE = settings.MAX_UPLOAD_SIZE  # 10MB by default
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
 
 
 def allowed_file(filename: str) -> bool:
@@ -32,33 +39,67 @@ def allowed_file(filename: str) -> bool:
     return Path(filename).suffix.lower() in ALLOWED_EXTENSIONS
 
 
-def optimize_image(image_data: bytes, max_size: tuple = (1920, 1080)) -> bytes:
-    """Optimize image: resize if too large, compress"""
-    img = Image.open(io.BytesIO(image_data))
+async def read_limited(file: UploadFile, limit: int = MAX_FILE_SIZE) -> bytes:
+    """Read an upload in chunks, raising UploadTooLarge as soon as it passes limit"""
+    if file.size is not None and file.size > limit:
+        raise UploadTooLarge()
+
+    chunks = []
+    total = 0
+    while True:
+        chunk = await file.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > limit:
+            raise UploadTooLarge()
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def process_upload(contents: bytes, filename: str, user_id: int) -> dict:
+    """Optimize in the image worker, save to disk; result entry for the response"""
+    optimized_data, width, height = await image_worker.run(
+        optimize_image, contents, (1920, 1080), settings.IMAGE_MAX_PIXELS
+    )
 
-    # Convert RGBA to RGB if necessary
-    if img.mode == 'RGBA':
-        # Create white background
-        background = Image.new('RGB', img.size, (255, 255, 255))
-        background.paste(img, mask=img.split()[3])  # Use alpha channel as mask
-        img = background
-    elif img.mode != 'RGB':
-        img = img.convert('RGB')
+    # Generate unique filename
+    file_id = uuid.uuid4().hex
+    file_extension = Path(filename).suffix.lower()
+    stored_filename = f"{user_id}_{file_id}{file_extension}"
+    filepath = UPLOAD_DIR / stored_filename
+
+    # Save to disk
+    await asyncio.to_thread(filepath.write_bytes, optimized_data)
+
+    # Convert to base64 for canvas rendering
+    base64_data = base64.b64encode(optimized_data).decode('utf-8')
+
+    return {
+        "success": True,
+        "image_id": file_id,
+        "filename": stored_filename,
+        "url": f"/uploads/thumbnails/{stored_filename}",
+        "base64_data": f"data:image/jpeg;base64,{base64_data}",
+        "width": width,
+        "height": height,
+        "size": len(optimized_data)
+    }
 
-    # Resize if too large
-    if img.size[0] > max_size[0] or img.size[1] > max_size[1]:
-        img.thumbnail(max_size, Image.Resampling.LANCZOS)
 
-    # Save optimized
-    output = io.BytesIO()
-    img.save(output, format='JPEG', quality=85, optimize=True)
-    return output.getvalue()
+def busy_error() -> HTTPException:
+    """503 while the image worker queue is full"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Image processing is busy, please retry shortly",
+        headers={"Retry-After": "2"}
+    )
 
 
 @router.post("/upload")
 async def upload_image(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -76,47 +117,21 @@ async def upload_image(
             detail=f"File type not allowed. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
         )
 
-    # Read file
-    contents = await file.read()
-
-    if len(contents) > MAX_FILE_SIZE:
+    # Read file, stopping as soon as it is over the limit
+    try:
+        contents = await read_limited(file)
+    except UploadTooLarge:
         raise HTTPException(
-            status_code=400,
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
             detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
         )
 
     try:
-        # Optimize image
-        optimized_data = optimize_image(contents)
-
-        # Generate unique filename
-        file_id = uuid.uuid4().hex
-        file_extension = Path(file.filename).suffix.lower()
-        filename = f"{current_user.id}_{file_id}{file_extension}"
-        filepath = UPLOAD_DIR / filename
-
-        # Save to disk
-        with open(filepath, 'wb') as f:
-            f.write(optimized_data)
-
-        # Convert to base64 for canvas rendering
-        base64_data = base64.b64encode(optimized_data).decode('utf-8')
-
-        # Get image dimensions
-        img = Image.open(io.BytesIO(optimized_data))
-        width, height = img.size
-
-        return {
-            "success": True,
-            "image_id": file_id,
-            "filename": filename,
-            "url": f"/uploads/thumbnails/{filename}",
-            "base64_data": f"data:image/jpeg;base64,{base64_data}",
-            "width": width,
-            "height": height,
-            "size": len(optimized_data)
-        }
-
+        return await process_upload(contents, file.filename, current_user.id)
+    except ImageWorkerBusy:
+        raise busy_error()
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"[Image Upload] Error: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to process image: {str(e)}")
@@ -125,7 +140,7 @@ async def upload_image(
 @router.post("/upload-multiple")
 async def upload_multiple_images(
     files: List[UploadFile] = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -136,67 +151,46 @@ async def upload_multiple_images(
     if len(files) > 5:
         raise HTTPException(status_code=400, detail="Maximum 5 images at once")
 
-    results = []
-
-    for file in files:
+    async def process(file: UploadFile) -> dict:
         try:
             # Validate file
             if not allowed_file(file.filename):
-                results.append({
+                return {
                     "success": False,
                     "filename": file.filename,
                     "error": "File type not allowed"
-                })
-                continue
+                }
 
-            # Read and optimize
-            contents = await file.read()
+            contents = await read_limited(file)
+            result = await process_upload(contents, file.filename, current_user.id)
+            result["original_filename"] = file.filename
+            return result
 
-            if len(contents) > MAX_FILE_SIZE:
-                results.append({
-                    "success": False,
-                    "filename": file.filename,
-                    "error": "File too large"
-                })
-                continue
-
-            optimized_data = optimize_image(contents)
-
-            # Generate unique filename
-            file_id = uuid.uuid4().hex
-            file_extension = Path(file.filename).suffix.lower()
-            filename = f"{current_user.id}_{file_id}{file_extension}"
-            filepath = UPLOAD_DIR / filename
-
-            # Save to disk
-            with open(filepath, 'wb') as f:
-                f.write(optimized_data)
-
-            # Convert to base64
-            base64_data = base64.b64encode(optimized_data).decode('utf-8')
-
-            # Get dimensions
-            img = Image.open(io.BytesIO(optimized_data))
-            width, height = img.size
-
-            results.append({
-                "success": True,
-                "image_id": file_id,
-                "filename": filename,
-                "original_filename": file.filename,
-                "url": f"/uploads/thumbnails/{filename}",
-                "base64_data": f"data:image/jpeg;base64,{base64_data}",
-                "width": width,
-                "height": height,
-                "size": len(optimized_data)
-            })
+        except UploadTooLarge:
+            return {
+                "success": False,
+                "filename": file.filename,
+                "error": "File too large"
+            }
 
+        except ImageWorkerBusy:
+            return {
+                "success": False,
+                "filename": file.filename,
+                "error": "Image processing is busy, please retry shortly",
+                "busy": True
+            }
         except Exception as e:
-            results.append({
+            return {
                 "success": False,
                 "filename": file.filename,
                 "error": str(e)
-            })
+            }
+
+    # Files are optimized in parallel across the image worker processes
+    results = await asyncio.gather(*(process(file) for file in files))
+    if all(r.get("busy") for r in results):
+        raise busy_error()
 
     return {
         "uploaded": len([r for r in results if r["success"]]),
@@ -208,7 +202,7 @@ async def upload_multiple_images(
 @router.delete("/delete/{image_id}")
 async def delete_image(
     image_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete an uploaded image"""
@@ -239,7 +233,7 @@ async def delete_image(
 @router.post("/analyze")
 async def analyze_image(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -248,89 +242,24 @@ async def analyze_image(
     """
 
     try:
-        contents = await file.read()
-        img = Image.open(io.BytesIO(contents))
-
-        # Convert to RGB if necessary
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-
-        # Get dominant colors
-        img_small = img.resize((150, 150))
-        pixels = list(img_small.getdata())
-
-        # Simple color extraction (top 5 colors)
-        from collections import Counter
-        color_counter = Counter(pixels)
-        dominant_colors = color_counter.most_common(5)
-
-        # Convert to hex
-        hex_colors = []
-        for color, count in dominant_colors:
-            hex_color = '#{:02x}{:02x}{:02x}'.format(*color)
-            hex_colors.append({
-                "hex": hex_color,
-                "rgb": color,
-                "percentage": (count / len(pixels)) * 100
-            })
-
-        # Analyze brightness
-        grayscale = img.convert('L')
-        pixels_gray = list(grayscale.getdata())
-        avg_brightness = sum(pixels_gray) / len(pixels_gray)
-
-        # Determine if dark or light
-        is_dark = avg_brightness < 128
-
-        # Suggest text placement zones (avoid busy areas)
-        width, height = img.size
-        suggested_zones = []
-
-        # Top zone
-        top_section = img.crop((0, 0, width, height // 3))
-        top_brightness = sum(list(top_section.convert('L').getdata())) / (width * height // 3)
-        suggested_zones.append({
-            "zone": "top",
-            "y_range": [50, height // 3],
-            "suitability": "high" if top_brightness < 100 or top_brightness > 200 else "medium",
-            "suggested_color": "#FFFFFF" if top_brightness < 128 else "#000000"
-        })
-
-        # Bottom zone
-        bottom_section = img.crop((0, height * 2 // 3, width, height))
-        bottom_brightness = sum(list(bottom_section.convert('L').getdata())) / (width * height // 3)
-        suggested_zones.append({
-            "zone": "bottom",
-            "y_range": [height * 2 // 3, height - 50],
-            "suitability": "high" if bottom_brightness < 100 or bottom_brightness > 200 else "medium",
-            "suggested_color": "#FFFFFF" if bottom_brightness < 128 else "#000000"
-        })
+        contents = await read_limited(file)
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
+        )
 
+    try:
+        analysis = await image_worker.run(analyze_image_data, contents, settings.IMAGE_MAX_PIXELS)
         return {
             "success": True,
-            "analysis": {
-                "dimensions": {
-                    "width": width,
-                    "height": height,
-                    "aspect_ratio": f"{width}:{height}"
-                },
-                "colors": {
-                    "dominant": hex_colors,
-                    "palette_type": "dark" if is_dark else "light",
-                    "average_brightness": avg_brightness
-                },
-                "text_placement": {
-                    "suggested_zones": suggested_zones,
-                    "recommended_zone": "top" if top_brightness < bottom_brightness else "bottom"
-                },
-                "style_suggestions": {
-                    "text_color": "#FFFFFF" if is_dark else "#000000",
-                    "stroke_color": "#000000" if is_dark else "#FFFFFF",
-                    "overlay_recommended": avg_brightness > 100 and avg_brightness < 200
-                }
-            }
+            "analysis": analysis
         }
 
+    except ImageWorkerBusy:
+        raise busy_error()
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"[Image Analysis] Error: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to analyze image: {str(e)}")
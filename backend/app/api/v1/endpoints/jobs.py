@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.models.models import User
+from app.schemas.schemas import GenerationJobCreate, GenerationJobResponse
+from app.api.v1.endpoints.auth import get_current_user
+from app.api.v1.endpoints.creator_tools import SSE_HEADERS
+from app.services.generation_jobs import generation_jobs, FINISHED
+import asyncio
+import json
+
+router = APIRouter()
+
+
+def _job_response(job: dict) -> dict:
+    """Job record without the owner and stored params"""
+    return GenerationJobResponse(**job).dict()
+
+
+async def _get_owned_job(job_id: str, user_id: int) -> dict:
+    job = await generation_jobs.get(job_id, user_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+
+@router.post("", response_model=GenerationJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(
+    request: GenerationJobCreate,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Queue a script/titles/thumbnails/seo generation and return at once
+
+    params is the body the matching /creator-tools endpoint takes. The
+    generated Content id appears on the job once it has succeeded.
+    """
+    try:
+        job = await generation_jobs.submit(current_user.id, request.kind, request.params)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    return _job_response(job)
+
+
+@router.get("/{job_id}", response_model=GenerationJobResponse)
+async def get_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get a job's status"""
+    return _job_response(await _get_owned_job(job_id, current_user.id))
+
+
+@router.get("/{job_id}/events")
+async def job_events(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Stream a job's status as SSE events until it succeeds or fails"""
+    job = await _get_owned_job(job_id, current_user.id)
+
+    async def event_generator():
+        current = job
+        last = None
+        while True:
+            if current is None:
+                yield f"data: {json.dumps({'type': 'error', 'message': 'Job expired'})}\n\n"
+                return
+            payload = _job_response(current)
+            if payload != last:
+                yield f"data: {json.dumps({'type': 'status', **payload}, default=str)}\n\n"
+                last = payload
+            if current["status"] in FINISHED:
+                return
+            await asyncio.sleep(settings.JOB_EVENTS_POLL_SECONDS)
+            current = await generation_jobs.get(job_id, current_user.id)
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.models.models import User, Persona
 from app.schemas.schemas import PersonaCreate, PersonaUpdate, PersonaResponse
 from app.api.v1.endpoints.auth import get_current_user
@@ -12,16 +13,16 @@ router = APIRouter()
 @router.post("/", response_model=PersonaResponse, status_code=status.HTTP_201_CREATED)
 async def create_persona(
     persona_data: PersonaCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new persona"""
     # If setting as default, unset other defaults
     if persona_data.is_default:
-        db.query(Persona).filter(
+        await db.execute(update(Persona).where(
             Persona.user_id == current_user.id,
             Persona.type == persona_data.type
-        ).update({"is_default": False})
+        ).values(is_default=False))
     
     persona = Persona(
         user_id=current_user.id,
@@ -33,33 +34,35 @@ async def create_persona(
     )
     
     db.add(persona)
-    db.commit()
-    db.refresh(persona)
+    await db.commit()
+    await db.refresh(persona)
     
     return persona
 
 
 @router.get("/", response_model=List[PersonaResponse])
 async def get_personas(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all personas for current user"""
-    personas = db.query(Persona).filter(Persona.user_id == current_user.id).all()
+    result = await db.execute(select(Persona).where(Persona.user_id == current_user.id))
+    personas = result.scalars().all()
     return personas
 
 
 @router.get("/{persona_id}", response_model=PersonaResponse)
 async def get_persona(
     persona_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get specific persona"""
-    persona = db.query(Persona).filter(
+    result = await db.execute(select(Persona).where(
         Persona.id == persona_id,
         Persona.user_id == current_user.id
-    ).first()
+    ))
+    persona = result.scalars().first()
     
     if not persona:
         raise HTTPException(status_code=404, detail="Persona not found")
@@ -71,31 +74,32 @@ async def get_persona(
 async def update_persona(
     persona_id: int,
     persona_update: PersonaUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update persona"""
-    persona = db.query(Persona).filter(
+    result = await db.execute(select(Persona).where(
         Persona.id == persona_id,
         Persona.user_id == current_user.id
-    ).first()
+    ))
+    persona = result.scalars().first()
     
     if not persona:
         raise HTTPException(status_code=404, detail="Persona not found")
     
     # If setting as default, unset other defaults
     if persona_update.is_default:
-        db.query(Persona).filter(
+        await db.execute(update(Persona).where(
             Persona.user_id == current_user.id,
             Persona.type == persona.type,
             Persona.id != persona_id
-        ).update({"is_default": False})
+        ).values(is_default=False))
     
     for field, value in persona_update.dict(exclude_unset=True).items():
         setattr(persona, field, value)
     
-    db.commit()
-    db.refresh(persona)
+    await db.commit()
+    await db.refresh(persona)
     
     return persona
 
@@ -103,19 +107,20 @@ async def update_persona(
 @router.delete("/{persona_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_persona(
     persona_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete persona"""
-    persona = db.query(Persona).filter(
+    result = await db.execute(select(Persona).where(
         Persona.id == persona_id,
         Persona.user_id == current_user.id
-    ).first()
+    ))
+    persona = result.scalars().first()
     
     if not persona:
         raise HTTPException(status_code=404, detail="Persona not found")
     
-    db.delete(persona)
-    db.commit()
+    await db.delete(persona)
+    await db.commit()
     
     return None
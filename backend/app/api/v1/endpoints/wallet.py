@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.models.models import User
 from app.schemas.schemas import (
     WalletResponse, TopupRequest, TopupOrderResponse,
@@ -30,12 +31,12 @@ def get_payment_service() -> PaymentService:
 @router.get("/balance", response_model=WalletResponse)
 async def get_wallet_balance(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     payment_service: PaymentService = Depends(get_payment_service)
 ):
     """Get current user's wallet balance"""
     wallet_service = WalletService(db, payment_service)
-    wallet = wallet_service.get_or_create_wallet(current_user.id)
+    wallet = await wallet_service.get_or_create_wallet(current_user.id)
     return wallet
 
 
@@ -43,13 +44,13 @@ async def get_wallet_balance(
 async def create_topup_order(
     topup_data: TopupRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     payment_service: PaymentService = Depends(get_payment_service)
 ):
     """Create a Razorpay order for wallet topup"""
     try:
         wallet_service = WalletService(db, payment_service)
-        order, transaction = wallet_service.create_topup_order(
+        order, transaction = await wallet_service.create_topup_order(
             user_id=current_user.id,
             amount=topup_data.amount
         )
@@ -69,13 +70,13 @@ async def create_topup_order(
 async def verify_payment(
     payment_data: PaymentVerificationRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     payment_service: PaymentService = Depends(get_payment_service)
 ):
     """Verify payment and credit wallet"""
     try:
         wallet_service = WalletService(db, payment_service)
-        transaction = wallet_service.verify_and_complete_payment(
+        transaction = await wallet_service.verify_and_complete_payment(
             order_id=payment_data.razorpay_order_id,
             payment_id=payment_data.razorpay_payment_id,
             signature=payment_data.razorpay_signature
@@ -93,12 +94,12 @@ async def get_transactions(
     limit: int = 50,
     offset: int = 0,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     payment_service: PaymentService = Depends(get_payment_service)
 ):
     """Get transaction history"""
     wallet_service = WalletService(db, payment_service)
-    transactions = wallet_service.get_transactions(
+    transactions = await wallet_service.get_transactions(
         user_id=current_user.id,
         limit=limit,
         offset=offset
@@ -110,7 +111,7 @@ async def get_transactions(
 async def request_payout(
     payout_data: PayoutRequestSchema,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     payment_service: PaymentService = Depends(get_payment_service)
 ):
     """Request withdrawal (creators only)"""
@@ -122,7 +123,7 @@ async def request_payout(
 
     try:
         wallet_service = WalletService(db, payment_service)
-        payout_request = wallet_service.create_payout_request(
+        payout_request = await wallet_service.create_payout_request(
             user_id=current_user.id,
             amount=payout_data.amount,
             bank_details={
@@ -148,7 +149,7 @@ async def request_payout(
 @router.post("/cleanup-pending")
 async def cleanup_pending_transactions(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mark old pending transactions as failed (older than 30 minutes)"""
     from app.models.models import Transaction, TransactionStatus, Wallet
@@ -156,17 +157,19 @@ async def cleanup_pending_transactions(
 
     try:
         # Get user's wallet
-        wallet = db.query(Wallet).filter(Wallet.user_id == current_user.id).first()
+        result = await db.execute(select(Wallet).where(Wallet.user_id == current_user.id))
+        wallet = result.scalars().first()
         if not wallet:
             return {"cleaned": 0}
 
         # Find pending transactions older than 30 minutes
         cutoff_time = datetime.now() - timedelta(minutes=30)
-        old_pending = db.query(Transaction).filter(
+        result = await db.execute(select(Transaction).where(
             Transaction.wallet_id == wallet.id,
             Transaction.status == TransactionStatus.PENDING,
             Transaction.created_at < cutoff_time
-        ).all()
+        ))
+        old_pending = result.scalars().all()
 
         count = 0
         for transaction in old_pending:
@@ -175,7 +178,7 @@ async def cleanup_pending_transactions(
             count += 1
 
         if count > 0:
-            db.commit()
+            await db.commit()
             logger.info(f"✅ Cleaned up {count} old pending transactions for user {current_user.id}")
 
         return {"cleaned": count, "message": f"Marked {count} old pending transactions as failed"}
@@ -188,7 +191,7 @@ async def cleanup_pending_transactions(
 @router.post("/webhook")
 async def razorpay_webhook(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     payment_service: PaymentService = Depends(get_payment_service)
 ):
     """Handle Razorpay webhook events"""
@@ -219,31 +222,33 @@ async def razorpay_webhook(
             # Mark transaction as failed
             if order_id:
                 from app.models.models import Transaction, TransactionStatus
-                transaction = db.query(Transaction).filter(
+                result = await db.execute(select(Transaction).where(
                     Transaction.razorpay_order_id == order_id
-                ).first()
+                ))
+                transaction = result.scalars().first()
 
                 if transaction and transaction.status == TransactionStatus.PENDING:
                     transaction.status = TransactionStatus.FAILED
                     transaction.razorpay_payment_id = payment_id
                     transaction.description = f"{transaction.description} - Failed: {error_reason}"
-                    db.commit()
+                    await db.commit()
                     logger.info(f"✅ Marked transaction {transaction.id} as failed")
 
         elif event_type == 'payout.processed':
             payout_id = event['payload']['payout']['entity']['id']
             logger.info(f"✅ Webhook: Payout processed: {payout_id}")
             # Update payout status to completed
-            from app.models.models import PayoutRequest, PayoutStatus
-            payout_request = db.query(PayoutRequest).join(
+            from app.models.models import PayoutRequest, PayoutStatus, Transaction
+            result = await db.execute(select(PayoutRequest).join(
                 Transaction
-            ).filter(
+            ).where(
                 Transaction.razorpay_payout_id == payout_id
-            ).first()
+            ))
+            payout_request = result.scalars().first()
 
             if payout_request:
                 payout_request.status = PayoutStatus.COMPLETED
-                db.commit()
+                await db.commit()
                 logger.info(f"✅ Marked payout request {payout_request.id} as completed")
 
         elif event_type == 'payout.failed':
@@ -254,27 +259,29 @@ async def razorpay_webhook(
             logger.warning(f"❌ Webhook: Payout failed: {payout_id}, Reason: {error_reason}")
             # Refund amount to wallet
             from app.models.models import PayoutRequest, PayoutStatus, Transaction, Wallet
-            payout_request = db.query(PayoutRequest).join(
+            result = await db.execute(select(PayoutRequest).join(
                 Transaction
-            ).filter(
+            ).where(
                 Transaction.razorpay_payout_id == payout_id
-            ).first()
+            ))
+            payout_request = result.scalars().first()
 
             if payout_request:
                 payout_request.status = PayoutStatus.FAILED
                 payout_request.admin_notes = error_reason
 
                 # Refund the amount back to wallet
-                wallet = db.query(Wallet).filter(
+                result = await db.execute(select(Wallet).where(
                     Wallet.user_id == payout_request.user_id
-                ).first()
+                ))
+                wallet = result.scalars().first()
 
                 if wallet:
                     wallet.balance += payout_request.amount
                     wallet.version += 1
                     logger.info(f"✅ Refunded ₹{payout_request.amount} to wallet {wallet.id}")
 
-                db.commit()
+                await db.commit()
 
         return {"status": "ok"}
 
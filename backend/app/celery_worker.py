@@ -0,0 +1,69 @@
+"""
+Celery worker for background generation jobs (JOB_BACKEND="celery")
+
+    celery -A app.celery_worker worker --loglevel=info
+
+Tasks carry only a job id; the job itself lives in Redis (see
+app.services.generation_jobs), so any worker can pick up a retry. Tasks are
+acknowledged late and prefetched one at a time, so a job whose worker dies
+is redelivered instead of lost.
+"""
+
+import asyncio
+
+from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
+
+from app.core.config import settings
+
+RUN_JOB_TASK = "creatorx.run_generation_job"
+
+celery_app = Celery(
+    "creatorx",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND
+)
+celery_app.conf.update(
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    task_ignore_result=True,  # outcomes are recorded on the job itself
+    task_time_limit=settings.JOB_VISIBILITY_TIMEOUT + 60,
+    broker_transport_options={"visibility_timeout": settings.JOB_VISIBILITY_TIMEOUT + 60},
+)
+app = celery_app
+
+# One event loop per worker process, so the async engine's pooled
+# connections and the provider clients are reused across tasks
+_loop = None
+
+
+@worker_process_init.connect
+def _init_loop(**kwargs):
+    global _loop
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+
+
+@worker_process_shutdown.connect
+def _close_loop(**kwargs):
+    if _loop is not None:
+        from app.core.database import async_engine
+        _loop.run_until_complete(async_engine.dispose())
+        _loop.close()
+
+
+def _run(coro):
+    if _loop is None:  # solo/threads pools never fire worker_process_init
+        _init_loop()
+    return _loop.run_until_complete(coro)
+
+
+@celery_app.task(name=RUN_JOB_TASK, bind=True, max_retries=None)
+def run_generation_job(self, job_id: str):
+    from app.services.generation_jobs import generation_jobs
+
+    retry_in = _run(generation_jobs.execute(job_id))
+    if retry_in is not None:
+        # The retry budget is counted on the job, not by Celery
+        raise self.retry(countdown=retry_in)
@@ -17,6 +17,7 @@ class Settings(BaseSettings):
     CLICKHOUSE_PASSWORD: str = "creatorx_password"
     CLICKHOUSE_DATABASE: str = "creatorx"
     REDIS_URL: str
+    DB_CREATE_ALL_ON_STARTUP: bool = True  # run Base.metadata.create_all in the app lifespan
     
     # Security
     JWT_SECRET_KEY: str
@@ -65,11 +66,102 @@ class Settings(BaseSettings):
     # File Upload
     MAX_UPLOAD_SIZE: int = 10485760  # 10MB
     UPLOAD_DIR: str = "./uploads"
+    IMAGE_WORKER_PROCESSES: int = 2  # process pool for upload resizing/encoding
+    IMAGE_WORKER_MAX_PENDING: int = 16  # queued + running image jobs before uploads get 503
+    IMAGE_MAX_PIXELS: int = 40000000  # uploads with more pixels are rejected before decoding
+    
+    # Generated images: stored by SHA-256, Content rows keep only the URL
+    ARTIFACT_BACKEND: str = "local"
+    ARTIFACT_DIR: str = "./uploads/artifacts"
+    ARTIFACT_URL_PREFIX: str = "/api/v1/artifacts"
+    
+    # AI response cache (identical generate() calls)
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_MAX_ENTRIES: int = 512
+    AI_CACHE_REDIS_ENABLED: bool = True
+    
+    # Client-side provider admission control (0 = unlimited)
+    OPENAI_MAX_CONCURRENCY: int = 16
+    OPENAI_RPM: int = 500
+    OPENAI_TPM: int = 300000
+    GROQ_MAX_CONCURRENCY: int = 8
+    GROQ_RPM: int = 30
+    GROQ_TPM: int = 0
+    VERTEX_MAX_CONCURRENCY: int = 16
+    VERTEX_RPM: int = 60
+    VERTEX_TPM: int = 0
+    IMAGE_MAX_CONCURRENCY: int = 4  # per image model
+    IMAGE_RPM: int = 15
+    
+    # Provider circuit breakers (rolling window per provider:model)
+    BREAKER_WINDOW_SECONDS: float = 60
+    BREAKER_MIN_CALLS: int = 5
+    BREAKER_FAILURE_RATE: float = 0.5  # share of failed or slow calls that opens the breaker
+    BREAKER_SLOW_CALL_SECONDS: float = 90
+    BREAKER_OPEN_SECONDS: float = 30
+    
+    # Provider failover for AIService.generate
+    AI_FAILOVER_ENABLED: bool = False
+    AI_FAILOVER_CHAIN: Union[List[str], str] = ["vertex", "openai", "groq"]
+    
+    @field_validator('AI_FAILOVER_CHAIN', mode='before')
+    @classmethod
+    def parse_failover_chain(cls, v):
+        if isinstance(v, str):
+            return [provider.strip() for provider in v.split(',') if provider.strip()]
+        return v
+    
+    # Latency hedging for tools with a hedge_provider in TOOL_CONFIGS
+    AI_HEDGING_ENABLED: bool = True
+    AI_HEDGE_BUDGET_RATIO: float = 0.1  # max share of requests that may fire a hedge
+    AI_HEDGE_DEFAULT_DELAY: float = 3.0  # seconds, until enough latency samples exist
+    AI_HEDGE_MIN_SAMPLES: int = 20
+    
+    # Shared outbound HTTP pool (image downloads) and startup warm-up
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    PROVIDER_WARMUP: bool = True
+    PROVIDER_SDK_THREADS: int = 16  # dedicated pool for blocking SDK calls (Imagen, google-genai)
+    IMG2IMG_MAX_CONCURRENCY: int = 3  # image-to-image variations generated at once per request
+    
+    # Identical in-flight generations share one call; each caller stops waiting after
+    # its tool's timeout (the call is only cancelled once nobody is waiting). Scripts
+    # get the base plus an allowance per minute of video: long ones run many passes
+    GENERATION_COALESCE_TIMEOUT: float = 300.0
+    SCRIPT_COALESCE_SECONDS_PER_MINUTE: float = 30.0
+    THUMBNAIL_COALESCE_TIMEOUT: float = 180.0
+    
+    # Streamed thumbnails: images still generating after this many seconds are dropped
+    THUMBNAIL_STREAM_DEADLINE_SECONDS: float = 120.0
+    
+    # Follow-up calls when a long generation (continue_on_length tools) hits the token limit
+    AI_MAX_CONTINUATIONS: int = 3
+    
+    # Long scripts: outline first, then sections written in parallel
+    SCRIPT_PARALLEL_MIN_MINUTES: int = 15
+    SCRIPT_SECTION_MINUTES: int = 4  # target length of one main section
+    SCRIPT_SECTION_CONCURRENCY: int = 4
+    
+    # Streamed scripts are validated as they arrive; an attempt that goes wrong early
+    # (no hook, outline instead of narration) is cancelled and re-steered this many times
+    SCRIPT_STREAM_VALIDATION: bool = True
+    SCRIPT_STREAM_MAX_RESTEERS: int = 1
     
     # Celery
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/0"
     
+    # Background generation jobs: "local" runs them on asyncio workers inside the API
+    # process (state in memory), "celery" on app.celery_worker (state in REDIS_URL)
+    JOB_BACKEND: str = "local"
+    JOB_LOCAL_CONCURRENCY: int = 4
+    JOB_MAX_RETRIES: int = 2
+    JOB_RETRY_BACKOFF_SECONDS: float = 10.0  # multiplied by the attempt number
+    JOB_VISIBILITY_TIMEOUT: int = 900  # an attempt is cancelled, and its job re-claimable, after this
+    JOB_RESULT_TTL: int = 86400  # how long job records are kept
+    JOB_EVENTS_POLL_SECONDS: float = 1.0
+    
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -1,9 +1,20 @@
+from contextlib import asynccontextmanager
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
-# SQLAlchemy engine
+
+def _async_database_url(url: str) -> str:
+    """Point a sync Postgres URL at the asyncpg driver"""
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+# SQLAlchemy engine (used by scripts and migrations)
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
@@ -12,9 +23,27 @@ engine = create_engine(
     echo=settings.DEBUG
 )
 
+# Async engine (used by API endpoints so queries don't block the event loop)
+async_engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL),
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20,
+    echo=settings.DEBUG
+)
+
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async session factory - objects stay readable after commit, since
+# async sessions cannot lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base class for models
 Base = declarative_base()
 
@@ -26,3 +55,21 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependency to get async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+@asynccontextmanager
+async def async_session_scope():
+    """Short-lived session for a single unit of work.
+
+    Use this around the DB steps of handlers that also await slow providers,
+    so the pooled connection is returned as soon as the step finishes rather
+    than being held for the whole request.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -4,7 +4,8 @@ from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from app.core.config import settings
 from app.api.v1.router import api_router
-from app.core.database import engine, Base
+from app.core.database import async_engine, Base
+from contextlib import asynccontextmanager
 import logging
 from pathlib import Path
 from typing import List
@@ -13,8 +14,33 @@ from typing import List
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create tables and warm provider clients before traffic; close pools on shutdown"""
+    from app.services.provider_clients import provider_clients
+    from app.services.generation_jobs import generation_jobs
+    from app.services.image_worker import image_worker
+
+    # Schema creation runs here rather than at import time, so importing
+    # app.main needs no database (production can run create_tables.py instead)
+    if settings.DB_CREATE_ALL_ON_STARTUP:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    if settings.PROVIDER_WARMUP:
+        from app.services.ai_service import ai_service
+        # First access runs vertexai.init (credential loading) - keep it off the loop
+        vertex_enabled = await provider_clients.run_sync(lambda: ai_service.vertex_available)
+        await provider_clients.warm_up(
+            vertex_enabled=vertex_enabled,
+            image_models=["imagegeneration@006"]
+        )
+    yield
+    await generation_jobs.shutdown()
+    image_worker.shutdown()
+    await provider_clients.aclose()
+    await async_engine.dispose()
+
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -22,6 +48,7 @@ app = FastAPI(
     description="The Ultimate Creator Platform - AI-Powered Content Creation & Brand Collaboration",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Custom CORS origin validator for ngrok support
@@ -81,10 +108,18 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    from app.services.response_cache import response_cache
+    from app.services.rate_limiter import admission_control
+    from app.services.circuit_breaker import circuit_breakers
+    from app.services.hedging import hedger
     return {
         "status": "healthy",
         "service": "creatorx-api",
-        "version": settings.APP_VERSION
+        "version": settings.APP_VERSION,
+        "ai_cache": response_cache.get_stats(),
+        "ai_admission": admission_control.get_stats(),
+        "ai_breakers": circuit_breakers.get_stats(),
+        "ai_hedging": hedger.get_stats()
     }
 
 
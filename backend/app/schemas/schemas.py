@@ -126,6 +126,7 @@ class ScriptGenerationRequest(BaseModel):
     script_flow: Optional[str] = None  # e.g., "Hook → Problem → Solution → How it works → Results → CTA"
     style: Optional[str] = None  # e.g., "educational", "storytelling", "tutorial", "vlog-style"
     ai_model: str = "openai"
+    parallel_sections: Optional[bool] = None  # Outline + parallel sections; None = auto for long videos
     # Regeneration fields
     regenerate_feedback: Optional[str] = None
     previous_script: Optional[str] = None
@@ -133,6 +134,12 @@ class ScriptGenerationRequest(BaseModel):
     version_number: Optional[int] = None
 
 
+class ScriptSectionRegenerateRequest(BaseModel):
+    sections: List[str] = Field(..., min_length=1)  # Section markers to rewrite, e.g. "HOOK", "Section 2", "OUTRO"
+    regenerate_feedback: str
+    ai_model: Optional[str] = None  # Defaults to the model that wrote the script
+
+
 # Title Generation Schemas
 class TitleGenerationRequest(BaseModel):
     video_topic: str
@@ -283,6 +290,23 @@ class SEOOptimizationResponse(BaseModel):
     seo_score: float
 
 
+# Generation Job Schemas
+class GenerationJobCreate(BaseModel):
+    kind: str = Field(..., pattern="^(script|titles|thumbnails|seo)$")
+    params: Dict  # Body of the matching creator-tools request
+
+
+class GenerationJobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str  # queued, running, succeeded, failed
+    attempts: int
+    content_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
 # Feedback Schemas
 class FeedbackCreate(BaseModel):
     content_id: int
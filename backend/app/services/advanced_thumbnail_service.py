@@ -3,8 +3,9 @@ Advanced Thumbnail Generation Service with AI Intelligence
 Generates professional thumbnails with CTR optimization, emotion targeting, and advanced composition
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, AsyncIterator
 from app.services.ai_service import ai_service
+from app.services import tolerant_json
 from app.schemas.schemas import ThumbnailIdeaRequest
 import json
 import uuid
@@ -125,12 +126,12 @@ class AdvancedThumbnailService:
         "retro": ["Courier", "Georgia"]
     }
 
-    async def generate_advanced_thumbnails(
+    def _prepare(
         self,
         request: ThumbnailIdeaRequest,
         persona: Optional[Dict] = None
-    ) -> List[Dict]:
-        """Generate advanced thumbnails with all parameters"""
+    ) -> Tuple[str, str, str, Dict, Dict]:
+        """Build (system_prompt, prompt, emotion, emotion_rules, color_data) for a request"""
 
         # Determine emotion rules
         emotion = request.emotion or "exciting"
@@ -159,6 +160,23 @@ You create thumbnails that MAXIMIZE click-through rates by triggering specific e
 CRITICAL: Return ONLY valid JSON array of thumbnail templates with complete layer data."""
 
         prompt = self._build_advanced_prompt(request, emotion_rules, color_data, persona, has_custom_images, has_reference_images)
+        return system_prompt, prompt, emotion, emotion_rules, color_data
+
+    def _score_template(self, template: Dict, request: ThumbnailIdeaRequest, emotion: str) -> Dict:
+        """Add CTR score and analysis to a parsed template"""
+        template['ctr_score'] = self._calculate_ctr_score(template, request)
+        template['ctr_factors'] = self._analyze_ctr_factors(template)
+        template['emotion_target'] = emotion
+        template['mobile_optimized'] = request.optimize_for_mobile
+        return template
+
+    async def generate_advanced_thumbnails(
+        self,
+        request: ThumbnailIdeaRequest,
+        persona: Optional[Dict] = None
+    ) -> List[Dict]:
+        """Generate advanced thumbnails with all parameters"""
+        system_prompt, prompt, emotion, emotion_rules, color_data = self._prepare(request, persona)
 
         try:
             response = await ai_service.generate(
@@ -170,15 +188,8 @@ CRITICAL: Return ONLY valid JSON array of thumbnail templates with complete laye
                 tool_type='thumbnail'
             )
 
-            # Parse response
-            templates = self._parse_ai_response(response, request)
-
-            # Add CTR scores
-            for i, template in enumerate(templates):
-                template['ctr_score'] = self._calculate_ctr_score(template, request)
-                template['ctr_factors'] = self._analyze_ctr_factors(template)
-                template['emotion_target'] = emotion
-                template['mobile_optimized'] = request.optimize_for_mobile
+            # Parse response and add CTR scores
+            templates = [self._score_template(t, request, emotion) for t in self._parse_ai_response(response, request)]
 
             # Sort by CTR score
             templates.sort(key=lambda x: x.get('ctr_score', 0), reverse=True)
@@ -189,6 +200,50 @@ CRITICAL: Return ONLY valid JSON array of thumbnail templates with complete laye
             print(f"[Advanced Thumbnail] Error: {e}")
             return self._generate_advanced_fallback(request, emotion_rules, color_data)
 
+    async def stream_advanced_thumbnails(
+        self,
+        request: ThumbnailIdeaRequest,
+        persona: Optional[Dict] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Yield scored templates one by one as each array element completes
+
+        Templates arrive in generation order (the caller sorts by CTR once the
+        stream ends). If the stream fails before any template, the fallback
+        templates are yielded instead.
+        """
+        system_prompt, prompt, emotion, emotion_rules, color_data = self._prepare(request, persona)
+        parser = tolerant_json.IncrementalJSONArrayParser()
+        emitted = 0
+
+        try:
+            stream = ai_service.generate_stream(
+                prompt=prompt,
+                model=request.ai_model,
+                temperature=0.8,
+                max_tokens=4500,
+                system_prompt=system_prompt,
+                tool_type='thumbnail'
+            )
+            try:
+                async for delta in stream:
+                    for template in parser.feed(delta):
+                        if isinstance(template, dict):
+                            yield self._score_template(template, request, emotion)
+                            emitted += 1
+            finally:
+                await stream.aclose()
+            for template in parser.finish():
+                if isinstance(template, dict):
+                    yield self._score_template(template, request, emotion)
+                    emitted += 1
+        except Exception as e:
+            print(f"[Advanced Thumbnail] Streaming error: {e}")
+
+        if not emitted:
+            for template in self._generate_advanced_fallback(request, emotion_rules, color_data):
+                yield template
+
     def _build_advanced_prompt(
         self,
         request: ThumbnailIdeaRequest,
@@ -201,8 +256,8 @@ CRITICAL: Return ONLY valid JSON array of thumbnail templates with complete laye
         """Build comprehensive AI prompt with all parameters"""
 
         # Get title analysis
-        title_words = request.video_title.split()
-        main_text = " ".join(title_words[:4]) if len(title_words) >= 4 else request.video_title
+        title_words = request.thumbnail_prompt.split()
+        main_text = " ".join(title_words[:4]) if len(title_words) >= 4 else request.thumbnail_prompt
 
         # Determine font
         font_style = request.font_style or "bold"
@@ -234,8 +289,7 @@ CRITICAL: Return ONLY valid JSON array of thumbnail templates with complete laye
 {'='*80}
 
 VIDEO DETAILS:
-Title: {request.video_title}
-Topic: {request.video_topic}
+Thumbnail brief: {request.thumbnail_prompt}
 Platform: {request.target_platform.upper()}
 Templates: {request.count}
 
@@ -446,30 +500,12 @@ Return ONLY the JSON array, no other text:
         return prompt
 
     def _parse_ai_response(self, response: str, request: ThumbnailIdeaRequest) -> List[Dict]:
-        """Parse AI response with multiple fallback strategies"""
+        """Parse the AI response; fences, prose and malformed JSON are handled by tolerant_json"""
         try:
-            response_clean = response.strip()
-
-            # Remove markdown code blocks
-            if response_clean.startswith('```'):
-                lines = response_clean.split('\n')
-                response_clean = '\n'.join([l for l in lines if not l.startswith('```')])
-
-            # Try to find JSON array
-            start_idx = response_clean.find('[')
-            end_idx = response_clean.rfind(']') + 1
-
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = response_clean[start_idx:end_idx]
-                templates = json.loads(json_str)
-
-                if isinstance(templates, list) and len(templates) > 0:
-                    return templates
-
-            # If no valid JSON found, use fallback
-            raise ValueError("No valid JSON array found")
-
-        except Exception as e:
+            return tolerant_json.loads(
+                response, schema={"type": "array", "min_items": 1, "items": {"type": "object"}}
+            )
+        except ValueError as e:
             print(f"[Advanced Thumbnail] JSON parse error: {e}")
             print(f"[Advanced Thumbnail] Response: {response[:500]}")
             return []
@@ -537,8 +573,8 @@ Return ONLY the JSON array, no other text:
         templates = []
 
         # Extract key words
-        title_words = request.video_title.upper().split()
-        main_text = " ".join(title_words[:3]) if len(title_words) >= 3 else request.video_title.upper()
+        title_words = request.thumbnail_prompt.upper().split()
+        main_text = " ".join(title_words[:3]) if len(title_words) >= 3 else request.thumbnail_prompt.upper()
 
         for i, palette in enumerate(color_data['palettes'][:request.count]):
             template_id = f"thumb_{uuid.uuid4().hex[:8]}"
@@ -587,7 +623,7 @@ Return ONLY the JSON array, no other text:
             template = {
                 "id": template_id,
                 "name": f"{request.style or 'Bold'} Style {i+1}",
-                "description": f"High-impact thumbnail for {request.video_topic}",
+                "description": f"High-impact thumbnail for {request.thumbnail_prompt[:80]}",
                 "style": request.style or "bold",
                 "canvas_width": 1280,
                 "canvas_height": 720,
@@ -1,13 +1,14 @@
-from typing import Optional, Dict, List
-from openai import AsyncOpenAI
-import google.auth
-from google.cloud import aiplatform
-from google.oauth2 import service_account
-import json
-from groq import AsyncGroq
+from typing import Optional, Dict, List, AsyncIterator, Tuple
 from app.core.config import settings
+from app.services.response_cache import response_cache
+from app.services.rate_limiter import admission_control, estimate_tokens
+from app.services.circuit_breaker import circuit_breakers, CircuitOpenError
+from app.services.hedging import hedger
+from app.services.provider_clients import provider_clients
+from app.services import tolerant_json
 import logging
 import asyncio
+import time
 from functools import wraps
 import os
 
@@ -20,42 +21,84 @@ if settings.GOOGLE_APPLICATION_CREDENTIALS and os.path.exists(settings.GOOGLE_AP
 elif settings.GOOGLE_APPLICATION_CREDENTIALS:
     logger.warning(f"Global: Credentials file not found at: {settings.GOOGLE_APPLICATION_CREDENTIALS}")
 
+# Text model behind each provider back-end (also names its circuit breaker)
+PROVIDER_MODELS = {
+    'openai': 'gpt-4-turbo-preview',
+    'groq': 'llama-3.3-70b-versatile',
+    'vertex': 'gemini-2.5-pro',
+}
+
+# Largest completion each model accepts in one call; longer outputs are continued
+PROVIDER_MAX_OUTPUT_TOKENS = {
+    'openai': 4096,
+    'groq': 32768,
+    'vertex': 65535,  # Gemini 2.5 thinking tokens also count against this
+}
+
+# Appended as the next user turn when a response stopped on the token limit
+CONTINUATION_PROMPT = (
+    "Your previous response was cut off by the length limit. Continue EXACTLY where it "
+    "stopped - mid-sentence if necessary. Do not repeat anything already written, do not "
+    "restart the script and do not add any preamble."
+)
+
+SPEAKING_WORDS_PER_MINUTE = 150
+TOKENS_PER_WORD = 1.35
+# Section markers, timestamps and [B-ROLL]/[TEXT ON SCREEN] notes on top of spoken words
+SCRIPT_MARKUP_OVERHEAD = 1.3
+
+
+def estimate_script_tokens(duration_minutes: float, minimum: int = 4000) -> int:
+    """Output token budget for a script of the given spoken duration"""
+    words = duration_minutes * SPEAKING_WORDS_PER_MINUTE
+    return max(minimum, int(words * TOKENS_PER_WORD * SCRIPT_MARKUP_OVERHEAD) + 500)
+
+
 # Tool-specific parameter optimization for best results per content type
 TOOL_CONFIGS = {
     'script': {
         'temperature': 0.7,
         'max_tokens': 4000,
         'top_p': 0.9,
+        'cache_ttl': 1800,  # seconds an identical request is served from cache
+        'continue_on_length': True,  # ask for the rest instead of returning a truncated script
         'description': 'Balanced creativity with structure for video scripts'
     },
     'title': {
         'temperature': 0.85,
         'max_tokens': 300,
         'top_p': 0.95,
+        'cache_ttl': 3600,
+        'hedge_provider': 'groq',  # Interactive: race a second provider past the primary's p90
         'description': 'High creativity for catchy, CTR-optimized titles'
     },
     'caption': {
         'temperature': 0.8,
         'max_tokens': 500,
         'top_p': 0.9,
+        'cache_ttl': 3600,
+        'hedge_provider': 'groq',
         'description': 'Creative yet platform-appropriate social captions'
     },
     'thumbnail': {
         'temperature': 0.8,
         'max_tokens': 1000,
         'top_p': 0.9,
+        'cache_ttl': 1800,
         'description': 'Creative visual concepts with structured output'
     },
     'seo': {
         'temperature': 0.7,
         'max_tokens': 2000,
         'top_p': 0.85,
+        'cache_ttl': 3600,
         'description': 'Precise, keyword-focused SEO optimization'
     },
     'default': {
         'temperature': 0.7,
         'max_tokens': 2000,
         'top_p': 0.9,
+        'cache_ttl': 600,
         'description': 'Balanced default settings'
     }
 }
@@ -65,42 +108,63 @@ class AIService:
     """Unified AI service supporting OpenAI, Google Vertex AI, and Groq with retry logic and optimization"""
 
     def __init__(self):
-        # Initialize OpenAI
-        self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        # Provider SDKs are imported and initialized on first use, so importing
+        # this module (and app.main) stays fast and needs no network
+        self._openai_client = None
+        self._groq_client = None
+        self._vertex_available: Optional[bool] = None
+        self.vertex_credentials = None
 
-        # Initialize Groq
-        if settings.GROQ_API_KEY:
-            self.groq_client = AsyncGroq(api_key=settings.GROQ_API_KEY)
-        else:
-            self.groq_client = None
+    @property
+    def openai_client(self):
+        """OpenAI client, created on first use"""
+        if self._openai_client is None:
+            from openai import AsyncOpenAI
+            self._openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        return self._openai_client
+
+    @property
+    def groq_client(self):
+        """Groq client, created on first use (None if no API key is configured)"""
+        if self._groq_client is None and settings.GROQ_API_KEY:
+            from groq import AsyncGroq
+            self._groq_client = AsyncGroq(api_key=settings.GROQ_API_KEY)
+        return self._groq_client
+
+    @property
+    def vertex_available(self) -> bool:
+        """Whether Vertex AI is usable; runs vertexai.init on first access"""
+        if self._vertex_available is None:
+            self._vertex_available = self._init_vertex()
+        return self._vertex_available
+
+    def _init_vertex(self) -> bool:
+        """Initialize Vertex AI with explicit credentials"""
+        if not settings.GOOGLE_VERTEX_PROJECT_ID:
+            return False
 
-        # Initialize Vertex AI
-        self.vertex_credentials = None
-        if settings.GOOGLE_VERTEX_PROJECT_ID:
-            try:
-                # Set up credentials from JSON file if GOOGLE_APPLICATION_CREDENTIALS is set
-                if settings.GOOGLE_APPLICATION_CREDENTIALS:
-                    creds_path = settings.GOOGLE_APPLICATION_CREDENTIALS
-                    if os.path.exists(creds_path):
-                        self.vertex_credentials = service_account.Credentials.from_service_account_file(creds_path)
-                        logger.info(f"Loaded Vertex AI credentials from: {creds_path}")
-                    else:
-                        logger.warning(f"Credentials file not found at: {creds_path}")
-
-                # Initialize Vertex AI with explicit credentials
-                import vertexai
-                vertexai.init(
-                    project=settings.GOOGLE_VERTEX_PROJECT_ID,
-                    location=settings.GOOGLE_VERTEX_LOCATION,
-                    credentials=self.vertex_credentials
-                )
-                self.vertex_available = True
-                logger.info(f"Vertex AI initialized successfully for project: {settings.GOOGLE_VERTEX_PROJECT_ID}")
-            except Exception as e:
-                logger.error(f"Vertex AI initialization failed: {e}")
-                self.vertex_available = False
-        else:
-            self.vertex_available = False
+        try:
+            # Set up credentials from JSON file if GOOGLE_APPLICATION_CREDENTIALS is set
+            if settings.GOOGLE_APPLICATION_CREDENTIALS:
+                creds_path = settings.GOOGLE_APPLICATION_CREDENTIALS
+                if os.path.exists(creds_path):
+                    from google.oauth2 import service_account
+                    self.vertex_credentials = service_account.Credentials.from_service_account_file(creds_path)
+                    logger.info(f"Loaded Vertex AI credentials from: {creds_path}")
+                else:
+                    logger.warning(f"Credentials file not found at: {creds_path}")
+
+            import vertexai
+            vertexai.init(
+                project=settings.GOOGLE_VERTEX_PROJECT_ID,
+                location=settings.GOOGLE_VERTEX_LOCATION,
+                credentials=self.vertex_credentials
+            )
+            logger.info(f"Vertex AI initialized successfully for project: {settings.GOOGLE_VERTEX_PROJECT_ID}")
+            return True
+        except Exception as e:
+            logger.error(f"Vertex AI initialization failed: {e}")
+            return False
 
     def get_tool_config(self, tool_type: str) -> Dict:
         """Get optimized parameters for specific content generation tool"""
@@ -111,6 +175,9 @@ class AIService:
         for attempt in range(max_retries):
             try:
                 return await func()
+            except CircuitOpenError:
+                # Provider is known to be down - retrying would only add delay
+                raise
             except Exception as e:
                 if attempt == max_retries - 1:
                     # Last attempt, raise the error
@@ -132,7 +199,10 @@ class AIService:
         system_prompt: Optional[str] = None,
         response_format: Optional[Dict] = None,
         tool_type: Optional[str] = None,
-        use_retry: bool = True
+        use_retry: bool = True,
+        use_cache: bool = True,
+        failover: Optional[bool] = None,
+        output_budget: Optional[int] = None
     ) -> str:
         """
         Generate text using specified AI model with automatic retry logic
@@ -146,44 +216,256 @@ class AIService:
             response_format: Optional format specification (OpenAI structured outputs)
             tool_type: Optional tool type for parameter optimization (script, title, caption, thumbnail, seo)
             use_retry: Whether to use retry logic with exponential backoff
+            use_cache: Serve identical requests from the response cache (disable
+                when a fresh sample is wanted, e.g. regeneration)
+            failover: Fall back to the next healthy provider in AI_FAILOVER_CHAIN
+                if this one fails or its circuit is open (default: AI_FAILOVER_ENABLED)
+            output_budget: Output tokens wanted in total, overriding the tool's
+                max_tokens (e.g. estimate_script_tokens for long scripts). Each call
+                is capped at the provider's limit; tools with continue_on_length
+                ask for the remainder when a call stops on the limit.
 
         Returns:
             Generated text content
         """
 
         # Apply tool-specific optimizations if tool_type provided
+        continue_on_length = False
         if tool_type:
             tool_config = self.get_tool_config(tool_type)
             temperature = tool_config['temperature']
             max_tokens = tool_config['max_tokens']
+            continue_on_length = tool_config.get('continue_on_length', False)
             logger.info(f"Using optimized config for {tool_type}: temp={temperature}, max_tokens={max_tokens}")
+        if output_budget:
+            max_tokens = output_budget
+
+        if model not in PROVIDER_MODELS:
+            raise ValueError(f"Unsupported model: {model}")
+
+        providers = [model]
+        if settings.AI_FAILOVER_ENABLED if failover is None else failover:
+            providers += [p for p in settings.AI_FAILOVER_CHAIN if p != model and self._provider_configured(p)]
+
+        async def _call_provider(provider: str, call_tokens: int, partial: Optional[str]):
+            if provider == "openai":
+                return await self._generate_openai(prompt, temperature, call_tokens, system_prompt, response_format, partial)
+            elif provider == "groq":
+                return await self._generate_groq(prompt, temperature, call_tokens, system_prompt, partial)
+            else:
+                return await self._generate_vertex(prompt, temperature, call_tokens, system_prompt, partial)
+
+        async def _generate(provider: str, partial: Optional[str] = None) -> Tuple[str, bool]:
+            breaker = circuit_breakers.get(provider, PROVIDER_MODELS[provider])
+            # Fail fast before queueing for capacity on a provider that is down
+            breaker.ensure_available()
+            call_tokens = min(max_tokens, PROVIDER_MAX_OUTPUT_TOKENS[provider])
+            # Every attempt (including retries) waits for provider capacity first
+            async with admission_control.provider(provider).admit(estimate_tokens(system_prompt, prompt, partial) + call_tokens):
+                async with breaker.guard():
+                    return await _call_provider(provider, call_tokens, partial)
+
+        async def _attempt(provider: str, partial: Optional[str] = None) -> Tuple[str, bool]:
+            if use_retry:
+                return await self._retry_with_backoff(lambda: _generate(provider, partial))
+            return await _generate(provider, partial)
+
+        async def _run(provider: str) -> str:
+            text, truncated = await _attempt(provider)
+            continuations = 0
+            # Each continuation is retried on its own, so a late failure doesn't
+            # throw away the pieces already generated
+            while truncated and continue_on_length and continuations < settings.AI_MAX_CONTINUATIONS:
+                continuations += 1
+                logger.info(f"{provider} stopped on the token limit after ~{estimate_tokens(text)} tokens, continuing ({continuations}/{settings.AI_MAX_CONTINUATIONS})")
+                more, truncated = await _attempt(provider, text)
+                text = self._stitch_continuation(text, more)
+            if truncated:
+                logger.warning(f"{provider} output still truncated at the token limit ({tool_type or 'generate'})")
+            return text
+
+        hedge_provider = self._hedge_provider(tool_type, model)
 
-        async def _generate():
+        async def _generate_with_retry():
+            last_error = None
+            for provider in providers:
+                try:
+                    if provider == model and hedge_provider:
+                        return await hedger.run(
+                            tool_type, model, lambda: _run(model),
+                            hedge_provider, lambda: _run(hedge_provider)
+                        )
+                    return await _run(provider)
+                except Exception as e:
+                    last_error = e
+                    if provider != providers[-1]:
+                        logger.warning(f"{provider} failed ({e}), failing over to next provider")
+
+            if not use_retry:
+                raise last_error
+            # User-friendly error message
+            error_msg = self._format_user_error(last_error, model)
+            logger.error(f"Generation failed after retries: {error_msg}")
+            raise Exception(error_msg)
+
+        if not (use_cache and settings.AI_CACHE_ENABLED):
+            return await _generate_with_retry()
+
+        cache_key = response_cache.make_key(
+            model=model,
+            system_prompt=system_prompt,
+            prompt=prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format=response_format
+        )
+        ttl = self.get_tool_config(tool_type)['cache_ttl']
+        return await response_cache.get_or_compute(cache_key, ttl, _generate_with_retry)
+
+    @staticmethod
+    def _stitch_continuation(text: str, more: str, max_overlap: int = 200) -> str:
+        """Append a continuation, dropping any tail of `text` the model repeated"""
+        if not more:
+            return text
+        head = more.lstrip()
+        # Only treat it as a repeat if a meaningful chunk (>= 20 chars) matches
+        for size in range(min(max_overlap, len(text), len(head)), 19, -1):
+            if text.endswith(head[:size]):
+                return text + head[size:]
+        return text + more
+
+    def _hedge_provider(self, tool_type: Optional[str], model: str) -> Optional[str]:
+        """Secondary provider to hedge this tool's calls to, if hedging applies"""
+        if not (tool_type and settings.AI_HEDGING_ENABLED):
+            return None
+        secondary = self.get_tool_config(tool_type).get('hedge_provider')
+        if not secondary or secondary == model or not self._provider_configured(secondary):
+            return None
+        if not circuit_breakers.get(secondary, PROVIDER_MODELS[secondary]).is_available():
+            return None
+        return secondary
+
+    def _provider_configured(self, provider: str) -> bool:
+        """Whether a provider has credentials and can take failover traffic"""
+        if provider == "openai":
+            return bool(settings.OPENAI_API_KEY)
+        if provider == "groq":
+            return bool(settings.GROQ_API_KEY)
+        if provider == "vertex":
+            return self.vertex_available
+        return False
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        model: str = "vertex",
+        temperature: float = 0.7,
+        max_tokens: int = 5000,
+        system_prompt: Optional[str] = None,
+        tool_type: Optional[str] = None,
+        use_retry: bool = True,
+        output_budget: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated text from the specified AI model as it arrives
+
+        Retries with exponential backoff only while nothing has been yielded yet.
+        Once the first chunk has reached the caller, a provider failure is raised
+        instead of silently restarting the stream and duplicating output.
+
+        Args:
+            prompt: The main prompt text
+            model: AI model to use (openai, vertex, groq)
+            temperature: Sampling temperature (0.0-1.0)
+            max_tokens: Maximum tokens to generate
+            system_prompt: Optional system prompt for context
+            tool_type: Optional tool type for parameter optimization (script, title, caption, thumbnail, seo)
+            use_retry: Whether to retry failed connection attempts
+            output_budget: Output tokens wanted, overriding the tool's max_tokens
+                (capped at the provider's per-call limit)
+
+        Yields:
+            Text deltas in generation order
+        """
+
+        # Apply tool-specific optimizations if tool_type provided
+        if tool_type:
+            tool_config = self.get_tool_config(tool_type)
+            temperature = tool_config['temperature']
+            max_tokens = tool_config['max_tokens']
+            logger.info(f"Using optimized config for {tool_type} (streaming): temp={temperature}, max_tokens={max_tokens}")
+        if output_budget:
+            max_tokens = output_budget
+
+        if model not in PROVIDER_MODELS:
+            raise ValueError(f"Unsupported model: {model}")
+        max_tokens = min(max_tokens, PROVIDER_MAX_OUTPUT_TOKENS[model])
+
+        def _open_stream() -> AsyncIterator[str]:
             if model == "openai":
-                return await self._generate_openai(prompt, temperature, max_tokens, system_prompt, response_format)
+                return self._stream_openai(prompt, temperature, max_tokens, system_prompt)
             elif model == "groq":
-                return await self._generate_groq(prompt, temperature, max_tokens, system_prompt)
+                return self._stream_groq(prompt, temperature, max_tokens, system_prompt)
             elif model == "vertex":
-                return await self._generate_vertex(prompt, temperature, max_tokens, system_prompt)
+                return self._stream_vertex(prompt, temperature, max_tokens, system_prompt)
             else:
                 raise ValueError(f"Unsupported model: {model}")
 
-        if use_retry:
+        limiter = admission_control.provider(model)
+        breaker = circuit_breakers.get(model, PROVIDER_MODELS[model])
+        token_estimate = estimate_tokens(system_prompt, prompt) + max_tokens
+
+        max_retries = 3 if use_retry else 1
+        for attempt in range(max_retries):
+            started = False
             try:
-                return await self._retry_with_backoff(_generate)
+                breaker.ensure_available()
+                # The provider slot is held for the whole stream
+                async with limiter.admit(token_estimate):
+                    # Breaker outcome is decided by time-to-first-chunk
+                    breaker.before_call()
+                    call_start = time.monotonic()
+                    stream = _open_stream()
+                    try:
+                        async for delta in stream:
+                            if not started:
+                                started = True
+                                breaker.record_success(time.monotonic() - call_start)
+                            yield delta
+                    except Exception:
+                        if not started:
+                            breaker.record_failure(time.monotonic() - call_start)
+                        raise
+                    except BaseException:
+                        if not started:
+                            breaker.release()
+                        raise
+                    finally:
+                        # Close the provider response now, not at garbage collection,
+                        # when the consumer stops reading early
+                        await stream.aclose()
+                    if not started:
+                        breaker.record_success(time.monotonic() - call_start)
+                return
             except Exception as e:
-                # User-friendly error message
-                error_msg = self._format_user_error(e, model)
-                logger.error(f"Generation failed after retries: {error_msg}")
-                raise Exception(error_msg)
-        else:
-            return await _generate()
+                if started or attempt == max_retries - 1 or isinstance(e, CircuitOpenError):
+                    if not use_retry:
+                        raise
+                    error_msg = self._format_user_error(e, model)
+                    logger.error(f"Streaming generation failed: {error_msg}")
+                    raise Exception(error_msg)
+
+                delay = 1.0 * (2 ** attempt)
+                logger.warning(f"Stream attempt {attempt + 1} failed before first chunk: {e}. Retrying in {delay}s...")
+                await asyncio.sleep(delay)
 
     def _format_user_error(self, error: Exception, model: str) -> str:
         """Convert technical errors to user-friendly messages"""
         error_str = str(error).lower()
 
-        if "rate limit" in error_str or "quota" in error_str:
+        if isinstance(error, CircuitOpenError):
+            return f"The AI service is temporarily unavailable. Please try again in a moment or choose a different AI model."
+        elif "rate limit" in error_str or "quota" in error_str:
             return f"The AI service is currently experiencing high demand. Please try again in a moment."
         elif "authentication" in error_str or "api key" in error_str:
             return f"AI service authentication issue. Please contact support."
@@ -200,18 +482,16 @@ class AIService:
         temperature: float,
         max_tokens: int,
         system_prompt: Optional[str],
-        response_format: Optional[Dict] = None
-    ) -> str:
-        """Generate using OpenAI GPT-4"""
+        response_format: Optional[Dict] = None,
+        partial: Optional[str] = None
+    ) -> Tuple[str, bool]:
+        """Generate using OpenAI GPT-4. Returns (text, stopped_on_token_limit)."""
         try:
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
-            
+            messages = self._chat_messages(prompt, system_prompt, partial)
+
             # Build request parameters
             request_params = {
-                "model": "gpt-4-turbo-preview",
+                "model": PROVIDER_MODELS['openai'],
                 "messages": messages,
                 "temperature": temperature,
                 "max_tokens": max_tokens
@@ -225,8 +505,9 @@ class AIService:
                     request_params["response_format"] = response_format
             
             response = await self.openai_client.chat.completions.create(**request_params)
-            
-            return response.choices[0].message.content
+
+            choice = response.choices[0]
+            return choice.message.content or "", choice.finish_reason == "length"
         except Exception as e:
             logger.error(f"OpenAI generation failed: {e}")
             raise
@@ -236,26 +517,25 @@ class AIService:
         prompt: str,
         temperature: float,
         max_tokens: int,
-        system_prompt: Optional[str]
-    ) -> str:
-        """Generate using Groq (fast open-source models)"""
+        system_prompt: Optional[str],
+        partial: Optional[str] = None
+    ) -> Tuple[str, bool]:
+        """Generate using Groq (fast open-source models). Returns (text, stopped_on_token_limit)."""
         if not self.groq_client:
             raise ValueError("Groq API key not configured")
-        
+
         try:
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
-            
+            messages = self._chat_messages(prompt, system_prompt, partial)
+
             response = await self.groq_client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
+                model=PROVIDER_MODELS['groq'],
                 messages=messages,
                 temperature=temperature,
                 max_tokens=max_tokens
             )
-            
-            return response.choices[0].message.content
+
+            choice = response.choices[0]
+            return choice.message.content or "", choice.finish_reason == "length"
         except Exception as e:
             logger.error(f"Groq generation failed: {e}")
             raise
@@ -265,36 +545,151 @@ class AIService:
         prompt: str,
         temperature: float,
         max_tokens: int,
-        system_prompt: Optional[str]
-    ) -> str:
-        """Generate using Google Vertex AI"""
+        system_prompt: Optional[str],
+        partial: Optional[str] = None
+    ) -> Tuple[str, bool]:
+        """Generate using Google Vertex AI. Returns (text, stopped_on_token_limit)."""
         if not self.vertex_available:
             raise ValueError("Vertex AI not configured")
 
         try:
-            import vertexai
-            from vertexai.preview.generative_models import GenerativeModel
-
-            # Try gemini-1.5-flash-001 which should be available in most projects
-            model = GenerativeModel("gemini-2.5-pro")
+            model = provider_clients.generative_model(PROVIDER_MODELS['vertex'])
 
             full_prompt = prompt
             if system_prompt:
                 full_prompt = f"{system_prompt}\n\n{prompt}"
 
+            contents = full_prompt
+            if partial is not None:
+                from vertexai.preview.generative_models import Content, Part
+                contents = [
+                    Content(role="user", parts=[Part.from_text(full_prompt)]),
+                    Content(role="model", parts=[Part.from_text(partial)]),
+                    Content(role="user", parts=[Part.from_text(CONTINUATION_PROMPT)]),
+                ]
+
             response = await model.generate_content_async(
-                full_prompt,
+                contents,
                 generation_config={
                     "temperature": temperature,
                     "max_output_tokens": max_tokens,
                 }
             )
 
-            return response.text
+            finish_reason = response.candidates[0].finish_reason if response.candidates else None
+            truncated = getattr(finish_reason, "name", str(finish_reason)) == "MAX_TOKENS"
+            try:
+                text = response.text
+            except ValueError:
+                # No text parts - e.g. the whole budget went to thinking tokens
+                if not truncated:
+                    raise
+                text = ""
+            return text, truncated
         except Exception as e:
             logger.error(f"Vertex AI generation failed: {e}")
             raise
     
+    @staticmethod
+    def _chat_messages(prompt: str, system_prompt: Optional[str], partial: Optional[str] = None) -> List[Dict]:
+        """Chat messages for a prompt, plus the continuation turns when resuming `partial`"""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        if partial is not None:
+            messages.append({"role": "assistant", "content": partial})
+            messages.append({"role": "user", "content": CONTINUATION_PROMPT})
+        return messages
+
+    async def _stream_openai(
+        self,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        system_prompt: Optional[str]
+    ) -> AsyncIterator[str]:
+        """Stream completion deltas from OpenAI GPT-4"""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+
+        stream = await self.openai_client.chat.completions.create(
+            model=PROVIDER_MODELS['openai'],
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def _stream_groq(
+        self,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        system_prompt: Optional[str]
+    ) -> AsyncIterator[str]:
+        """Stream completion deltas from Groq"""
+        if not self.groq_client:
+            raise ValueError("Groq API key not configured")
+
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+
+        stream = await self.groq_client.chat.completions.create(
+            model=PROVIDER_MODELS['groq'],
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def _stream_vertex(
+        self,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        system_prompt: Optional[str]
+    ) -> AsyncIterator[str]:
+        """Stream completion deltas from Google Vertex AI"""
+        if not self.vertex_available:
+            raise ValueError("Vertex AI not configured")
+
+        model = provider_clients.generative_model(PROVIDER_MODELS['vertex'])
+
+        full_prompt = prompt
+        if system_prompt:
+            full_prompt = f"{system_prompt}\n\n{prompt}"
+
+        responses = await model.generate_content_async(
+            full_prompt,
+            generation_config={
+                "temperature": temperature,
+                "max_output_tokens": max_tokens,
+            },
+            stream=True
+        )
+
+        async for response in responses:
+            try:
+                text = response.text
+            except ValueError:
+                # Chunks without text parts (e.g. the final usage/finish chunk)
+                continue
+            if text:
+                yield text
+
     def inject_persona_context(self, prompt: str, persona: Optional[Dict], tool_type: Optional[str] = None) -> str:
         """
         Inject comprehensive persona information into prompt with tool-specific guidance
@@ -435,9 +830,11 @@ Description: {persona.get('description', 'N/A')}
 
             # Supported models: GPT-Image 1.5, GPT-Image 1, DALL-E 3, Imagen 3
             if model in ["dall-e-3", "gpt-image-1.5", "gpt-image-1"]:
-                return await self._generate_image_dalle(prompt, size, quality, style, model)
+                async with admission_control.image_model(model).admit(), circuit_breakers.get("openai", model).guard():
+                    return await self._generate_image_dalle(prompt, size, quality, style, model)
             elif model in ["imagen-3.0-generate-001"]:
-                return await self._generate_image_imagen(prompt, model, size)
+                async with admission_control.image_model(model).admit(), circuit_breakers.get("vertex", model).guard():
+                    return await self._generate_image_imagen(prompt, model, size)
             else:
                 raise ValueError(
                     f"Unsupported image model: {model}. "
@@ -551,20 +948,15 @@ Description: {persona.get('description', 'N/A')}
             raise ValueError("Vertex AI not configured for Gemini image generation")
 
         try:
-            from google import genai
             from google.genai import types
             import base64
 
             logger.info(f"Generating image with Gemini model: {model}")
             logger.info(f"Using project: {settings.GOOGLE_VERTEX_PROJECT_ID}, location: {settings.GOOGLE_VERTEX_LOCATION}")
 
-            # Initialize Gemini client with Vertex AI
+            # Shared Gemini client with Vertex AI
             # Credentials are already set globally in the module init
-            client = genai.Client(
-                vertexai=True,
-                project=settings.GOOGLE_VERTEX_PROJECT_ID,
-                location=settings.GOOGLE_VERTEX_LOCATION
-            )
+            client = provider_clients.genai_client()
 
             # Set aspect ratio based on size
             aspect_ratio = "16:9" if size == "1792x1024" else "1:1"
@@ -609,9 +1001,8 @@ Description: {persona.get('description', 'N/A')}
                 )
             ]
 
-            # Generate image (synchronous call, but wrapped in async)
-            import asyncio
-            response = await asyncio.to_thread(
+            # Generate image (synchronous SDK call, on the provider thread pool)
+            response = await provider_clients.run_sync(
                 client.models.generate_content,
                 model=model,
                 contents=contents,
@@ -674,22 +1065,17 @@ Description: {persona.get('description', 'N/A')}
             raise ValueError("Vertex AI not configured for Imagen generation")
 
         try:
-            from vertexai.preview.vision_models import ImageGenerationModel
-            import base64
-            import io
-            import asyncio
-
             logger.info(f"Generating image with Imagen model: {model}")
 
-            # Initialize the image generation model
-            imagen_model = ImageGenerationModel.from_pretrained(model)
+            # Cached model handle (first load does a blocking metadata lookup)
+            imagen_model = await provider_clients.run_sync(provider_clients.image_model, model)
 
             # Add aspect ratio hint to the prompt since API doesn't support aspect_ratio parameter
             aspect_ratio_hint = "16:9 widescreen format" if size == "1792x1024" else "1:1 square format"
             enhanced_prompt = f"{prompt}. Generate in {aspect_ratio_hint}."
 
-            # Generate image (wrap in async)
-            response = await asyncio.to_thread(
+            # Generate image (synchronous SDK call, on the provider thread pool)
+            response = await provider_clients.run_sync(
                 imagen_model.generate_images,
                 prompt=enhanced_prompt,
                 number_of_images=1
@@ -700,13 +1086,8 @@ Description: {persona.get('description', 'N/A')}
             if response and len(response.images) > 0:
                 generated_image = response.images[0]
 
-                # Convert to base64
-                img_byte_arr = io.BytesIO()
-                generated_image._pil_image.save(img_byte_arr, format='PNG')
-                img_byte_arr = img_byte_arr.getvalue()
-                base64_encoded = base64.b64encode(img_byte_arr).decode('utf-8')
-
-                image_urls.append(f"data:image/png;base64,{base64_encoded}")
+                # PNG encoding of a full-size image is CPU work - keep it off the loop too
+                image_urls.append(await provider_clients.run_sync(self._png_data_uri, generated_image._pil_image))
                 logger.info(f"Successfully generated image with {model}")
             else:
                 raise Exception("No images generated")
@@ -780,9 +1161,12 @@ Description: {persona.get('description', 'N/A')}
             Generated image URL or base64 data
         """
         if model == "vertex" and self.vertex_available:
-            return await self._generate_with_vertex_imagen(prompt, base_image_data)
+            async with admission_control.image_model("imagegeneration@006").admit(), \
+                    circuit_breakers.get("vertex", "imagegeneration@006").guard():
+                return await self._generate_with_vertex_imagen(prompt, base_image_data)
         elif model == "dalle":
-            return await self._generate_with_dalle_edit(prompt, base_image_data)
+            async with admission_control.image_model("dall-e-2").admit(), circuit_breakers.get("openai", "dall-e-2").guard():
+                return await self._generate_with_dalle_edit(prompt, base_image_data)
         else:
             raise Exception(f"Image-to-image generation not supported for model: {model}")
 
@@ -798,15 +1182,13 @@ Description: {persona.get('description', 'N/A')}
         uploaded images into the design.
         """
         try:
-            from vertexai.preview.vision_models import ImageGenerationModel, Image
+            from vertexai.preview.vision_models import Image
             import base64
-            import io
-            from PIL import Image as PILImage
 
             logger.info(f"Generating image with Vertex Imagen using base image")
 
-            # Load the image generation model
-            model = ImageGenerationModel.from_pretrained("imagegeneration@006")
+            # Cached model handle (first load does a blocking metadata lookup)
+            model = await provider_clients.run_sync(provider_clients.image_model, "imagegeneration@006")
 
             # Decode base64 image
             if base_image_data.startswith('data:'):
@@ -817,7 +1199,9 @@ Description: {persona.get('description', 'N/A')}
 
             # Generate with base image reference
             # Imagen can use the base image as a starting point
-            response = model.edit_image(
+            # Synchronous SDK call: on the provider thread pool, never on the event loop
+            response = await provider_clients.run_sync(
+                model.edit_image,
                 base_image=base_image,
                 prompt=prompt,
                 number_of_images=1,
@@ -828,15 +1212,10 @@ Description: {persona.get('description', 'N/A')}
             # Get the generated image
             if response and len(response.images) > 0:
                 generated_image = response.images[0]
-
-                # Convert to base64 for frontend
-                img_byte_arr = io.BytesIO()
-                generated_image._pil_image.save(img_byte_arr, format='PNG')
-                img_byte_arr = img_byte_arr.getvalue()
-                base64_encoded = base64.b64encode(img_byte_arr).decode('utf-8')
+                data_uri = await provider_clients.run_sync(self._png_data_uri, generated_image._pil_image)
 
                 logger.info("Successfully generated image with Vertex Imagen")
-                return f"data:image/png;base64,{base64_encoded}"
+                return data_uri
             else:
                 raise Exception("No images generated")
 
@@ -844,6 +1223,42 @@ Description: {persona.get('description', 'N/A')}
             logger.error(f"Vertex Imagen generation failed: {e}")
             raise Exception(f"Vertex Imagen generation failed: {str(e)}")
 
+    @staticmethod
+    def _png_data_uri(pil_image) -> str:
+        """PNG data URI for a PIL image (blocking; call through run_sync)"""
+        import base64
+        import io
+
+        img_byte_arr = io.BytesIO()
+        pil_image.save(img_byte_arr, format='PNG')
+        return f"data:image/png;base64,{base64.b64encode(img_byte_arr.getvalue()).decode('utf-8')}"
+
+    @staticmethod
+    def _dalle_edit_input(base_image_data: str):
+        """1024x1024 RGBA PNG buffer as the DALL-E 2 variation API requires (blocking)"""
+        import base64
+        import io
+        from PIL import Image as PILImage
+
+        # Decode base64 image
+        if base_image_data.startswith('data:'):
+            base_image_data = base_image_data.split(',')[1]
+
+        image = PILImage.open(io.BytesIO(base64.b64decode(base_image_data)))
+
+        # Convert to RGBA if not already (required by DALL-E)
+        if image.mode != 'RGBA':
+            image = image.convert('RGBA')
+
+        # Resize to 1024x1024 (DALL-E 2 requirement)
+        image = image.resize((1024, 1024))
+
+        # Save to bytes
+        img_byte_arr = io.BytesIO()
+        image.save(img_byte_arr, format='PNG')
+        img_byte_arr.seek(0)
+        return img_byte_arr
+
     async def _generate_with_dalle_edit(
         self,
         prompt: str,
@@ -855,30 +1270,10 @@ Description: {persona.get('description', 'N/A')}
         Note: DALL-E 3 doesn't support editing, only DALL-E 2 does
         """
         try:
-            import base64
-            import io
-            from PIL import Image as PILImage
-
             logger.info(f"Generating image with DALL-E 2 edit API")
 
-            # Decode base64 image
-            if base_image_data.startswith('data:'):
-                base_image_data = base_image_data.split(',')[1]
-
-            image_bytes = base64.b64decode(base_image_data)
-            image = PILImage.open(io.BytesIO(image_bytes))
-
-            # Convert to RGBA if not already (required by DALL-E)
-            if image.mode != 'RGBA':
-                image = image.convert('RGBA')
-
-            # Resize to 1024x1024 (DALL-E 2 requirement)
-            image = image.resize((1024, 1024))
-
-            # Save to bytes
-            img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format='PNG')
-            img_byte_arr.seek(0)
+            # Decode, convert and resize off the event loop
+            img_byte_arr = await provider_clients.run_sync(self._dalle_edit_input, base_image_data)
 
             # Create variation using DALL-E 2
             response = await self.openai_client.images.create_variation(
@@ -975,12 +1370,13 @@ Focus on making the final thumbnail cohesive, professional, and optimized for cl
                 }
             ]
 
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=messages,
-                max_tokens=800,
-                temperature=0.7
-            )
+            async with admission_control.provider("openai").admit(estimate_tokens(analysis_prompt) + 800):
+                response = await self.openai_client.chat.completions.create(
+                    model="gpt-4o",
+                    messages=messages,
+                    max_tokens=800,
+                    temperature=0.7
+                )
 
             enhanced_prompt = response.choices[0].message.content.strip()
             logger.info(f"Generated enhanced prompt: {enhanced_prompt[:200]}...")
@@ -1019,150 +1415,27 @@ Focus on making the final thumbnail cohesive, professional, and optimized for cl
 
         Args:
             response: Raw AI response that should contain JSON
-            schema: Optional JSON schema for validation
+            schema: Optional schema for validation (see tolerant_json)
             fallback: Fallback value if parsing fails completely
 
         Returns:
             Parsed and validated JSON data, or fallback
-        """
-        try:
-            # Step 1: Try direct JSON parsing
-            data = json.loads(response)
-
-            # Step 2: Validate against schema if provided
-            if schema:
-                self._validate_json_schema(data, schema)
-
-            return data
-
-        except json.JSONDecodeError as e:
-            logger.warning(f"JSON parsing failed: {e}. Attempting recovery...")
-
-            # Step 3: Try to extract JSON from markdown code blocks
-            extracted = self._extract_json_from_markdown(response)
-            if extracted:
-                try:
-                    data = json.loads(extracted)
-                    if schema:
-                        self._validate_json_schema(data, schema)
-                    return data
-                except json.JSONDecodeError:
-                    pass
-
-            # Step 4: Try to fix common JSON errors
-            fixed = self._fix_common_json_errors(response)
-            if fixed:
-                try:
-                    data = json.loads(fixed)
-                    if schema:
-                        self._validate_json_schema(data, schema)
-                    return data
-                except json.JSONDecodeError:
-                    pass
-
-            # Step 5: All recovery attempts failed, use fallback
-            logger.error(f"All JSON parsing attempts failed. Using fallback. Original response: {response[:200]}")
-            return fallback if fallback is not None else {"error": "JSON parsing failed", "raw": response[:500]}
-
-    def _extract_json_from_markdown(self, text: str) -> Optional[str]:
-        """Extract JSON from markdown code blocks"""
-        import re
-
-        # Pattern 1: ```json ... ```
-        pattern1 = r'```json\s*\n(.*?)\n```'
-        match = re.search(pattern1, text, re.DOTALL)
-        if match:
-            return match.group(1).strip()
-
-        # Pattern 2: ``` ... ``` (any code block)
-        pattern2 = r'```\s*\n(.*?)\n```'
-        match = re.search(pattern2, text, re.DOTALL)
-        if match:
-            content = match.group(1).strip()
-            # Check if it looks like JSON
-            if content.startswith('{') or content.startswith('['):
-                return content
-
-        # Pattern 3: JSON between curly braces (extract largest valid-looking JSON)
-        if '{' in text and '}' in text:
-            start = text.find('{')
-            end = text.rfind('}') + 1
-            return text[start:end]
-
-        if '[' in text and ']' in text:
-            start = text.find('[')
-            end = text.rfind(']') + 1
-            return text[start:end]
-
-        return None
-
-    def _fix_common_json_errors(self, text: str) -> Optional[str]:
-        """Attempt to fix common JSON formatting errors"""
-        try:
-            # Remove any leading/trailing whitespace
-            text = text.strip()
-
-            # Fix single quotes to double quotes (common AI mistake)
-            # Be careful not to break strings that contain apostrophes
-            text = text.replace("'", '"')
-
-            # Fix trailing commas before closing brackets (invalid in JSON)
-            import re
-            text = re.sub(r',\s*}', '}', text)
-            text = re.sub(r',\s*]', ']', text)
-
-            # Fix missing commas between array elements
-            text = re.sub(r'"\s*\n\s*"', '",\n"', text)
-
-            # Remove comments (not valid in JSON)
-            text = re.sub(r'//.*\n', '\n', text)
-            text = re.sub(r'/\*.*?\*/', '', text, flags=re.DOTALL)
-
-            return text
-        except Exception as e:
-            logger.warning(f"Error while fixing JSON: {e}")
-            return None
-
-    def _validate_json_schema(self, data: any, schema: Dict) -> bool:
-        """
-        Basic JSON schema validation
-
-        Args:
-            data: Parsed JSON data
-            schema: Schema definition with expected fields and types
-
-        Returns:
-            True if valid
 
         Raises:
-            ValueError if validation fails
+            ValueError if JSON was found but none of it matches the schema
         """
-        if not isinstance(schema, dict):
-            return True
-
-        # Check required fields
-        required_fields = schema.get('required', [])
-        if isinstance(data, dict):
-            for field in required_fields:
-                if field not in data:
-                    raise ValueError(f"Required field '{field}' missing from JSON response")
-
-        # Check field types if specified
-        field_types = schema.get('types', {})
-        if isinstance(data, dict):
-            for field, expected_type in field_types.items():
-                if field in data:
-                    actual_value = data[field]
-                    if expected_type == 'string' and not isinstance(actual_value, str):
-                        raise ValueError(f"Field '{field}' should be string, got {type(actual_value)}")
-                    elif expected_type == 'number' and not isinstance(actual_value, (int, float)):
-                        raise ValueError(f"Field '{field}' should be number, got {type(actual_value)}")
-                    elif expected_type == 'array' and not isinstance(actual_value, list):
-                        raise ValueError(f"Field '{field}' should be array, got {type(actual_value)}")
-                    elif expected_type == 'object' and not isinstance(actual_value, dict):
-                        raise ValueError(f"Field '{field}' should be object, got {type(actual_value)}")
-
-        return True
+        try:
+            data, info = tolerant_json.parse(response, schema)
+        except tolerant_json.JSONRecoveryError:
+            logger.error(f"All JSON parsing attempts failed. Using fallback. Original response: {(response or '')[:200]}")
+            return fallback if fallback is not None else {"error": "JSON parsing failed", "raw": (response or '')[:500]}
+
+        if info["repaired"]:
+            logger.warning(
+                f"Recovered malformed JSON from response (chars {info['start']}-{info['end']} of {len(response)}"
+                f"{', truncated' if info['truncated'] else ''})"
+            )
+        return data
 
     def validate_output_constraints(
         self,
@@ -0,0 +1,151 @@
+"""
+Content-addressed store for generated images
+
+Image bytes are stored once under their SHA-256 ("<digest>.<ext>") and
+Content rows keep only the artifact URL, instead of multi-megabyte base64
+data URIs in meta_data and prompt_used. Identical images share one file.
+Artifacts are immutable, so they are served with long-lived cache headers
+(GET /api/v1/artifacts/<name>).
+
+Base64 is produced lazily, only where a provider needs inline image data
+(data_uri / resolve_data_uri).
+
+The methods hash and do file I/O; call them from async code through
+asyncio.to_thread.
+"""
+
+import base64
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Extension <-> media type for the image formats providers and uploads produce
+MEDIA_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "webp": "image/webp",
+    "gif": "image/gif",
+}
+EXTENSIONS = {media_type: ext for ext, media_type in MEDIA_TYPES.items()}
+EXTENSIONS["image/jpg"] = "jpg"
+
+ARTIFACT_NAME = re.compile(r"^[0-9a-f]{64}\.(?:png|jpg|webp|gif)$")
+# Embedded anywhere in a string, e.g. in str(request.dict()) for prompt_used
+DATA_URI = re.compile(r"data:(image/[a-z+.-]+);base64,([A-Za-z0-9+/]+=*)")
+
+
+class LocalArtifactBackend:
+    """Artifacts as files under root, fanned out by the first two hex digits"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path(self, name: str) -> Path:
+        return self.root / name[:2] / name
+
+    def exists(self, name: str) -> bool:
+        return self.path(name).exists()
+
+    def write(self, name: str, data: bytes):
+        path = self.path(name)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename, so a reader never sees a partial file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def read(self, name: str) -> bytes:
+        return self.path(name).read_bytes()
+
+
+BACKENDS = {
+    "local": lambda: LocalArtifactBackend(settings.ARTIFACT_DIR),
+}
+
+
+class ArtifactStore:
+    """Put image bytes, get back a stable URL"""
+
+    def __init__(self, backend, url_prefix: str):
+        self.backend = backend
+        self.url_prefix = url_prefix.rstrip("/")
+
+    def put(self, data: bytes, media_type: str = "image/png") -> str:
+        """Store data (idempotent) and return its artifact URL"""
+        name = f"{hashlib.sha256(data).hexdigest()}.{EXTENSIONS.get(media_type, 'png')}"
+        self.backend.write(name, data)
+        return self.url(name)
+
+    def put_data_uri(self, data_uri: str) -> str:
+        """Store the image in a base64 data URI and return its artifact URL"""
+        match = DATA_URI.fullmatch(data_uri.strip())
+        if not match:
+            raise ValueError("Not a base64 image data URI")
+        return self.put(base64.b64decode(match.group(2)), match.group(1))
+
+    def url(self, name: str) -> str:
+        return f"{self.url_prefix}/{name}"
+
+    def name_from_url(self, value: str) -> Optional[str]:
+        """Artifact name if value is one of this store's URLs"""
+        if not isinstance(value, str) or not value.startswith(self.url_prefix + "/"):
+            return None
+        name = value[len(self.url_prefix) + 1:]
+        return name if ARTIFACT_NAME.match(name) else None
+
+    def read(self, name: str) -> bytes:
+        return self.backend.read(name)
+
+    def data_uri(self, name: str) -> str:
+        """Base64 data URI for an artifact, for providers that need inline images"""
+        media_type = MEDIA_TYPES[name.rsplit(".", 1)[1]]
+        return f"data:{media_type};base64,{base64.b64encode(self.read(name)).decode('utf-8')}"
+
+    def resolve_data_uri(self, value: str) -> str:
+        """value as a data URI if it is an artifact URL, otherwise unchanged"""
+        name = self.name_from_url(value)
+        return self.data_uri(name) if name else value
+
+    def externalize(self, value: Any) -> Any:
+        """
+        Copy of value with every embedded base64 image data URI stored and
+        replaced by its artifact URL
+
+        Walks dicts and lists; keys keep their names (the frontend reads
+        base64_data || image_url, and both accept a URL).
+        """
+        if isinstance(value, str):
+            if "base64," not in value:
+                return value
+            return DATA_URI.sub(lambda m: self.put(base64.b64decode(m.group(2)), m.group(1)), value)
+        if isinstance(value, dict):
+            return {key: self.externalize(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.externalize(item) for item in value]
+        return value
+
+    def externalize_content(self, content_data: Dict) -> Dict:
+        """externalize() the fields of a Content record that can carry images"""
+        content_data = dict(content_data)
+        for field in ("meta_data", "prompt_used"):
+            if content_data.get(field):
+                content_data[field] = self.externalize(content_data[field])
+        return content_data
+
+
+artifact_store = ArtifactStore(BACKENDS[settings.ARTIFACT_BACKEND](), settings.ARTIFACT_URL_PREFIX)
@@ -0,0 +1,202 @@
+"""
+Circuit breakers for AI provider back-ends
+
+One breaker per provider:model tracks a rolling window of outcomes and
+latencies. When the share of failed or slow calls crosses the threshold the
+breaker opens and calls fail fast with CircuitOpenError instead of waiting
+on SDK timeouts. After a cool-down it lets a limited number of probe calls
+through (half-open); a successful probe closes it again.
+"""
+
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the provider's breaker is open"""
+
+    def __init__(self, name: str, retry_in: float):
+        self.name = name
+        self.retry_in = retry_in
+        super().__init__(f"{name} is temporarily unavailable (circuit open, retry in {retry_in:.0f}s)")
+
+
+class CircuitBreaker:
+    """Rolling-window breaker for one provider:model"""
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = 60,
+        min_calls: int = 5,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 90,
+        open_seconds: float = 30,
+        half_open_max_calls: int = 1
+    ):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        # (finished_at, ok, latency_seconds)
+        self._calls: deque = deque()
+
+    def _trim(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._calls and self._calls[0][0] < cutoff:
+            self._calls.popleft()
+
+    def _retry_in(self, now: float) -> float:
+        return max(0.0, self._opened_at + self.open_seconds - now)
+
+    def is_available(self) -> bool:
+        """True if a call would currently be let through"""
+        now = time.monotonic()
+        if self.state == OPEN:
+            return self._retry_in(now) == 0
+        if self.state == HALF_OPEN:
+            return self._probes < self.half_open_max_calls
+        return True
+
+    def ensure_available(self):
+        """Fail fast without claiming a probe slot (checked before queueing for capacity)"""
+        if not self.is_available():
+            raise CircuitOpenError(self.name, self._retry_in(time.monotonic()))
+
+    def before_call(self):
+        """Admit a call or raise CircuitOpenError"""
+        now = time.monotonic()
+        if self.state == OPEN:
+            if self._retry_in(now) > 0:
+                raise CircuitOpenError(self.name, self._retry_in(now))
+            self.state = HALF_OPEN
+            self._probes = 0
+            logger.info(f"[Breaker] {self.name}: half-open, probing")
+        if self.state == HALF_OPEN:
+            if self._probes >= self.half_open_max_calls:
+                raise CircuitOpenError(self.name, 0)
+            self._probes += 1
+
+    def record_success(self, latency: float):
+        now = time.monotonic()
+        slow = latency >= self.slow_call_seconds
+        if self.state == HALF_OPEN:
+            if slow:
+                self._open(now, "slow probe")
+            else:
+                self._close()
+            return
+        self._record(now, not slow, latency)
+
+    def record_failure(self, latency: float):
+        now = time.monotonic()
+        if self.state == HALF_OPEN:
+            self._open(now, "failed probe")
+            return
+        self._record(now, False, latency)
+
+    def release(self):
+        """Give back a half-open probe slot for a call that was cancelled"""
+        if self.state == HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    @asynccontextmanager
+    async def guard(self):
+        """Admit, time and record the call made inside the block"""
+        self.before_call()
+        start = time.monotonic()
+        try:
+            yield
+        except CircuitOpenError:
+            raise
+        except Exception:
+            self.record_failure(time.monotonic() - start)
+            raise
+        except BaseException:
+            # Cancellation says nothing about provider health
+            self.release()
+            raise
+        else:
+            self.record_success(time.monotonic() - start)
+
+    def _record(self, now: float, ok: bool, latency: float):
+        self._calls.append((now, ok, latency))
+        self._trim(now)
+        if self.state == CLOSED and len(self._calls) >= self.min_calls:
+            failures = sum(1 for _, call_ok, _ in self._calls if not call_ok)
+            if failures / len(self._calls) >= self.failure_rate_threshold:
+                self._open(now, f"{failures}/{len(self._calls)} failed or slow calls")
+
+    def _open(self, now: float, reason: str):
+        self.state = OPEN
+        self._opened_at = now
+        self._probes = 0
+        logger.warning(f"[Breaker] {self.name}: OPEN ({reason}), failing fast for {self.open_seconds}s")
+
+    def _close(self):
+        self.state = CLOSED
+        self._probes = 0
+        self._calls.clear()
+        logger.info(f"[Breaker] {self.name}: closed")
+
+    def get_stats(self) -> Dict:
+        now = time.monotonic()
+        self._trim(now)
+        latencies = sorted(latency for _, _, latency in self._calls)
+        failures = sum(1 for _, ok, _ in self._calls if not ok)
+        calls = len(self._calls)
+        return {
+            "state": self.state,
+            "calls_in_window": calls,
+            "failure_rate": round(failures / calls, 3) if calls else 0.0,
+            "health_score": round(1 - failures / calls, 3) if calls else 1.0,
+            "latency_p50_ms": round(latencies[calls // 2] * 1000) if calls else None,
+            "latency_p95_ms": round(latencies[min(calls - 1, int(calls * 0.95))] * 1000) if calls else None,
+            "retry_in_s": round(self._retry_in(now), 1) if self.state == OPEN else None,
+        }
+
+
+class BreakerRegistry:
+    """Breakers keyed by 'provider:model', created on first use from settings"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, provider: str, model: Optional[str] = None) -> CircuitBreaker:
+        name = f"{provider}:{model}" if model else provider
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                window_seconds=settings.BREAKER_WINDOW_SECONDS,
+                min_calls=settings.BREAKER_MIN_CALLS,
+                failure_rate_threshold=settings.BREAKER_FAILURE_RATE,
+                slow_call_seconds=settings.BREAKER_SLOW_CALL_SECONDS,
+                open_seconds=settings.BREAKER_OPEN_SECONDS
+            )
+            self._breakers[name] = breaker
+        return breaker
+
+    def get_stats(self) -> Dict[str, Dict]:
+        return {name: breaker.get_stats() for name, breaker in self._breakers.items()}
+
+
+circuit_breakers = BreakerRegistry()
@@ -1,23 +1,68 @@
-from typing import List, Dict, Optional, Tuple
-from app.services.ai_service import ai_service
+from typing import List, Dict, Optional, Tuple, AsyncIterator
+from app.core.config import settings
+from app.services.ai_service import ai_service, estimate_script_tokens, SPEAKING_WORDS_PER_MINUTE
+from app.services.single_flight import SingleFlight, fingerprint
+from app.services import script_repair as repair
+from app.services import tolerant_json
+from app.services.script_sections import script_sections
+from app.services.stream_validator import IncrementalScriptValidator, ABORT_TOO_LONG
 from app.schemas.schemas import (
     ScriptGenerationRequest,
+    ScriptSectionRegenerateRequest,
     TitleGenerationRequest,
     ThumbnailIdeaRequest,
     SocialCaptionRequest,
     SEOOptimizationRequest,
     SEOOptimizationResponse
 )
-import json
+import asyncio
 import re
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Script post-processing patterns, compiled once
+EXCESS_NEWLINES_PATTERN = re.compile(r'\n{4,}')
+# All header / production-note normalizations in one pass; the group that matched
+# (lastindex) selects the canonical replacement
+SCRIPT_MARKER_PATTERN = re.compile(
+    r'\[(?:(HOOK)|(OUTRO)|(INTRODUCTION)|(PAUSE))\s*-?\s*'
+    r'|\[(?:(B-ROLL)|(TEXT ON SCREEN))\s*:\s*',
+    re.IGNORECASE
+)
+SCRIPT_MARKER_REPLACEMENTS = {
+    1: '[HOOK - ',
+    2: '[OUTRO - ',
+    3: '[INTRODUCTION - ',
+    4: '[PAUSE - ',
+    5: '[B-ROLL: ',
+    6: '[TEXT ON SCREEN: ',
+}
+# "0:00-0:09", "(0:00-0:09)", "0:00 - 0:09", ...
+TIMESTAMP_RANGE_PATTERN = re.compile(r'\(?(\d+):(\d{2})\s*[-–—]\s*(\d+):(\d{2})\)?')
+# A timed section runs until the next bracketed marker or parenthesised timestamp
+SECTION_BOUNDARY_PATTERN = re.compile(r'\[|\((?=\d+:\d+)')
+
+# Shapes checked by tolerant_json when parsing tool responses
+TITLES_SCHEMA = {"type": "array", "min_items": 1}
+TEMPLATES_SCHEMA = {"type": "array", "min_items": 1, "items": {"type": "object"}}
+SEO_SCHEMA = {"type": "object", "required": ["optimized_content"]}
+
+SCRIPT_SYSTEM_PROMPT = """You are an EXPERT scriptwriter for digital content creators.
+You create ENGAGING, WELL-PACED video scripts designed to be SPOKEN NATURALLY.
+You DEEPLY understand video storytelling, audience retention, and production requirements.
+You ALWAYS write COMPLETE, WORD-FOR-WORD scripts - NEVER outlines or summaries.
+Your scripts are ACTIONABLE, SPECIFIC, and READY FOR RECORDING without modification."""
+
 
 class CreatorToolsService:
     """Service for all creator-focused AI tools"""
 
+    def __init__(self):
+        # Identical concurrent generations (double-submits, client retries)
+        # share one provider call
+        self._flight = SingleFlight("creator_tools")
+
     @staticmethod
     def calculate_dynamic_timing(
         duration_minutes: int,
@@ -71,6 +116,15 @@ class CreatorToolsService:
         Validate that generated script meets all user requirements.
         Returns (is_valid, list_of_issues)
         """
+        issues = CreatorToolsService.find_script_issues(script, request)
+        return len(issues) == 0, [issue["message"] for issue in issues]
+
+    @staticmethod
+    def find_script_issues(script: str, request: ScriptGenerationRequest) -> List[Dict]:
+        """
+        Structured validation issues: dicts with a `code` from script_repair,
+        a human-readable `message`, and code-specific details for the repair pass.
+        """
         issues = []
 
         # 1. Validate key points are present
@@ -85,7 +139,11 @@ class CreatorToolsService:
                     missing_points.append(point)
 
             if missing_points:
-                issues.append(f"Missing key points: {', '.join(missing_points)}")
+                issues.append({
+                    "code": repair.MISSING_KEY_POINTS,
+                    "message": f"Missing key points: {', '.join(missing_points)}",
+                    "key_points": missing_points
+                })
 
         # 2. Validate duration (word count check)
         words = len(script.split())
@@ -93,10 +151,14 @@ class CreatorToolsService:
         word_variance = abs(words - expected_words) / expected_words
 
         if word_variance > 0.30:  # More than 30% off target
-            issues.append(
-                f"Script length mismatch: {words} words (expected ~{expected_words} for {request.duration_minutes} min video). "
-                f"Current script is {'too long' if words > expected_words else 'too short'} by {abs(words - expected_words)} words."
-            )
+            issues.append({
+                "code": repair.TOO_LONG if words > expected_words else repair.TOO_SHORT,
+                "message": (
+                    f"Script length mismatch: {words} words (expected ~{expected_words} for {request.duration_minutes} min video). "
+                    f"Current script is {'too long' if words > expected_words else 'too short'} by {abs(words - expected_words)} words."
+                ),
+                "missing_words": max(0, expected_words - words)
+            })
 
         # 3. Validate structure markers exist
         required_markers = ["[HOOK", "[OUTRO", "[CALL", "[CTA"]
@@ -104,22 +166,22 @@ class CreatorToolsService:
         has_outro = any(marker in script.upper() for marker in ["[OUTRO", "[CALL", "[CTA", "OUTRO -"])
 
         if not has_hook:
-            issues.append("Missing HOOK section marker in script")
+            issues.append({"code": repair.MISSING_HOOK, "message": "Missing HOOK section marker in script"})
         if not has_outro:
-            issues.append("Missing OUTRO/CTA section marker in script")
+            issues.append({"code": repair.MISSING_OUTRO, "message": "Missing OUTRO/CTA section marker in script"})
 
         # 4. Validate timing markers exist
         timing_pattern = r'\d+:\d+'
         if not re.search(timing_pattern, script):
-            issues.append("No timing markers found in script (format: 0:00)")
+            issues.append({"code": repair.MISSING_TIMESTAMPS, "message": "No timing markers found in script (format: 0:00)"})
 
         # 5. Check for minimum content quality (not just outline)
         lines = script.split('\n')
         substantial_lines = [line for line in lines if len(line.strip()) > 50]
         if len(substantial_lines) < request.duration_minutes * 5:  # At least 5 substantial lines per minute
-            issues.append("Script appears too sparse - needs more detailed content")
+            issues.append({"code": repair.TOO_SPARSE, "message": "Script appears too sparse - needs more detailed content"})
 
-        return len(issues) == 0, issues
+        return issues
 
     @staticmethod
     def post_process_script(script: str, request: ScriptGenerationRequest) -> str:
@@ -128,17 +190,10 @@ class CreatorToolsService:
         Ensures consistent formatting and ACCURATE timing based on actual word count.
         """
         # Remove excessive whitespace while preserving paragraph breaks
-        script = re.sub(r'\n{4,}', '\n\n\n', script)
+        script = EXCESS_NEWLINES_PATTERN.sub('\n\n\n', script)
 
-        # Ensure section headers are properly formatted
-        script = re.sub(r'\[HOOK\s*-?\s*', '[HOOK - ', script, flags=re.IGNORECASE)
-        script = re.sub(r'\[OUTRO\s*-?\s*', '[OUTRO - ', script, flags=re.IGNORECASE)
-        script = re.sub(r'\[INTRODUCTION\s*-?\s*', '[INTRODUCTION - ', script, flags=re.IGNORECASE)
-
-        # Ensure production notes are properly formatted
-        script = re.sub(r'\[B-ROLL\s*:\s*', '[B-ROLL: ', script, flags=re.IGNORECASE)
-        script = re.sub(r'\[TEXT ON SCREEN\s*:\s*', '[TEXT ON SCREEN: ', script, flags=re.IGNORECASE)
-        script = re.sub(r'\[PAUSE\s*-?\s*', '[PAUSE - ', script, flags=re.IGNORECASE)
+        # Ensure section headers and production notes are properly formatted
+        script = SCRIPT_MARKER_PATTERN.sub(lambda match: SCRIPT_MARKER_REPLACEMENTS[match.lastindex], script)
 
         # FIX TIMESTAMPS: Recalculate based on actual word count (150 words/min)
         script = CreatorToolsService._fix_script_timestamps(script)
@@ -150,77 +205,63 @@ class CreatorToolsService:
         """
         Fix all timestamps in script based on actual word count.
         Replaces AI-generated timestamps with accurate ones based on 150 words/minute speaking rate.
-        """
-        # Find all timestamp patterns: "0:00-0:09", "(0:00-0:09)", "0:00 - 0:09", etc.
-        timestamp_pattern = r'\(?(\d+):(\d{2})\s*[-–—]\s*(\d+):(\d{2})\)?'
-
-        # Split script into sections by timestamps to count words per section
-        sections = re.split(r'\[.*?\]|\(.*?\d+:\d+.*?\)', script)
 
-        # Count cumulative words
+        Each timestamp times the text from its end up to the next section boundary
+        ('[' or '(m:ss'). Timestamps and boundaries are each scanned once, and every
+        character is word-counted at most once, so the cost is linear in the script length.
+        """
+        timestamps = list(TIMESTAMP_RANGE_PATTERN.finditer(script))
+        if not timestamps:
+            return script
+
+        # Section end for each timestamp: the first boundary at or after its end
+        section_ends = []
+        boundaries = SECTION_BOUNDARY_PATTERN.finditer(script)
+        boundary = next(boundaries, None)
+        for match in timestamps:
+            while boundary is not None and boundary.start() < match.end():
+                boundary = next(boundaries, None)
+            section_ends.append(boundary.start() if boundary is not None else len(script))
+
+        # Word counts, last section first. Consecutive timestamps with no boundary
+        # between them share a section end, so a section contains the next one: count
+        # up to the next timestamp's end and reuse its count instead of recounting.
+        word_counts = [0] * len(timestamps)
+        for i in range(len(timestamps) - 1, -1, -1):
+            start, end = timestamps[i].end(), section_ends[i]
+            if i + 1 < len(timestamps) and section_ends[i + 1] == end:
+                seam = timestamps[i + 1].end()
+                word_counts[i] = len(script[start:seam].split()) + word_counts[i + 1]
+                # A word running across the seam was counted on both sides
+                if seam < end and not script[seam - 1].isspace() and not script[seam].isspace():
+                    word_counts[i] -= 1
+            elif end > start:
+                word_counts[i] = len(script[start:end].split())
+
+        pieces = []
+        copied_to = 0
         cumulative_seconds = 0
-
-        def replace_timestamp(match):
-            nonlocal cumulative_seconds
-
-            # Get the text after this timestamp marker (until next marker or end)
-            match_end_pos = match.end()
-            next_marker_match = re.search(r'\[|\((?=\d+:\d+)', script[match_end_pos:])
-
-            if next_marker_match:
-                section_text = script[match_end_pos:match_end_pos + next_marker_match.start()]
-            else:
-                section_text = script[match_end_pos:]
-
-            # Count words in this section (excluding bracketed production notes)
-            clean_text = re.sub(r'\[.*?\]', '', section_text)
-            word_count = len(clean_text.split())
-
+        for match, word_count in zip(timestamps, word_counts):
             # Calculate duration in seconds (150 words per minute = 2.5 words per second)
-            section_duration_seconds = int(word_count / 2.5)
-
-            # Calculate start and end times
             start_seconds = cumulative_seconds
-            end_seconds = cumulative_seconds + section_duration_seconds
-
-            # Update cumulative time
-            cumulative_seconds = end_seconds
+            cumulative_seconds += int(word_count / 2.5)
 
             # Format as MM:SS
             start_min, start_sec = divmod(start_seconds, 60)
-            end_min, end_sec = divmod(end_seconds, 60)
+            end_min, end_sec = divmod(cumulative_seconds, 60)
+            pieces.append(script[copied_to:match.start()])
+            pieces.append(f"{start_min}:{start_sec:02d}-{end_min}:{end_sec:02d}")
+            copied_to = match.end()
 
-            # Return formatted timestamp
-            return f"{start_min}:{start_sec:02d}-{end_min}:{end_sec:02d}"
+        pieces.append(script[copied_to:])
+        return "".join(pieces)
 
-        # Replace all timestamps with accurate ones
-        fixed_script = re.sub(timestamp_pattern, replace_timestamp, script)
-
-        return fixed_script
-    
-    async def generate_script(
-        self,
-        request: ScriptGenerationRequest,
-        persona: Optional[Dict] = None
-    ) -> str:
-        """Generate video script"""
-        
-        system_prompt = """You are an EXPERT scriptwriter for digital content creators.
-You create ENGAGING, WELL-PACED video scripts designed to be SPOKEN NATURALLY.
-You DEEPLY understand video storytelling, audience retention, and production requirements.
-You ALWAYS write COMPLETE, WORD-FOR-WORD scripts - NEVER outlines or summaries.
-Your scripts are ACTIONABLE, SPECIFIC, and READY FOR RECORDING without modification."""
-
-        # Calculate dynamic timing breakdown based on duration and style
-        timing = self.calculate_dynamic_timing(request.duration_minutes, request.style)
-        total_seconds = timing["total"]
-        hook_seconds = timing["hook"]
-        content_seconds = timing["content"]
-        outro_seconds = timing["outro"]
-        
-        # Determine script flow structure
+    @staticmethod
+    def _script_brief(request: ScriptGenerationRequest, persona: Optional[Dict] = None) -> str:
+        """Core requirements block (topic, duration, audience, tone, persona, key points)"""
         flow_structure = request.script_flow or "Hook → Introduction → Main Content → Conclusion → Call-to-Action"
-        
+        total_seconds = request.duration_minutes * 60
+
         # Build persona context string (only if persona exists)
         persona_context = ""
         if persona:
@@ -268,6 +309,32 @@ SCRIPT STYLE GUIDELINES (apply these characteristics throughout):
         if request.style:
             style_section = f"\nContent Style: {request.style} (Structure and deliver content in this format)"
         
+        return f"""Topic: {request.topic}
+Duration: {request.duration_minutes} minutes ({total_seconds} seconds total){audience_section}{tone_section}{style_section}
+Flow Structure: {flow_structure}
+{persona_context}{key_points_section}"""
+
+    def _build_script_prompt(
+        self,
+        request: ScriptGenerationRequest,
+        persona: Optional[Dict] = None
+    ) -> Tuple[str, str, Dict[str, int]]:
+        """Build (system_prompt, prompt, timing) for a script generation request"""
+
+        system_prompt = SCRIPT_SYSTEM_PROMPT
+
+        # Calculate dynamic timing breakdown based on duration and style
+        timing = self.calculate_dynamic_timing(request.duration_minutes, request.style)
+        total_seconds = timing["total"]
+        hook_seconds = timing["hook"]
+        content_seconds = timing["content"]
+        outro_seconds = timing["outro"]
+        
+        # Determine script flow structure
+        flow_structure = request.script_flow or "Hook → Introduction → Main Content → Conclusion → Call-to-Action"
+        
+        brief = self._script_brief(request, persona)
+
         # Handle regeneration with emphasized feedback and DELTA ANALYSIS
         regeneration_section = ""
         if request.regenerate_feedback:
@@ -337,10 +404,7 @@ Now create a NEW VERSION that:
 {'='*60}
 
 📌 CORE REQUIREMENTS:
-Topic: {request.topic}
-Duration: {request.duration_minutes} minutes ({total_seconds} seconds total){audience_section}{tone_section}{style_section}
-Flow Structure: {flow_structure}
-{persona_context}{key_points_section}
+{brief}
 {regeneration_section}
 {'='*60}
 ⏱️ TIMING BREAKDOWN
@@ -443,29 +507,103 @@ like button so more creators can find this video."
 
 NOW CREATE THE COMPLETE, PRODUCTION-READY SCRIPT:
 """
-        
+
+        return system_prompt, prompt, timing
+
+    async def generate_script(
+        self,
+        request: ScriptGenerationRequest,
+        persona: Optional[Dict] = None
+    ) -> str:
+        """Generate video script, coalescing identical in-flight requests"""
+        key = fingerprint("script", request.dict(), persona)
+        return await self._flight.do(
+            key,
+            lambda: self._generate_script(request, persona),
+            timeout=self._script_coalesce_timeout(request)
+        )
+
+    @staticmethod
+    def _script_coalesce_timeout(request: ScriptGenerationRequest) -> float:
+        """How long a caller waits on a shared script generation; scales with duration"""
+        return settings.GENERATION_COALESCE_TIMEOUT + request.duration_minutes * settings.SCRIPT_COALESCE_SECONDS_PER_MINUTE
+
+    async def _generate_script(
+        self,
+        request: ScriptGenerationRequest,
+        persona: Optional[Dict] = None
+    ) -> str:
+        """Generate video script"""
+
+        system_prompt, prompt, timing = self._build_script_prompt(request, persona)
+
         # Use significantly higher temperature for regeneration to encourage creative changes
         temperature = 0.95 if request.regenerate_feedback else 0.7
+        # Sized from the duration; anything past the provider's per-call limit is continued
+        output_budget = estimate_script_tokens(request.duration_minutes)
+
+        script = None
+        if script_sections.should_use(request):
+            # Long-form: outline, then sections in parallel (latency ~ longest section)
+            try:
+                script = await script_sections.generate(
+                    request, system_prompt, self._script_brief(request, persona), timing, temperature
+                )
+            except Exception as e:
+                logger.warning(f"Sectioned script generation failed ({e}); falling back to a single pass")
 
         # Generate initial script
-        script = await ai_service.generate(
-            prompt=prompt,
-            model=request.ai_model,
-            temperature=temperature,  # 0.95 for regeneration (high variation), 0.7 for initial (balanced)
-            max_tokens=4000,  # Enough for detailed scripts
-            system_prompt=system_prompt,
-            tool_type='script'  # Enable tool-specific optimizations
-        )
+        if script is None:
+            script = await ai_service.generate(
+                prompt=prompt,
+                model=request.ai_model,
+                temperature=temperature,  # 0.95 for regeneration (high variation), 0.7 for initial (balanced)
+                max_tokens=output_budget,
+                system_prompt=system_prompt,
+                tool_type='script',  # Enable tool-specific optimizations
+                use_cache=not request.regenerate_feedback,  # Regeneration wants a fresh sample
+                output_budget=output_budget
+            )
 
         # Validate the generated script meets requirements
-        is_valid, validation_issues = self.validate_script_requirements(script, request, timing)
+        issues = self.find_script_issues(script, request)
+        issues = [issue for issue in issues if issue["code"] not in repair.IGNORED]
+
+        # Only auto-fix initial generations (regeneration output is what the user asked for)
+        if issues and not request.regenerate_feedback:
+            if repair.script_repair.needs_full_regeneration(issues):
+                script = await self._regenerate_with_feedback(
+                    request, system_prompt, prompt, timing, temperature, output_budget,
+                    [issue["message"] for issue in issues]
+                )
+            else:
+                # Patch just what's wrong instead of paying for a second full script
+                logger.warning(f"Script validation failed: {[issue['code'] for issue in issues]}. Repairing.")
+                script, _ = await repair.script_repair.repair(script, issues, request, system_prompt, timing)
+                remaining = self.find_script_issues(script, request)
+                if remaining:
+                    logger.warning(f"Script repair left issues: {[issue['message'] for issue in remaining]}")
+
+        # Post-process script for consistent formatting
+        script = self.post_process_script(script, request)
 
-        # If validation fails, retry with feedback (max 1 retry to avoid excessive costs)
-        if not is_valid and not request.regenerate_feedback:  # Only auto-retry for initial generation
-            logger.warning(f"Script validation failed: {validation_issues}. Attempting retry with feedback.")
+        return script
+
+    async def _regenerate_with_feedback(
+        self,
+        request: ScriptGenerationRequest,
+        system_prompt: str,
+        prompt: str,
+        timing: Dict[str, int],
+        temperature: float,
+        output_budget: int,
+        validation_issues: List[str]
+    ) -> str:
+        """Full regeneration with validation feedback, for scripts a targeted repair can't fix"""
+        logger.warning(f"Script validation failed: {validation_issues}. Attempting retry with feedback.")
 
-            # Create validation feedback prompt
-            validation_feedback = f"""
+        # Create validation feedback prompt
+        validation_feedback = f"""
 The previous script had the following issues that MUST be fixed:
 {chr(10).join(f"• {issue}" for issue in validation_issues)}
 
@@ -479,35 +617,226 @@ Please regenerate the script ensuring ALL requirements are met:
 Now create the COMPLETE, PRODUCTION-READY SCRIPT that addresses all issues:
 """
 
-            retry_prompt = validation_feedback + "\n\n" + prompt
-
-            # Retry generation with validation feedback
-            script = await ai_service.generate(
-                prompt=retry_prompt,
-                model=request.ai_model,
-                temperature=temperature + 0.1,  # Slightly higher temperature for variation
-                max_tokens=4000,
-                system_prompt=system_prompt,
-                tool_type='script'
-            )
+        retry_prompt = validation_feedback + "\n\n" + prompt
 
-            # Validate retry
-            is_valid_retry, retry_issues = self.validate_script_requirements(script, request, timing)
-            if not is_valid_retry:
-                logger.warning(f"Script retry still has issues: {retry_issues}")
-                # Continue with script even if retry fails - better than no script
+        # Retry generation with validation feedback
+        script = await ai_service.generate(
+            prompt=retry_prompt,
+            model=request.ai_model,
+            temperature=temperature + 0.1,  # Slightly higher temperature for variation
+            max_tokens=output_budget,
+            system_prompt=system_prompt,
+            tool_type='script',
+            use_cache=False,
+            output_budget=output_budget
+        )
 
-        # Post-process script for consistent formatting
-        script = self.post_process_script(script, request)
+        # Validate retry
+        is_valid_retry, retry_issues = self.validate_script_requirements(script, request, timing)
+        if not is_valid_retry:
+            logger.warning(f"Script retry still has issues: {retry_issues}")
+            # Continue with script even if retry fails - better than no script
 
         return script
+
+    async def stream_script(
+        self,
+        request: ScriptGenerationRequest,
+        persona: Optional[Dict] = None,
+        steering: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream the raw script from the provider as it is generated.
+        Callers accumulate the deltas and run post_process_script once on the full text.
+        `steering` is a correction put in front of the prompt for a re-steered attempt.
+        """
+        system_prompt, prompt, _ = self._build_script_prompt(request, persona)
+        if steering:
+            prompt = f"{steering}\n\n{prompt}"
+
+        # Same temperature policy as generate_script
+        temperature = 0.95 if request.regenerate_feedback else 0.7
+
+        async for delta in ai_service.generate_stream(
+            prompt=prompt,
+            model=request.ai_model,
+            temperature=temperature,
+            max_tokens=estimate_script_tokens(request.duration_minutes),
+            system_prompt=system_prompt,
+            tool_type='script',
+            output_budget=estimate_script_tokens(request.duration_minutes)
+        ):
+            yield delta
     
-    async def generate_titles(
+    async def stream_script_events(
+        self,
+        request: ScriptGenerationRequest,
+        persona: Optional[Dict] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream the script as SSE events while validating it incrementally.
+
+        Yields 'chunk' events with raw deltas and 'validation' events with the
+        running checks. An attempt that fails early (no hook, outline-style text)
+        is cancelled and re-steered with a corrected prompt, announced by a
+        'replace' event with empty content so the client drops the draft. A script
+        running far past its length budget is cut off and given an outro instead.
+        """
+        system_prompt, _, timing = self._build_script_prompt(request, persona)
+        steering = None
+
+        for attempt in range(settings.SCRIPT_STREAM_MAX_RESTEERS + 1):
+            validator = IncrementalScriptValidator(request, timing)
+            stopped = False
+            stream = self.stream_script(request, persona, steering=steering)
+            try:
+                async for delta in stream:
+                    changed = validator.feed(delta)
+                    yield {'type': 'chunk', 'content': delta}
+                    if changed:
+                        yield {'type': 'validation', **validator.progress()}
+                    if validator.abort_reason and settings.SCRIPT_STREAM_VALIDATION:
+                        stopped = validator.abort_reason == ABORT_TOO_LONG or attempt < settings.SCRIPT_STREAM_MAX_RESTEERS
+                        if stopped:
+                            break
+            finally:
+                # Cancels the provider stream when we stop early
+                await stream.aclose()
+
+            if stopped and validator.abort_reason == ABORT_TOO_LONG:
+                logger.warning(f"Streamed script passed {validator.words} words without an outro; writing the outro only")
+                yield {'type': 'progress', 'message': 'Wrapping up with the outro...'}
+                outro = await repair.script_repair.write_outro(validator.text, request, system_prompt, timing)
+                yield {'type': 'chunk', 'content': f"\n\n{outro.strip()}"}
+                return
+
+            if stopped:
+                logger.warning(f"Streamed script aborted early ({validator.abort_reason}) after {validator.words} words; re-steering")
+                yield {'type': 'replace', 'content': ''}
+                yield {'type': 'progress', 'message': 'Adjusting the script and trying again...'}
+                steering = IncrementalScriptValidator.steering_note(validator.abort_reason, validator.expected_words)
+                continue
+
+            yield {'type': 'validation', **validator.progress()}
+            return
+
+    @staticmethod
+    def split_script_sections(script: str) -> List[Dict]:
+        """
+        Addressable sections of a script, one per section header ([HOOK - ...],
+        [Section 2: ...], [OUTRO - ...]); production notes like [B-ROLL: ...] stay
+        inside their section. Each dict has name, start and end offsets.
+        """
+        headers = list(repair.SECTION_HEADER.finditer(script))
+        sections = []
+        for i, match in enumerate(headers):
+            name = re.split(r'\s+-\s+|\s*-?\s*\d+:\d{2}', match.group(1), maxsplit=1)[0].strip(' -')
+            end = headers[i + 1].start() if i + 1 < len(headers) else len(script)
+            sections.append({"name": name, "start": match.start(), "end": end})
+        return sections
+
+    @staticmethod
+    def _find_section(sections: List[Dict], label: str) -> Dict:
+        """Section whose name is `label` or starts with it ("Section 2" -> "SECTION 2: WHY IT WORKS")"""
+        wanted = label.strip().strip('[]').upper()
+        for section in sections:
+            name = section["name"].upper()
+            if name == wanted or (name.startswith(wanted) and not name[len(wanted)].isalnum()):
+                return section
+        available = ", ".join(section["name"] for section in sections) or "none"
+        raise ValueError(f"Section '{label}' not found in script (available: {available})")
+
+    async def regenerate_script_sections(
+        self,
+        script: str,
+        request: ScriptSectionRegenerateRequest,
+        script_request: ScriptGenerationRequest,
+        persona: Optional[Dict] = None
+    ) -> Tuple[str, List[str]]:
+        """
+        Rewrite only the requested sections of an existing script.
+
+        Each section is regenerated from its own text, the tail of the section
+        before it and the start of the section after it - never the full script -
+        at about its current length. The rewrites are spliced in, key points the
+        rewrites lost are added back and timestamps are recomputed. Returns (script, names of the regenerated sections).
+        """
+        sections = self.split_script_sections(script)
+        targets = []
+        for label in request.sections:
+            section = self._find_section(sections, label)
+            if section not in targets:
+                targets.append(section)
+
+        brief = self._script_brief(script_request, persona)
+        feedback = request.regenerate_feedback.replace('IMPORTANT USER FEEDBACK - MUST FOLLOW: ', '')
+
+        async def rewrite(section: Dict) -> str:
+            index = sections.index(section)
+            current = script[section["start"]:section["end"]].strip()
+            header, _, body = current.partition("\n")
+            words = max(40, len(body.split()))
+            before = script[sections[index - 1]["start"]:section["start"]].strip()[-800:] if index > 0 else ""
+            after = script[section["end"]:sections[index + 1]["end"]].strip()[:800] if index + 1 < len(sections) else ""
+
+            prompt = f"""You are revising ONE section of an existing video script. The rest of the script stays as is.
+
+{brief}
+
+USER FEEDBACK FOR THIS REVISION:
+{feedback}
+
+{"END OF THE PREVIOUS SECTION (for continuity - do not repeat it):" + chr(10) + before if before else "This is the first section of the script."}
+
+SECTION TO REWRITE:
+{current}
+
+{"START OF THE NEXT SECTION (your rewrite must lead into it):" + chr(10) + after if after else "This is the last section of the script."}
+
+Rewrite the section applying the feedback. Keep about {words} words of word-for-word narration
+so the video's timing holds, keep the role of the section in the script, and start with exactly
+this header line: {header.strip()}
+Output only the rewritten section - no preamble or commentary."""
+
+            budget = estimate_script_tokens(words / SPEAKING_WORDS_PER_MINUTE, minimum=400)
+            text = await ai_service.generate(
+                prompt=prompt,
+                model=request.ai_model or script_request.ai_model,
+                temperature=0.9,
+                max_tokens=budget,
+                system_prompt=SCRIPT_SYSTEM_PROMPT,
+                tool_type='script',
+                use_cache=False,
+                output_budget=budget
+            )
+            text = text.strip()
+            if not text.startswith('['):
+                text = f"{header.strip()}\n{text}"
+            return text
+
+        rewrites = await asyncio.gather(*(rewrite(section) for section in targets))
+
+        # Splice from the end so earlier offsets stay valid
+        for section, text in sorted(zip(targets, rewrites), key=lambda pair: pair[0]["start"], reverse=True):
+            separator = script[section["start"]:section["end"]]
+            trailing = separator[len(separator.rstrip()):] or "\n\n"
+            script = script[:section["start"]] + text + trailing + script[section["end"]:]
+
+        # A rewrite may drop a mandatory key point the old section covered; add it back
+        missing = [issue for issue in self.find_script_issues(script, script_request) if issue["code"] == repair.MISSING_KEY_POINTS]
+        if missing:
+            logger.warning(f"Section rewrite dropped key points {missing[0]['key_points']}; repairing")
+            timing = self.calculate_dynamic_timing(script_request.duration_minutes, script_request.style)
+            script, _ = await repair.script_repair.repair(script, missing, script_request, SCRIPT_SYSTEM_PROMPT, timing)
+
+        return self.post_process_script(script, script_request), [section["name"] for section in targets]
+
+    def _build_title_prompt(
         self,
         request: TitleGenerationRequest,
         persona: Optional[Dict] = None
-    ) -> List[str]:
-        """Generate video titles optimized for maximum CTR with proven formulas"""
+    ) -> Tuple[str, str]:
+        """Build (system_prompt, prompt) for title generation"""
 
         system_prompt = """You are a master of viral video title creation with deep knowledge of YouTube algorithm and viewer psychology.
 You create titles that maximize click-through rates using proven formulas, curiosity gaps, and emotional triggers.
@@ -636,6 +965,30 @@ Example format: ["Title 1 Under 70 Chars", "Title 2 Under 70 Chars", "Title 3 Un
 
         # Inject persona context for audience-specific titles
         prompt = ai_service.inject_persona_context(prompt, persona, tool_type='title')
+        return system_prompt, prompt
+
+    @staticmethod
+    def _parse_titles(response: str, count: int) -> List[str]:
+        """Titles from a full response, with a line-based fallback for non-JSON output"""
+        try:
+            titles = tolerant_json.loads(response, schema=TITLES_SCHEMA)
+            # Validate and filter titles by character limit
+            valid_titles = [t for t in titles if isinstance(t, str) and len(t) <= 70]
+            return valid_titles[:count] if valid_titles else titles[:count]
+        except ValueError:
+            # Fallback: split by newlines and clean
+            lines = [line.strip().strip('"').strip("'") for line in response.split('\n') if line.strip()]
+            # Filter out JSON artifacts and empty lines
+            titles = [line for line in lines if line and not line.startswith(('[', ']', '{', '}'))]
+            return titles[:count]
+
+    async def generate_titles(
+        self,
+        request: TitleGenerationRequest,
+        persona: Optional[Dict] = None
+    ) -> List[str]:
+        """Generate video titles optimized for maximum CTR with proven formulas"""
+        system_prompt, prompt = self._build_title_prompt(request, persona)
 
         response = await ai_service.generate(
             prompt=prompt,
@@ -645,30 +998,54 @@ Example format: ["Title 1 Under 70 Chars", "Title 2 Under 70 Chars", "Title 3 Un
             system_prompt=system_prompt,
             tool_type='title'  # Enable tool-specific optimizations
         )
+        return self._parse_titles(response, request.count)
 
-        # Parse JSON response with better error handling
+    async def stream_titles(
+        self,
+        request: TitleGenerationRequest,
+        persona: Optional[Dict] = None
+    ) -> AsyncIterator[str]:
+        """
+        Yield titles one by one as soon as each array element is complete
+
+        Titles over the 70 character limit are skipped; if nothing usable
+        streams, the full response goes through generate_titles' parsing.
+        """
+        system_prompt, prompt = self._build_title_prompt(request, persona)
+        parser = tolerant_json.IncrementalJSONArrayParser()
+        emitted = 0
+
+        def usable(title) -> bool:
+            return isinstance(title, str) and bool(title.strip()) and len(title) <= 70
+
+        stream = ai_service.generate_stream(
+            prompt=prompt,
+            model=request.ai_model,
+            temperature=0.85,
+            max_tokens=800,
+            system_prompt=system_prompt,
+            tool_type='title'
+        )
         try:
-            # Try to extract JSON from response (handle markdown code blocks)
-            response_clean = response.strip()
-            if response_clean.startswith('```'):
-                # Extract JSON from markdown code block
-                lines = response_clean.split('\n')
-                response_clean = '\n'.join(lines[1:-1]) if len(lines) > 2 else response_clean
-
-            titles = json.loads(response_clean)
-
-            if isinstance(titles, list):
-                # Validate and filter titles by character limit
-                valid_titles = [t for t in titles if isinstance(t, str) and len(t) <= 70]
-                return valid_titles[:request.count] if valid_titles else titles[:request.count]
-            else:
-                return [response]
-        except json.JSONDecodeError:
-            # Fallback: split by newlines and clean
-            lines = [line.strip().strip('"').strip("'") for line in response.split('\n') if line.strip()]
-            # Filter out JSON artifacts and empty lines
-            titles = [line for line in lines if line and not line.startswith(('[', ']', '{', '}'))]
-            return titles[:request.count]
+            async for delta in stream:
+                for title in parser.feed(delta):
+                    if not usable(title):
+                        continue
+                    yield title
+                    emitted += 1
+                    if emitted >= request.count:
+                        return
+        finally:
+            await stream.aclose()
+
+        for title in parser.finish():
+            if usable(title) and emitted < request.count:
+                yield title
+                emitted += 1
+        if not emitted:
+            # Nothing usable streamed: same parsing and fallback as generate_titles
+            for title in self._parse_titles(parser.text, request.count):
+                yield title
     
     async def generate_thumbnail_ideas(
         self,
@@ -680,7 +1057,12 @@ Example format: ["Title 1 Under 70 Chars", "Title 2 Under 70 Chars", "Title 3 Un
         # Use new AI image generation service
         from app.services.thumbnail_image_service import thumbnail_image_service
         print("[Thumbnail Service] Using AI image generation (DALL-E 3)")
-        return await thumbnail_image_service.generate_thumbnails(request, persona)
+        key = fingerprint("thumbnail", request.dict(), persona)
+        return await self._flight.do(
+            key,
+            lambda: thumbnail_image_service.generate_thumbnails(request, persona),
+            timeout=settings.THUMBNAIL_COALESCE_TIMEOUT
+        )
 
     async def _generate_basic_thumbnails(
         self,
@@ -892,20 +1274,9 @@ Return ONLY the JSON array, no other text:
 
         # Parse JSON response with better error handling
         try:
-            response_clean = response.strip()
-            if response_clean.startswith('```'):
-                # Extract JSON from markdown code block
-                lines = response_clean.split('\n')
-                response_clean = '\n'.join([l for l in lines if not l.startswith('```')])
-
-            templates = json.loads(response_clean)
-            if isinstance(templates, list) and len(templates) > 0:
-                return templates
-            else:
-                # Return fallback template if parsing succeeds but format is wrong
-                return self._generate_fallback_template(request)
-        except json.JSONDecodeError as e:
-            # Return fallback template on JSON error
+            return tolerant_json.loads(response, schema=TEMPLATES_SCHEMA)
+        except ValueError as e:
+            # Return fallback template on JSON error or wrong format
             print(f"[Thumbnail Generation] JSON parse error: {e}")
             print(f"[Thumbnail Generation] Response preview: {response[:500]}")
             return self._generate_fallback_template(request)
@@ -1355,15 +1726,9 @@ NOW GENERATE THE OPTIMIZED SEO CONTENT AS JSON:
 
         # Parse JSON response with better error handling
         try:
-            response_clean = response.strip()
-            if response_clean.startswith('```'):
-                # Extract JSON from markdown code block
-                lines = response_clean.split('\n')
-                response_clean = '\n'.join([l for l in lines if not l.startswith('```')])
-
-            data = json.loads(response_clean)
+            data = tolerant_json.loads(response, schema=SEO_SCHEMA)
             return SEOOptimizationResponse(**data)
-        except (json.JSONDecodeError, Exception) as e:
+        except Exception:
             # Better fallback response
             return SEOOptimizationResponse(
                 optimized_content=f"[SEO Optimized] {request.content}",
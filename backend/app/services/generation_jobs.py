@@ -0,0 +1,377 @@
+"""
+Background generation jobs
+
+submit() validates the request, records a job and hands its id to the
+configured backend, so the HTTP request returns immediately; clients poll
+GET /jobs/{id} or subscribe to its SSE events. execute() is the same
+wherever it runs: claim the job, run the creator_tools_service call,
+persist the Content row and record the outcome.
+
+Backends (settings.JOB_BACKEND):
+  - "local": asyncio workers inside the API process, job state in memory.
+    Needs no Redis - for development and tests.
+  - "celery": job state in Redis (REDIS_URL), attempts run on
+    app.celery_worker via CELERY_BROKER_URL, so workers scale separately
+    from the API replicas.
+
+A failed attempt is retried up to JOB_MAX_RETRIES times with linear backoff
+(invalid parameters are not retried). Each attempt holds a claim for
+JOB_VISIBILITY_TIMEOUT seconds and is cancelled when it runs out; a job whose
+worker died is claimable again once the claim expires.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.database import async_session_scope
+from app.models.models import Content, Persona
+from app.services.artifact_store import artifact_store
+from app.schemas.schemas import (
+    ScriptGenerationRequest,
+    TitleGenerationRequest,
+    ThumbnailIdeaRequest,
+    SEOOptimizationRequest
+)
+from sqlalchemy import select
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+REQUEST_SCHEMAS = {
+    "script": ScriptGenerationRequest,
+    "titles": TitleGenerationRequest,
+    "thumbnails": ThumbnailIdeaRequest,
+    "seo": SEOOptimizationRequest,
+}
+
+# A claim outlives the attempt's own timeout slightly, so two attempts never overlap
+CLAIM_MARGIN_SECONDS = 30
+
+
+class LocalJobStore:
+    """Job records and claims in process memory"""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict] = {}
+        self._claims: Dict[str, float] = {}
+
+    async def save(self, job: Dict):
+        job["updated_at"] = time.time()
+        self._jobs[job["id"]] = dict(job)
+        # Drop expired records as new ones come in
+        cutoff = time.time() - settings.JOB_RESULT_TTL
+        for job_id in [k for k, v in self._jobs.items() if v["updated_at"] < cutoff]:
+            del self._jobs[job_id]
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def claim(self, job_id: str, ttl: float) -> bool:
+        now = time.monotonic()
+        if self._claims.get(job_id, 0) > now:
+            return False
+        self._claims[job_id] = now + ttl
+        return True
+
+    async def release(self, job_id: str):
+        self._claims.pop(job_id, None)
+
+
+class RedisJobStore:
+    """Job records as JSON with a TTL; claims are SET NX keys that expire"""
+
+    def __init__(self, redis_url: str, key_prefix: str = "creatorx:job:"):
+        self.redis_url = redis_url
+        self.key_prefix = key_prefix
+        self._redis = None
+        self._loop = None
+
+    def _client(self):
+        # redis.asyncio connections belong to the loop that opened them
+        loop = asyncio.get_running_loop()
+        if self._redis is None or self._loop is not loop:
+            import redis.asyncio as aioredis
+            self._redis = aioredis.from_url(self.redis_url, decode_responses=True)
+            self._loop = loop
+        return self._redis
+
+    async def save(self, job: Dict):
+        job["updated_at"] = time.time()
+        await self._client().set(self.key_prefix + job["id"], json.dumps(job), ex=settings.JOB_RESULT_TTL)
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        raw = await self._client().get(self.key_prefix + job_id)
+        return json.loads(raw) if raw else None
+
+    async def claim(self, job_id: str, ttl: float) -> bool:
+        return bool(await self._client().set(self.key_prefix + job_id + ":claim", "1", nx=True, ex=int(ttl)))
+
+    async def release(self, job_id: str):
+        await self._client().delete(self.key_prefix + job_id + ":claim")
+
+
+class LocalJobBackend:
+    """asyncio queue drained by JOB_LOCAL_CONCURRENCY workers in this process"""
+
+    def __init__(self, service: "GenerationJobService"):
+        self.service = service
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+
+    async def enqueue(self, job_id: str, delay: float = 0):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._workers = [
+                asyncio.create_task(self._worker()) for _ in range(settings.JOB_LOCAL_CONCURRENCY)
+            ]
+        if delay:
+            asyncio.get_running_loop().call_later(delay, self._queue.put_nowait, job_id)
+        else:
+            self._queue.put_nowait(job_id)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                retry_in = await self.service.execute(job_id)
+                if retry_in is not None:
+                    await self.enqueue(job_id, delay=retry_in)
+            except Exception as e:
+                logger.error(f"Job {job_id}: worker error: {e}")
+
+    async def shutdown(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+
+class CeleryJobBackend:
+    """Publishes job ids to the Celery broker; app.celery_worker runs them"""
+
+    async def enqueue(self, job_id: str, delay: float = 0):
+        from app.celery_worker import celery_app, RUN_JOB_TASK
+        # Publishing is a blocking broker round-trip
+        await asyncio.to_thread(celery_app.send_task, RUN_JOB_TASK, args=[job_id], countdown=delay or None)
+
+    async def shutdown(self):
+        pass
+
+
+async def _load_persona(persona_id: Optional[int], user_id: int) -> Optional[Dict]:
+    """Persona as the dict creator_tools_service expects (same shape as the endpoints use)"""
+    if not persona_id:
+        return None
+    async with async_session_scope() as db:
+        result = await db.execute(select(Persona).where(
+            Persona.id == persona_id,
+            Persona.user_id == user_id
+        ))
+        persona = result.scalars().first()
+    if not persona:
+        return None
+    return {
+        "name": persona.name,
+        "type": persona.type.value,
+        "description": persona.description,
+        "attributes": persona.attributes
+    }
+
+
+async def _script_content(request: ScriptGenerationRequest, persona: Optional[Dict]) -> Dict:
+    from app.services.creator_tools_service import creator_tools_service
+    script = await creator_tools_service.generate_script(request, persona)
+    meta_data = {
+        "topic": request.topic,
+        "duration_minutes": request.duration_minutes,
+        "tone": request.tone,
+        "target_audience": request.target_audience,
+        "key_points": request.key_points
+    }
+    if request.parent_content_id:
+        meta_data['parent_content_id'] = str(request.parent_content_id)
+        meta_data['version_number'] = request.version_number or 2
+        if request.regenerate_feedback:
+            meta_data['regeneration_feedback'] = request.regenerate_feedback
+    else:
+        meta_data['version_number'] = 1
+    return {"type": "script", "title": f"Script: {request.topic}", "content_text": script, "meta_data": meta_data}
+
+
+async def _titles_content(request: TitleGenerationRequest, persona: Optional[Dict]) -> Dict:
+    from app.services.creator_tools_service import creator_tools_service
+    titles = await creator_tools_service.generate_titles(request, persona)
+    return {
+        "type": "title",
+        "title": f"Titles for: {request.video_topic}",
+        "content_text": "\n".join(titles),
+        "meta_data": {"topic": request.video_topic, "keywords": request.keywords, "titles": titles, "count": len(titles)}
+    }
+
+
+async def _thumbnails_content(request: ThumbnailIdeaRequest, persona: Optional[Dict]) -> Dict:
+    from app.services.creator_tools_service import creator_tools_service
+    templates = await creator_tools_service.generate_thumbnail_ideas(request, persona)
+    if not templates:
+        raise Exception("Failed to generate thumbnail templates")
+    return {
+        "type": "thumbnail_idea",
+        "title": f"Thumbnail: {request.thumbnail_prompt[:50]}",
+        "content_text": f"{len(templates)} thumbnail templates generated",
+        "meta_data": {"thumbnail_prompt": request.thumbnail_prompt, "templates": templates, "count": len(templates)}
+    }
+
+
+async def _seo_content(request: SEOOptimizationRequest, persona: Optional[Dict]) -> Dict:
+    from app.services.creator_tools_service import creator_tools_service
+    result = await creator_tools_service.optimize_seo(request, persona)
+    return {
+        "type": "seo_content",
+        "title": "SEO Optimized Content",
+        "content_text": result.optimized_content,
+        "meta_data": {
+            "meta_title": result.meta_title,
+            "meta_description": result.meta_description,
+            "suggested_keywords": result.suggested_keywords,
+            "seo_score": result.seo_score,
+            "target_keywords": request.target_keywords
+        }
+    }
+
+
+CONTENT_BUILDERS = {
+    "script": _script_content,
+    "titles": _titles_content,
+    "thumbnails": _thumbnails_content,
+    "seo": _seo_content,
+}
+
+
+class GenerationJobService:
+    """Submit, look up and execute generation jobs on the configured backend"""
+
+    def __init__(self):
+        self._store = None
+        self._backend = None
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = RedisJobStore(settings.REDIS_URL) if settings.JOB_BACKEND == "celery" else LocalJobStore()
+        return self._store
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = CeleryJobBackend() if settings.JOB_BACKEND == "celery" else LocalJobBackend(self)
+        return self._backend
+
+    async def submit(self, user_id: int, kind: str, params: Dict) -> Dict:
+        """Validate params for kind (raises ValueError), record the job and enqueue it"""
+        if kind not in REQUEST_SCHEMAS:
+            raise ValueError(f"Unknown job kind '{kind}' (expected one of {', '.join(REQUEST_SCHEMAS)})")
+        request = REQUEST_SCHEMAS[kind](**params)
+
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "kind": kind,
+            "params": request.dict(),
+            "status": QUEUED,
+            "attempts": 0,
+            "content_id": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now
+        }
+        await self.store.save(job)
+        await self.backend.enqueue(job["id"])
+        logger.info(f"Job {job['id']}: queued {kind} for user {user_id} ({settings.JOB_BACKEND})")
+        return job
+
+    async def get(self, job_id: str, user_id: int) -> Optional[Dict]:
+        """The job if it exists and belongs to user_id"""
+        job = await self.store.get(job_id)
+        return job if job and job["user_id"] == user_id else None
+
+    async def execute(self, job_id: str) -> Optional[float]:
+        """
+        Run one attempt of a job
+
+        Returns the delay in seconds before the next attempt if this one failed
+        and may be retried, otherwise None (done, failed for good, or claimed
+        by another worker).
+        """
+        job = await self.store.get(job_id)
+        if not job or job["status"] in FINISHED:
+            return None
+        if not await self.store.claim(job_id, settings.JOB_VISIBILITY_TIMEOUT + CLAIM_MARGIN_SECONDS):
+            logger.info(f"Job {job_id}: already claimed by another worker")
+            return None
+
+        try:
+            job.update(status=RUNNING, attempts=job["attempts"] + 1, error=None)
+            await self.store.save(job)
+            try:
+                job["content_id"] = await asyncio.wait_for(self._run(job), timeout=settings.JOB_VISIBILITY_TIMEOUT)
+            except asyncio.TimeoutError:
+                error, retryable = f"Timed out after {settings.JOB_VISIBILITY_TIMEOUT}s", True
+            except Exception as e:
+                # Bad parameters fail the same way every time
+                error, retryable = str(e) or type(e).__name__, not isinstance(e, ValueError)
+            else:
+                job["status"] = SUCCEEDED
+                await self.store.save(job)
+                logger.info(f"Job {job_id}: succeeded with content {job['content_id']}")
+                return None
+
+            retry = retryable and job["attempts"] <= settings.JOB_MAX_RETRIES
+            job.update(status=QUEUED if retry else FAILED, error=error)
+            await self.store.save(job)
+            logger.warning(f"Job {job_id}: attempt {job['attempts']} failed ({error}){', retrying' if retry else ''}")
+            return settings.JOB_RETRY_BACKOFF_SECONDS * job["attempts"] if retry else None
+        finally:
+            await self.store.release(job_id)
+
+    async def _run(self, job: Dict) -> int:
+        """Generate and persist; returns the new Content id"""
+        start_time = time.time()
+        request = REQUEST_SCHEMAS[job["kind"]](**job["params"])
+        persona = await _load_persona(request.persona_id, job["user_id"])
+
+        record = await CONTENT_BUILDERS[job["kind"]](request, persona)
+        record.update(
+            user_id=job["user_id"],
+            persona_id=request.persona_id if persona else None,
+            ai_model=request.ai_model,
+            prompt_used=str(request.dict()),
+            generation_time=time.time() - start_time
+        )
+        record["meta_data"]["job_id"] = job["id"]
+
+        content = Content(**await asyncio.to_thread(artifact_store.externalize_content, record))
+        async with async_session_scope() as db:
+            db.add(content)
+            await db.commit()
+            await db.refresh(content)
+        return content.id
+
+    async def shutdown(self):
+        if self._backend is not None:
+            await self._backend.shutdown()
+
+
+generation_jobs = GenerationJobService()
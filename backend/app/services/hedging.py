@@ -0,0 +1,146 @@
+"""
+Hedged requests for latency-critical tools
+
+If the primary provider hasn't answered within its observed p90 latency for
+this tool, the same prompt is sent to a secondary provider. The first good
+result wins and the other call is cancelled. A budget caps hedges to a
+fraction of recent requests so tail-latency protection can't double spend.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Recent successful-call latencies per (tool, provider)"""
+
+    def __init__(self, max_samples: int = 200):
+        self.max_samples = max_samples
+        self._samples: Dict[str, deque] = {}
+
+    def record(self, key: str, latency: float):
+        self._samples.setdefault(key, deque(maxlen=self.max_samples)).append(latency)
+
+    def percentile(self, key: str, q: float, min_samples: int) -> Optional[float]:
+        samples = self._samples.get(key)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class HedgeBudget:
+    """Allow hedges for at most `ratio` of the requests seen in the last window"""
+
+    def __init__(self, ratio: float, window_seconds: float = 60):
+        self.ratio = ratio
+        self.window_seconds = window_seconds
+        self._requests: deque = deque()
+        self._hedges: deque = deque()
+
+    def _trim(self, now: float):
+        cutoff = now - self.window_seconds
+        for events in (self._requests, self._hedges):
+            while events and events[0] < cutoff:
+                events.popleft()
+
+    def record_request(self):
+        self._requests.append(time.monotonic())
+
+    def try_spend(self) -> bool:
+        now = time.monotonic()
+        self._trim(now)
+        # Always allow one hedge per window so low traffic still gets protection
+        if len(self._hedges) >= max(1.0, self.ratio * len(self._requests)):
+            return False
+        self._hedges.append(now)
+        return True
+
+
+class Hedger:
+    """Runs a primary call and, past its p90, a secondary; first good result wins"""
+
+    def __init__(self):
+        self.latencies = LatencyTracker()
+        self.budget = HedgeBudget(settings.AI_HEDGE_BUDGET_RATIO)
+        self.stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "budget_denied": 0}
+
+    def hedge_delay(self, tool_type: str, provider: str) -> float:
+        observed = self.latencies.percentile(f"{tool_type}:{provider}", 0.9, settings.AI_HEDGE_MIN_SAMPLES)
+        return observed if observed is not None else settings.AI_HEDGE_DEFAULT_DELAY
+
+    async def run(
+        self,
+        tool_type: str,
+        primary_name: str,
+        primary: Callable[[], Awaitable[Any]],
+        secondary_name: str,
+        secondary: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return the first good (non-empty) result of primary / hedged secondary"""
+        self.stats["requests"] += 1
+        self.budget.record_request()
+        latency_key = f"{tool_type}:{primary_name}"
+        delay = self.hedge_delay(tool_type, primary_name)
+
+        start = time.monotonic()
+        primary_task = asyncio.ensure_future(primary())
+        tasks = {primary_task: primary_name}
+
+        try:
+            done, _ = await asyncio.wait({primary_task}, timeout=delay)
+            if done and self._is_good(primary_task):
+                self.latencies.record(latency_key, time.monotonic() - start)
+                return primary_task.result()
+
+            # Primary is slow (or failed fast) - hedge if the budget allows
+            if self.budget.try_spend():
+                self.stats["hedged"] += 1
+                reason = "failed" if done else f"no answer after {delay:.1f}s (p90)"
+                logger.info(f"[Hedge] {tool_type}: {primary_name} {reason}, hedging to {secondary_name}")
+                tasks[asyncio.ensure_future(secondary())] = secondary_name
+            else:
+                self.stats["budget_denied"] += 1
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task is primary_task and not task.cancelled() and task.exception() is None:
+                        self.latencies.record(latency_key, time.monotonic() - start)
+                    if self._is_good(task):
+                        if task is not primary_task:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+
+            # Neither produced a good result: surface the primary's outcome
+            if primary_task.exception() is not None:
+                raise primary_task.exception()
+            return primary_task.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                    if task is primary_task:
+                        # Censored sample: the primary took at least this long
+                        self.latencies.record(latency_key, time.monotonic() - start)
+
+    @staticmethod
+    def _is_good(task: asyncio.Task) -> bool:
+        if not task.done() or task.cancelled() or task.exception() is not None:
+            return False
+        result = task.result()
+        return bool(result.strip()) if isinstance(result, str) else result is not None
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats)
+
+
+hedger = Hedger()
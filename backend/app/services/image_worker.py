@@ -0,0 +1,229 @@
+"""
+Process pool for CPU-bound image work (upload optimization, image analysis)
+
+Decoding, LANCZOS resizing and optimize=True JPEG encoding hold the GIL for
+tens to hundreds of milliseconds per image, so running them in async
+handlers stalls every other request, and threads would not run them in
+parallel. They run here in a shared pool of IMAGE_WORKER_PROCESSES
+processes instead.
+
+The queue is bounded: at most IMAGE_WORKER_MAX_PENDING jobs may be queued
+or running at once. Past that, run() raises ImageWorkerBusy at once
+(endpoints answer 503) instead of piling up requests, each holding its
+upload in memory.
+
+Job functions run in child processes: they must be module-level, and take
+and return plain bytes and tuples.
+"""
+
+import asyncio
+import io
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ImageWorkerBusy(Exception):
+    """The image worker queue is full"""
+    pass
+
+
+class ImageTooLarge(ValueError):
+    """Image dimensions exceed the pixel budget (decompression bomb guard)"""
+    pass
+
+
+def optimize_image(
+    image_data: bytes,
+    max_size: tuple = (1920, 1080),
+    max_pixels: int = 40_000_000
+) -> Tuple[bytes, int, int]:
+    """Optimize image: resize if too large, compress. Returns (jpeg_bytes, width, height)"""
+    from PIL import Image
+
+    # open() only parses the header, so the size is known before any pixel is decoded
+    img = Image.open(io.BytesIO(image_data))
+    if img.width * img.height > max_pixels:
+        raise ImageTooLarge(f"Image is {img.width}x{img.height}; at most {max_pixels:,} pixels allowed")
+
+    # Palette images have to be expanded before a LANCZOS resize
+    if img.mode in ('P', '1'):
+        img = img.convert('RGBA')
+
+    # Resize if too large - before any mode conversion, which would decode at full size.
+    # draft() makes the JPEG decoder downscale by 1/2..1/8 while decoding, picking the
+    # smallest scale still at least max_size; thumbnail() then reduce()s by an integer
+    # factor if one is left and finishes with LANCZOS
+    if img.size[0] > max_size[0] or img.size[1] > max_size[1]:
+        img.draft('RGB', max_size)
+        img.thumbnail(max_size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+    # Convert RGBA to RGB if necessary
+    if img.mode == 'RGBA':
+        # Create white background
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[3])  # Use alpha channel as mask
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    # Save optimized; the size is known here, no need to decode the output again
+    output = io.BytesIO()
+    img.save(output, format='JPEG', quality=85, optimize=True)
+    width, height = img.size
+    return output.getvalue(), width, height
+
+
+# Analysis runs on a copy no larger than this on its long side
+ANALYSIS_SIZE = 512
+# Palette bins: each channel quantized to this many bits (16 levels, 4096 colours),
+# so near-identical shades are counted together
+PALETTE_BITS = 4
+
+
+def analyze_image(image_data: bytes, max_pixels: int = 40_000_000) -> Dict:
+    """
+    Colour palette, brightness and text-placement hints for a thumbnail source image
+
+    Works on a downscaled copy as NumPy arrays: the palette is a quantized
+    colour histogram (np.bincount; each entry's colour is the mean of the
+    pixels in its bin) and brightness statistics come from one luma array.
+    """
+    import numpy as np
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(image_data))
+    width, height = img.size
+    if width * height > max_pixels:
+        raise ImageTooLarge(f"Image is {width}x{height}; at most {max_pixels:,} pixels allowed")
+
+    # Decode-time downscaling (see optimize_image), then RGB
+    img.draft('RGB', (ANALYSIS_SIZE, ANALYSIS_SIZE))
+    img.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE), Image.Resampling.BILINEAR, reducing_gap=2.0)
+    rgb = np.asarray(img.convert('RGB'), dtype=np.uint8)
+    pixels = rgb.reshape(-1, 3)
+    total = len(pixels)
+
+    # Dominant colours: histogram over quantized RGB
+    shift = 8 - PALETTE_BITS
+    quantized = (pixels >> shift).astype(np.int32)
+    bins = (quantized[:, 0] << (2 * PALETTE_BITS)) | (quantized[:, 1] << PALETTE_BITS) | quantized[:, 2]
+    n_bins = 1 << (3 * PALETTE_BITS)
+    counts = np.bincount(bins, minlength=n_bins)
+    top = np.argsort(counts)[::-1][:5]
+    top = top[counts[top] > 0]
+    sums = np.stack([np.bincount(bins, weights=pixels[:, c], minlength=n_bins)[top] for c in range(3)], axis=1)
+    means = np.rint(sums / counts[top][:, None]).astype(int)
+
+    hex_colors = []
+    for color, count in zip(means.tolist(), counts[top].tolist()):
+        hex_colors.append({
+            "hex": '#{:02x}{:02x}{:02x}'.format(*color),
+            "rgb": color,
+            "percentage": count / total * 100
+        })
+
+    # Brightness: ITU-R 601 luma (what PIL's 'L' mode uses), averaged per row once
+    luma = rgb.astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    row_means = luma.mean(axis=1)
+    rows = len(row_means)
+    avg_brightness = float(row_means.mean())
+    top_brightness = float(row_means[:max(rows // 3, 1)].mean())
+    bottom_brightness = float(row_means[rows * 2 // 3:].mean())
+
+    # Determine if dark or light
+    is_dark = avg_brightness < 128
+
+    # Suggest text placement zones (avoid busy areas); coordinates are in the original image
+    suggested_zones = [
+        {
+            "zone": "top",
+            "y_range": [50, height // 3],
+            "suitability": "high" if top_brightness < 100 or top_brightness > 200 else "medium",
+            "suggested_color": "#FFFFFF" if top_brightness < 128 else "#000000"
+        },
+        {
+            "zone": "bottom",
+            "y_range": [height * 2 // 3, height - 50],
+            "suitability": "high" if bottom_brightness < 100 or bottom_brightness > 200 else "medium",
+            "suggested_color": "#FFFFFF" if bottom_brightness < 128 else "#000000"
+        }
+    ]
+
+    return {
+        "dimensions": {
+            "width": width,
+            "height": height,
+            "aspect_ratio": f"{width}:{height}"
+        },
+        "colors": {
+            "dominant": hex_colors,
+            "palette_type": "dark" if is_dark else "light",
+            "average_brightness": avg_brightness
+        },
+        "text_placement": {
+            "suggested_zones": suggested_zones,
+            "recommended_zone": "top" if top_brightness < bottom_brightness else "bottom"
+        },
+        "style_suggestions": {
+            "text_color": "#FFFFFF" if is_dark else "#000000",
+            "stroke_color": "#000000" if is_dark else "#FFFFFF",
+            "overlay_recommended": avg_brightness > 100 and avg_brightness < 200
+        }
+    }
+
+
+class ImageWorker:
+    """Shared, bounded process pool"""
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn, not fork: forking a process that runs an event loop and
+            # thread pools can copy held locks into the child
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_WORKER_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(self, fn: Callable, *args):
+        """Run fn(*args) in the pool; raises ImageWorkerBusy if the queue is full"""
+        if self._pending >= settings.IMAGE_WORKER_MAX_PENDING:
+            raise ImageWorkerBusy(f"Image worker busy ({self._pending} jobs pending)")
+
+        self._pending += 1
+        executor = self._executor()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            # A child died (e.g. killed for memory on a huge image); start a fresh pool.
+            # Other jobs from the dead pool fail here too - only the first resets it,
+            # so a pool another request has already started is left alone
+            if self._pool is executor:
+                logger.error("Image worker process died; restarting the pool")
+                self.shutdown()
+            raise
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+image_worker = ImageWorker()
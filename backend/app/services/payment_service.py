@@ -1,8 +1,9 @@
-import razorpay
 import hmac
 import hashlib
+import asyncio
 from typing import Dict, Optional, Tuple
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.models import Wallet, Transaction, PayoutRequest, TransactionType, TransactionStatus, PayoutStatus
 from datetime import datetime
 import logging
@@ -14,6 +15,8 @@ class PaymentService:
     """Service for handling Razorpay payment operations"""
 
     def __init__(self, key_id: str, key_secret: str, webhook_secret: str):
+        # Imported here so the SDK (and requests) only load when payments are used
+        import razorpay
         self.client = razorpay.Client(auth=(key_id, key_secret))
         self.client.set_app_details({"title": "CreatorX", "version": "1.0.0"})
         self.webhook_secret = webhook_secret
@@ -38,6 +41,7 @@ class PaymentService:
     def verify_payment_signature(self, order_id: str, payment_id: str,
                                 signature: str) -> bool:
         """Verify Razorpay payment signature"""
+        from razorpay.errors import SignatureVerificationError
         try:
             params_dict = {
                 'razorpay_order_id': order_id,
@@ -46,7 +50,7 @@ class PaymentService:
             }
             self.client.utility.verify_payment_signature(params_dict)
             return True
-        except razorpay.errors.SignatureVerificationError:
+        except SignatureVerificationError:
             logger.warning(f"Invalid payment signature for order {order_id}")
             return False
 
@@ -110,29 +114,36 @@ class PaymentService:
 
 
 class WalletService:
-    """Service for wallet operations"""
+    """Service for wallet operations
 
-    def __init__(self, db: Session, payment_service: PaymentService):
+    Database access goes through an AsyncSession; the Razorpay SDK is
+    synchronous, so its HTTP calls run in a worker thread to keep the
+    event loop free.
+    """
+
+    def __init__(self, db: AsyncSession, payment_service: PaymentService):
         self.db = db
         self.payment_service = payment_service
 
-    def get_or_create_wallet(self, user_id: int) -> Wallet:
+    async def get_or_create_wallet(self, user_id: int) -> Wallet:
         """Get or create wallet for user"""
-        wallet = self.db.query(Wallet).filter(Wallet.user_id == user_id).first()
+        result = await self.db.execute(select(Wallet).where(Wallet.user_id == user_id))
+        wallet = result.scalars().first()
         if not wallet:
             wallet = Wallet(user_id=user_id, balance=0.0, currency="INR")
             self.db.add(wallet)
-            self.db.commit()
-            self.db.refresh(wallet)
+            await self.db.commit()
+            await self.db.refresh(wallet)
         return wallet
 
-    def create_topup_order(self, user_id: int, amount: float) -> Tuple[Dict, Transaction]:
+    async def create_topup_order(self, user_id: int, amount: float) -> Tuple[Dict, Transaction]:
         """Create a topup order and pending transaction"""
-        wallet = self.get_or_create_wallet(user_id)
+        wallet = await self.get_or_create_wallet(user_id)
 
         # Create Razorpay order
         receipt = f"topup_{user_id}_{datetime.now().timestamp()}"
-        order = self.payment_service.create_order(
+        order = await asyncio.to_thread(
+            self.payment_service.create_order,
             amount=amount,
             receipt=receipt,
             notes={"user_id": user_id, "type": "wallet_topup"}
@@ -150,22 +161,23 @@ class WalletService:
             meta_data={"receipt": receipt}
         )
         self.db.add(transaction)
-        self.db.commit()
-        self.db.refresh(transaction)
+        await self.db.commit()
+        await self.db.refresh(transaction)
 
         return order, transaction
 
-    def verify_and_complete_payment(self, order_id: str, payment_id: str,
-                                   signature: str) -> Transaction:
+    async def verify_and_complete_payment(self, order_id: str, payment_id: str,
+                                          signature: str) -> Transaction:
         """Verify payment and update wallet balance"""
         # Verify signature
         if not self.payment_service.verify_payment_signature(order_id, payment_id, signature):
             raise ValueError("Invalid payment signature")
 
         # Find transaction
-        transaction = self.db.query(Transaction).filter(
+        result = await self.db.execute(select(Transaction).where(
             Transaction.razorpay_order_id == order_id
-        ).first()
+        ))
+        transaction = result.scalars().first()
 
         if not transaction:
             raise ValueError("Transaction not found")
@@ -175,11 +187,11 @@ class WalletService:
             return transaction
 
         # Fetch payment details from Razorpay for verification
-        payment = self.payment_service.fetch_payment(payment_id)
+        payment = await asyncio.to_thread(self.payment_service.fetch_payment, payment_id)
 
         if payment['status'] != 'captured' and payment['status'] != 'authorized':
             transaction.status = TransactionStatus.FAILED
-            self.db.commit()
+            await self.db.commit()
             raise ValueError(f"Payment not successful. Status: {payment['status']}")
 
         # Update transaction
@@ -189,33 +201,34 @@ class WalletService:
         transaction.completed_at = datetime.now()
 
         # Update wallet balance (with optimistic locking)
-        wallet = transaction.wallet
+        # Loaded explicitly - async sessions can't lazy-load transaction.wallet
+        wallet = await self.db.get(Wallet, transaction.wallet_id)
         wallet.balance += transaction.amount
         wallet.version += 1
 
-        self.db.commit()
-        self.db.refresh(transaction)
+        await self.db.commit()
+        await self.db.refresh(transaction)
 
         logger.info(f"Payment completed: Transaction {transaction.id}, Amount: {transaction.amount}")
         return transaction
 
-    def get_balance(self, user_id: int) -> float:
+    async def get_balance(self, user_id: int) -> float:
         """Get user wallet balance"""
-        wallet = self.get_or_create_wallet(user_id)
+        wallet = await self.get_or_create_wallet(user_id)
         return wallet.balance
 
-    def get_transactions(self, user_id: int, limit: int = 50, offset: int = 0):
+    async def get_transactions(self, user_id: int, limit: int = 50, offset: int = 0):
         """Get user transaction history"""
-        wallet = self.get_or_create_wallet(user_id)
-        transactions = self.db.query(Transaction).filter(
+        wallet = await self.get_or_create_wallet(user_id)
+        result = await self.db.execute(select(Transaction).where(
             Transaction.wallet_id == wallet.id
-        ).order_by(Transaction.created_at.desc()).offset(offset).limit(limit).all()
-        return transactions
+        ).order_by(Transaction.created_at.desc()).offset(offset).limit(limit))
+        return result.scalars().all()
 
-    def create_payout_request(self, user_id: int, amount: float,
-                             bank_details: Dict) -> PayoutRequest:
+    async def create_payout_request(self, user_id: int, amount: float,
+                                    bank_details: Dict) -> PayoutRequest:
         """Create a payout request"""
-        wallet = self.get_or_create_wallet(user_id)
+        wallet = await self.get_or_create_wallet(user_id)
 
         # Check balance
         if wallet.balance < amount:
@@ -239,16 +252,17 @@ class WalletService:
             status=PayoutStatus.PENDING
         )
         self.db.add(payout_request)
-        self.db.commit()
-        self.db.refresh(payout_request)
+        await self.db.commit()
+        await self.db.refresh(payout_request)
 
         return payout_request
 
-    def process_payout(self, payout_request_id: int) -> Transaction:
+    async def process_payout(self, payout_request_id: int) -> Transaction:
         """Process payout request (admin action)"""
-        payout_req = self.db.query(PayoutRequest).filter(
+        result = await self.db.execute(select(PayoutRequest).where(
             PayoutRequest.id == payout_request_id
-        ).first()
+        ))
+        payout_req = result.scalars().first()
 
         if not payout_req:
             raise ValueError("Payout request not found")
@@ -256,18 +270,19 @@ class WalletService:
         if payout_req.status != PayoutStatus.PENDING:
             raise ValueError(f"Payout request already {payout_req.status}")
 
-        wallet = self.get_or_create_wallet(payout_req.user_id)
+        wallet = await self.get_or_create_wallet(payout_req.user_id)
 
         # Check balance again
         if wallet.balance < payout_req.amount:
             payout_req.status = PayoutStatus.FAILED
             payout_req.admin_notes = "Insufficient balance"
-            self.db.commit()
+            await self.db.commit()
             raise ValueError("Insufficient balance")
 
         try:
             # Create payout with Razorpay
-            payout = self.payment_service.create_payout(
+            payout = await asyncio.to_thread(
+                self.payment_service.create_payout,
                 account_number=payout_req.bank_account_number,
                 ifsc=payout_req.bank_ifsc_code,
                 amount=payout_req.net_amount,
@@ -297,13 +312,13 @@ class WalletService:
             wallet.version += 1
 
             self.db.add(transaction)
-            self.db.commit()
-            self.db.refresh(transaction)
+            await self.db.commit()
+            await self.db.refresh(transaction)
 
             return transaction
 
         except Exception as e:
             payout_req.status = PayoutStatus.FAILED
             payout_req.admin_notes = str(e)
-            self.db.commit()
+            await self.db.commit()
             raise
@@ -0,0 +1,125 @@
+"""
+Long-lived provider clients and model handles
+
+Builds each SDK handle once per process and shares it: Vertex GenerativeModel
+and ImageGenerationModel instances, the google-genai Client, and one pooled
+httpx.AsyncClient (keep-alive, bounded connections) for image downloads.
+Blocking SDK calls run on a dedicated thread pool (run_sync), so a burst of
+slow Imagen round-trips cannot starve asyncio.to_thread's default executor,
+which file and DB helpers share.
+warm_up() runs from the app lifespan so the first user request doesn't pay
+for construction, model metadata lookups or TLS handshakes.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderClients:
+    """Process-wide registry of reusable provider clients"""
+
+    def __init__(self):
+        self._http: Optional[httpx.AsyncClient] = None
+        self._genai_client = None
+        self._generative_models: Dict[str, Any] = {}
+        self._image_models: Dict[str, Any] = {}
+        # Image models are also loaded from worker threads (run_sync)
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def run_sync(self, fn: Callable, *args, **kwargs):
+        """Run a blocking SDK call (or CPU-heavy image step) on the provider thread pool"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.PROVIDER_SDK_THREADS,
+                thread_name_prefix="provider-sdk"
+            )
+        # Same context propagation as asyncio.to_thread
+        call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    def http(self) -> httpx.AsyncClient:
+        """Shared HTTP client with keep-alive and a bounded connection pool"""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                timeout=httpx.Timeout(30.0, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+                ),
+                follow_redirects=True
+            )
+        return self._http
+
+    def generative_model(self, name: str):
+        """Cached Vertex GenerativeModel (generation config is passed per call)"""
+        model = self._generative_models.get(name)
+        if model is None:
+            from vertexai.preview.generative_models import GenerativeModel
+            model = self._generative_models.setdefault(name, GenerativeModel(name))
+        return model
+
+    def image_model(self, name: str):
+        """Cached Vertex ImageGenerationModel; from_pretrained does a metadata round-trip"""
+        model = self._image_models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._image_models.get(name)
+                if model is None:
+                    from vertexai.preview.vision_models import ImageGenerationModel
+                    model = ImageGenerationModel.from_pretrained(name)
+                    self._image_models[name] = model
+        return model
+
+    def genai_client(self):
+        """Cached google-genai client bound to the Vertex project"""
+        if self._genai_client is None:
+            from google import genai
+            self._genai_client = genai.Client(
+                vertexai=True,
+                project=settings.GOOGLE_VERTEX_PROJECT_ID,
+                location=settings.GOOGLE_VERTEX_LOCATION
+            )
+        return self._genai_client
+
+    async def warm_up(self, vertex_enabled: bool, image_models: Iterable[str] = ()):
+        """Build clients ahead of traffic; failures are logged, never raised"""
+        start = time.perf_counter()
+        self.http()
+
+        if vertex_enabled:
+            from app.services.ai_service import PROVIDER_MODELS
+            steps = [("GenerativeModel", lambda: self.generative_model(PROVIDER_MODELS['vertex']))]
+            steps += [(f"ImageGenerationModel {name}", lambda name=name: self.image_model(name)) for name in image_models]
+            for label, build in steps:
+                try:
+                    await self.run_sync(build)
+                except Exception as e:
+                    logger.warning(f"Warm-up of {label} failed: {e}")
+
+        logger.info(f"Provider clients warmed up in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        if self._executor is not None:
+            # In-flight SDK calls can't be interrupted; don't hold shutdown for them
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+provider_clients = ProviderClients()
@@ -0,0 +1,154 @@
+"""
+Client-side admission control for AI providers
+
+Each provider (and each image model) gets a concurrency semaphore plus
+token buckets for requests/min and tokens/min, sized from settings. Calls
+wait here instead of being sent only to come back as 429s, and the time
+spent waiting is recorded so saturation is visible.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(*texts: Optional[str]) -> int:
+    """Rough token count (~4 characters per token for English)"""
+    return sum(len(text) for text in texts if text) // 4
+
+
+class TokenBucket:
+    """Refills continuously at rate_per_minute, holding at most capacity tokens"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        # FIFO lock: callers are served in arrival order while one waits for refill
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Take amount tokens, sleeping until they are available. Returns seconds waited."""
+        # A single request larger than the bucket would otherwise never fit
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+class ProviderLimiter:
+    """Concurrency + RPM + TPM limits for one provider or image model"""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 0,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0
+    ):
+        # 0 disables the corresponding limit
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency > 0 else None
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.waiting = 0
+        self.in_flight = 0
+        self.admitted = 0
+        self._waits = deque(maxlen=500)
+
+    @asynccontextmanager
+    async def admit(self, tokens: int = 0) -> AsyncIterator[float]:
+        """Hold a provider slot for the duration of the block; yields the queue wait in seconds"""
+        start = time.monotonic()
+        holds_slot = False
+        self.waiting += 1
+        try:
+            if self._requests:
+                await self._requests.acquire(1)
+            if self._tokens and tokens:
+                await self._tokens.acquire(tokens)
+            if self._semaphore:
+                await self._semaphore.acquire()
+                holds_slot = True
+        finally:
+            self.waiting -= 1
+
+        wait = time.monotonic() - start
+        self._waits.append(wait)
+        self.admitted += 1
+        self.in_flight += 1
+        if wait >= 1.0:
+            logger.info(f"[Admission] {self.name}: queued {wait:.1f}s ({self.in_flight} in flight, {self.waiting} waiting)")
+        try:
+            yield wait
+        finally:
+            self.in_flight -= 1
+            if holds_slot:
+                self._semaphore.release()
+
+    def get_stats(self) -> Dict:
+        waits = sorted(self._waits)
+        p95 = waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0
+        return {
+            "max_concurrency": self.max_concurrency or None,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "queue_wait_avg_ms": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+            "queue_wait_p95_ms": round(p95 * 1000, 1),
+            "queue_wait_max_ms": round(waits[-1] * 1000, 1) if waits else 0.0,
+        }
+
+
+class AdmissionControl:
+    """Registry of limiters keyed by provider name or 'image:<model>'"""
+
+    def __init__(self):
+        self._limiters: Dict[str, ProviderLimiter] = {}
+
+    def configure(self, name: str, max_concurrency: int = 0,
+                  requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self._limiters[name] = ProviderLimiter(name, max_concurrency, requests_per_minute, tokens_per_minute)
+
+    def provider(self, name: str) -> ProviderLimiter:
+        """Limiter for a text provider; unknown names get an unlimited one"""
+        if name not in self._limiters:
+            self.configure(name)
+        return self._limiters[name]
+
+    def image_model(self, model: str) -> ProviderLimiter:
+        """Limiter for one image model, created on first use from the IMAGE_* settings"""
+        name = f"image:{model}"
+        if name not in self._limiters:
+            self.configure(name, settings.IMAGE_MAX_CONCURRENCY, settings.IMAGE_RPM)
+        return self._limiters[name]
+
+    def get_stats(self) -> Dict[str, Dict]:
+        return {name: limiter.get_stats() for name, limiter in self._limiters.items()}
+
+
+admission_control = AdmissionControl()
+admission_control.configure("openai", settings.OPENAI_MAX_CONCURRENCY, settings.OPENAI_RPM, settings.OPENAI_TPM)
+admission_control.configure("groq", settings.GROQ_MAX_CONCURRENCY, settings.GROQ_RPM, settings.GROQ_TPM)
+admission_control.configure("vertex", settings.VERTEX_MAX_CONCURRENCY, settings.VERTEX_RPM, settings.VERTEX_TPM)
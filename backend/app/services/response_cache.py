@@ -0,0 +1,163 @@
+"""
+Response cache for AI text generation
+
+Two tiers: an in-process LRU with per-entry TTL, optionally backed by Redis
+(settings.REDIS_URL) so identical requests are shared across workers and
+restarts. Concurrent misses on the same key are collapsed onto a single
+provider call (stampede protection).
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.single_flight import SingleFlight, fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Bounded in-process cache; entries expire after their own TTL"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str, ttl: int):
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class ResponseCache:
+    """LRU tier + optional Redis tier with per-key in-flight deduplication"""
+
+    # After a Redis error, skip the tier for this long instead of paying a
+    # connection timeout on every request
+    REDIS_RETRY_AFTER = 30.0
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        redis_url: Optional[str] = None,
+        key_prefix: str = "creatorx:ai:"
+    ):
+        self.local = LRUCache(max_entries)
+        self.redis_url = redis_url
+        self.key_prefix = key_prefix
+        self._redis = None
+        self._redis_down_until = 0.0
+        self._flight = SingleFlight("response_cache")
+        self.stats = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "redis_errors": 0,
+        }
+
+    @staticmethod
+    def make_key(**parts) -> str:
+        """Stable digest of everything that determines the provider output"""
+        return fingerprint(parts)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        ttl: int,
+        compute: Callable[[], Awaitable[str]]
+    ) -> str:
+        """Return the cached value for key, or run compute() once and cache it.
+
+        Callers that arrive while the same key is being computed wait for that
+        result instead of issuing their own provider call.
+        """
+        value = self.local.get(key)
+        if value is not None:
+            self.stats["local_hits"] += 1
+            return value
+
+        return await self._flight.do(key, lambda: self._load(key, ttl, compute))
+
+    async def _load(self, key: str, ttl: int, compute: Callable[[], Awaitable[str]]) -> str:
+        value = await self._redis_get(key)
+        if value is not None:
+            self.stats["redis_hits"] += 1
+        else:
+            self.stats["misses"] += 1
+            value = await compute()
+            await self._redis_set(key, value, ttl)
+        self.local.set(key, value, ttl)
+        return value
+
+    def get_stats(self) -> Dict:
+        lookups = self.stats["local_hits"] + self.stats["redis_hits"] + self.stats["misses"]
+        hits = lookups - self.stats["misses"]
+        return {
+            **self.stats,
+            "coalesced": self._flight.stats["coalesced"],
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "local_entries": len(self.local),
+            "redis_enabled": bool(self.redis_url),
+        }
+
+    async def _get_redis(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            import redis.asyncio as aioredis
+            self._redis = aioredis.from_url(
+                self.redis_url,
+                decode_responses=True,
+                socket_connect_timeout=0.5,
+                socket_timeout=0.5
+            )
+        return self._redis
+
+    def _redis_failed(self, error: Exception):
+        self.stats["redis_errors"] += 1
+        self._redis_down_until = time.monotonic() + self.REDIS_RETRY_AFTER
+        logger.warning(f"Response cache: Redis unavailable ({error}), using local tier only for {self.REDIS_RETRY_AFTER:.0f}s")
+
+    async def _redis_get(self, key: str) -> Optional[str]:
+        try:
+            client = await self._get_redis()
+            if client is None:
+                return None
+            return await client.get(self.key_prefix + key)
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+
+    async def _redis_set(self, key: str, value: str, ttl: int):
+        try:
+            client = await self._get_redis()
+            if client is not None:
+                await client.set(self.key_prefix + key, value, ex=ttl)
+        except Exception as e:
+            self._redis_failed(e)
+
+
+response_cache = ResponseCache(
+    max_entries=settings.AI_CACHE_MAX_ENTRIES,
+    redis_url=settings.REDIS_URL if settings.AI_CACHE_REDIS_ENABLED else None
+)
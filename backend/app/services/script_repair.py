@@ -0,0 +1,254 @@
+"""
+Targeted repair of generated scripts that fail validation
+
+Each validation issue code maps to the smallest fix that resolves it:
+  - missing HOOK / OUTRO markers and missing timestamps are fixed locally
+  - missing key points get one short LLM call per point whose paragraph is
+    spliced in before the outro
+  - a script that is too short gets one LLM call for just the missing words
+  - a missing outro with no call-to-action gets one LLM call for the outro only
+Only an outline-like (too sparse) script still needs a full regeneration.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Dict, List, Tuple
+
+from app.schemas.schemas import ScriptGenerationRequest
+from app.services.ai_service import ai_service
+from app.services.rate_limiter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Issue codes produced by CreatorToolsService.find_script_issues
+MISSING_KEY_POINTS = "missing_key_points"
+TOO_SHORT = "too_short"
+TOO_LONG = "too_long"
+MISSING_HOOK = "missing_hook"
+MISSING_OUTRO = "missing_outro"
+MISSING_TIMESTAMPS = "missing_timestamps"
+TOO_SPARSE = "too_sparse"
+
+# Issues a targeted repair can't fix; the caller falls back to full regeneration
+UNREPAIRABLE = {TOO_SPARSE}
+# Accepted as-is: trimming spoken content automatically does more harm than good
+IGNORED = {TOO_LONG}
+
+# Bracketed section headers, as opposed to production notes like [B-ROLL: ...]
+SECTION_HEADER = re.compile(r'^\s*\[(?!B-ROLL|TEXT ON SCREEN|PAUSE|GRAPHICS|SFX|MUSIC|CUT|TIMING)([A-Z][^\]]*)\]', re.MULTILINE)
+OUTRO_HEADER = re.compile(r'^\s*\[(OUTRO|CALL|CTA|CONCLUSION)', re.MULTILINE | re.IGNORECASE)
+TIMESTAMP = re.compile(r'\d+:\d{2}')
+CTA_WORDS = re.compile(r'\b(subscribe|comment|like this video|hit the bell|follow|link in the description|see you)\b', re.IGNORECASE)
+
+# Placeholder range; post_process_script recomputes every range from word counts
+PLACEHOLDER_RANGE = "0:00-0:00"
+
+
+class ScriptRepairEngine:
+    """Applies the minimal fix for each validation issue of a generated script"""
+
+    def __init__(self, max_point_words: int = 140, max_extension_words: int = 900):
+        self.max_point_words = max_point_words
+        self.max_extension_words = max_extension_words
+
+    @staticmethod
+    def needs_full_regeneration(issues: List[Dict]) -> bool:
+        return any(issue["code"] in UNREPAIRABLE for issue in issues)
+
+    async def repair(
+        self,
+        script: str,
+        issues: List[Dict],
+        request: ScriptGenerationRequest,
+        system_prompt: str,
+        timing: Dict[str, int]
+    ) -> Tuple[str, Dict]:
+        """
+        Fix the given issues in place of a full regeneration.
+        Returns (script, stats) where stats counts the LLM calls, estimated
+        tokens and local fixes that were applied.
+        """
+        stats = {"llm_calls": 0, "prompt_tokens": 0, "output_tokens": 0, "local_fixes": [], "llm_fixes": []}
+        start = time.monotonic()
+        by_code = {issue["code"]: issue for issue in issues}
+
+        # LLM-written inserts run concurrently; each is a few hundred tokens
+        inserts = []
+        if MISSING_KEY_POINTS in by_code:
+            for point in by_code[MISSING_KEY_POINTS]["key_points"]:
+                inserts.append(("key_point", self._write_key_point(script, point, request, system_prompt, stats)))
+        if TOO_SHORT in by_code:
+            missing_words = min(by_code[TOO_SHORT]["missing_words"], self.max_extension_words)
+            inserts.append(("extension", self._write_extension(script, missing_words, request, system_prompt, stats)))
+        outro_needed = MISSING_OUTRO in by_code and not self._has_cta(script)
+        if outro_needed:
+            inserts.append(("outro", self._write_outro(script, request, system_prompt, timing, stats)))
+
+        results = await asyncio.gather(*(coro for _, coro in inserts), return_exceptions=True)
+        body_inserts, outro = [], None
+        for (kind, _), result in zip(inserts, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Script repair ({kind}) failed: {result}")
+                continue
+            stats["llm_fixes"].append(kind)
+            if kind == "outro":
+                outro = result
+            else:
+                body_inserts.append(result)
+
+        if body_inserts:
+            script = self._insert_before_outro(script, "\n\n".join(body_inserts))
+        if outro:
+            script = f"{script.rstrip()}\n\n{outro.strip()}"
+
+        # Local fixes last so they also cover the inserted text
+        if MISSING_HOOK in by_code:
+            script = self._add_hook_marker(script, timing)
+            stats["local_fixes"].append("hook_marker")
+        if MISSING_OUTRO in by_code and not outro_needed:
+            script = self._add_outro_marker(script)
+            stats["local_fixes"].append("outro_marker")
+        if MISSING_TIMESTAMPS in by_code or not TIMESTAMP.search(script):
+            script = self._add_timestamps(script)
+            stats["local_fixes"].append("timestamps")
+
+        stats["seconds"] = round(time.monotonic() - start, 2)
+        logger.info(
+            f"Script repaired in {stats['seconds']}s: {stats['llm_calls']} LLM calls, "
+            f"local fixes {stats['local_fixes']}, LLM fixes {stats['llm_fixes']}"
+        )
+        return script, stats
+
+    async def write_outro(self, script: str, request: ScriptGenerationRequest, system_prompt: str,
+                          timing: Dict[str, int]) -> str:
+        """Just the outro section for a script that has none (e.g. a stream cut off for length)"""
+        stats = {"llm_calls": 0, "prompt_tokens": 0, "output_tokens": 0}
+        return await self._write_outro(script, request, system_prompt, timing, stats)
+
+    async def _complete(self, prompt: str, request: ScriptGenerationRequest, system_prompt: str,
+                        max_tokens: int, stats: Dict) -> str:
+        stats["llm_calls"] += 1
+        stats["prompt_tokens"] += estimate_tokens(system_prompt, prompt)
+        text = await ai_service.generate(
+            prompt=prompt,
+            model=request.ai_model,
+            temperature=0.7,
+            max_tokens=max_tokens,
+            system_prompt=system_prompt,
+            use_cache=False
+        )
+        stats["output_tokens"] += estimate_tokens(text)
+        return self._strip_wrapping(text)
+
+    async def _write_key_point(self, script: str, point: str, request: ScriptGenerationRequest,
+                               system_prompt: str, stats: Dict) -> str:
+        prompt = f"""You are patching an existing video script about "{request.topic}" ({request.tone} tone).
+It never covers this required key point: "{point}"
+
+Write ONLY the spoken passage that covers it: {self.max_point_words // 2}-{self.max_point_words} words,
+word-for-word narration in the same voice, mentioning "{point}" explicitly.
+Start with a section header line in the form [{point.upper()[:40]}]. No preamble, no outro.
+
+The passage will be inserted right after this part of the script:
+{self._context_before_outro(script)}
+"""
+        return await self._complete(prompt, request, system_prompt, self.max_point_words * 2, stats)
+
+    async def _write_extension(self, script: str, missing_words: int, request: ScriptGenerationRequest,
+                               system_prompt: str, stats: Dict) -> str:
+        headers = ", ".join(match.group(1).split(" - ")[0].strip() for match in SECTION_HEADER.finditer(script)) or "none"
+        prompt = f"""You are extending an existing video script about "{request.topic}" ({request.tone} tone)
+that is about {missing_words} words too short for its {request.duration_minutes}-minute runtime.
+
+Write ONLY one NEW main-content section of about {missing_words} words: word-for-word narration
+in the same voice that adds depth (examples, specifics, a short story) without repeating the
+sections already covered: {headers}.
+Start with a section header line such as [DEEP DIVE]. No preamble, no hook, no outro.
+
+It will be inserted right after this part of the script:
+{self._context_before_outro(script)}
+"""
+        return await self._complete(prompt, request, system_prompt, int(missing_words * 2) + 200, stats)
+
+    async def _write_outro(self, script: str, request: ScriptGenerationRequest, system_prompt: str,
+                           timing: Dict[str, int], stats: Dict) -> str:
+        words = max(40, int(timing["outro"] * 2.5))
+        prompt = f"""This video script about "{request.topic}" ({request.tone} tone) ends without an outro.
+
+Write ONLY the closing section: about {words} words of word-for-word narration that briefly
+recaps the main takeaway and ends with a clear call-to-action.
+Start with the header line [OUTRO/CALL-TO-ACTION]. No preamble.
+
+The script currently ends with:
+{script[-1200:]}
+"""
+        return await self._complete(prompt, request, system_prompt, words * 2 + 100, stats)
+
+    @staticmethod
+    def _strip_wrapping(text: str) -> str:
+        """Drop code fences / quotes some models wrap short completions in"""
+        text = text.strip()
+        text = re.sub(r'^```[a-z]*\n|\n?```$', '', text)
+        return text.strip().strip('"').strip()
+
+    @staticmethod
+    def _has_cta(script: str) -> bool:
+        return bool(CTA_WORDS.search(script[-1500:]))
+
+    @staticmethod
+    def _context_before_outro(script: str, chars: int = 1200) -> str:
+        match = OUTRO_HEADER.search(script)
+        body = script[:match.start()] if match else script
+        return body[-chars:].strip()
+
+    @staticmethod
+    def _insert_before_outro(script: str, text: str) -> str:
+        match = OUTRO_HEADER.search(script)
+        if not match:
+            return f"{script.rstrip()}\n\n{text.strip()}"
+        return f"{script[:match.start()].rstrip()}\n\n{text.strip()}\n\n{script[match.start():].lstrip()}"
+
+    @staticmethod
+    def _paragraphs(script: str) -> List[str]:
+        return [p for p in re.split(r'\n\s*\n', script.strip()) if p.strip()]
+
+    def _add_hook_marker(self, script: str, timing: Dict[str, int]) -> str:
+        """Label the opening paragraph as the hook"""
+        paragraphs = self._paragraphs(script)
+        # Skip a leading title line ("# My Video" / "Title: ...")
+        index = 1 if len(paragraphs) > 1 and len(paragraphs[0].split()) <= 12 and not paragraphs[0].startswith('[') else 0
+        hook_end = timing["hook"]
+        header = f"[HOOK - 0:00-{hook_end // 60}:{hook_end % 60:02d}]"
+        paragraphs.insert(index, header)
+        return "\n\n".join(paragraphs)
+
+    def _add_outro_marker(self, script: str) -> str:
+        """Label the closing call-to-action paragraph(s) as the outro"""
+        paragraphs = self._paragraphs(script)
+        index = len(paragraphs) - 1
+        # Include earlier paragraphs of the same closing CTA block
+        while index > 0 and CTA_WORDS.search(paragraphs[index - 1]) and not paragraphs[index - 1].startswith('['):
+            index -= 1
+        paragraphs.insert(index, f"[OUTRO/CALL-TO-ACTION - {PLACEHOLDER_RANGE}]")
+        return "\n\n".join(paragraphs)
+
+    @staticmethod
+    def _add_timestamps(script: str) -> str:
+        """Give every section header a time range for post_process_script to recompute"""
+        def add_range(match: re.Match) -> str:
+            header = match.group(1)
+            if TIMESTAMP.search(header):
+                return match.group(0)
+            name = header.split(" - ")[0].rstrip(" -")
+            return match.group(0).replace(f"[{header}]", f"[{name} - {PLACEHOLDER_RANGE}]")
+
+        fixed = SECTION_HEADER.sub(add_range, script)
+        if not TIMESTAMP.search(fixed):
+            # No section headers at all - time the whole script as one section
+            fixed = f"[CONTENT - {PLACEHOLDER_RANGE}]\n\n{fixed.lstrip()}"
+        return fixed
+
+
+script_repair = ScriptRepairEngine()
@@ -0,0 +1,225 @@
+"""
+Section-parallel generation for long-form scripts
+
+A single completion for a 15-60 minute script is thousands of tokens produced
+one after another. Instead, a short outline call plans the hook, N main
+sections and the outro; every part then gets a word budget derived from
+calculate_dynamic_timing and is written concurrently (bounded by
+SCRIPT_SECTION_CONCURRENCY) with the full outline as continuity context.
+Time-to-complete follows the longest section rather than the whole script.
+"""
+
+import asyncio
+import logging
+import math
+from typing import Dict, List
+
+from app.core.config import settings
+from app.schemas.schemas import ScriptGenerationRequest
+from app.services.ai_service import ai_service, estimate_script_tokens, SPEAKING_WORDS_PER_MINUTE
+
+logger = logging.getLogger(__name__)
+
+WORDS_PER_SECOND = SPEAKING_WORDS_PER_MINUTE / 60
+
+OUTLINE_SCHEMA = {
+    "type": "object",
+    "required": ["sections"],
+    "properties": {"sections": {"type": "array"}}
+}
+
+
+def _clock(seconds: float) -> str:
+    minutes, secs = divmod(int(seconds), 60)
+    return f"{minutes}:{secs:02d}"
+
+
+class SectionedScriptGenerator:
+    """Outline first, then hook / sections / outro written in parallel"""
+
+    @staticmethod
+    def should_use(request: ScriptGenerationRequest) -> bool:
+        """Explicit request flag wins; otherwise on for long videos (never for regeneration)"""
+        if request.regenerate_feedback:
+            return False
+        if request.parallel_sections is not None:
+            return request.parallel_sections
+        return request.duration_minutes >= settings.SCRIPT_PARALLEL_MIN_MINUTES
+
+    @staticmethod
+    def section_count(content_seconds: int) -> int:
+        minutes = content_seconds / 60
+        return max(3, min(12, math.ceil(minutes / settings.SCRIPT_SECTION_MINUTES)))
+
+    async def generate(
+        self,
+        request: ScriptGenerationRequest,
+        system_prompt: str,
+        brief: str,
+        timing: Dict[str, int],
+        temperature: float,
+        use_cache: bool = True
+    ) -> str:
+        """Return the stitched script (raw; post-processing is left to the caller)"""
+        outline = await self._outline(request, system_prompt, brief, timing, use_cache)
+        parts = self._plan(outline, timing)
+        logger.info(
+            f"Sectioned script: {len(parts) - 2} sections + hook/outro, "
+            f"longest {max(part['words'] for part in parts)} words, "
+            f"concurrency {settings.SCRIPT_SECTION_CONCURRENCY}"
+        )
+
+        semaphore = asyncio.Semaphore(settings.SCRIPT_SECTION_CONCURRENCY)
+
+        async def write(index: int) -> str:
+            async with semaphore:
+                return await self._write_part(parts, index, request, system_prompt, brief, temperature, use_cache)
+
+        # The longest parts go first so they don't end up queued behind short ones
+        order = sorted(range(len(parts)), key=lambda i: parts[i]["words"], reverse=True)
+        tasks = {index: asyncio.ensure_future(write(index)) for index in order}
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+        return "\n\n".join(tasks[index].result().strip() for index in range(len(parts)))
+
+    async def _outline(
+        self,
+        request: ScriptGenerationRequest,
+        system_prompt: str,
+        brief: str,
+        timing: Dict[str, int],
+        use_cache: bool
+    ) -> Dict:
+        count = self.section_count(timing["content"])
+        key_points = request.key_points or []
+        prompt = f"""Plan a video script. Do NOT write the script itself - only its outline.
+
+{brief}
+
+Plan exactly {count} main content sections between the hook and the outro, following the flow
+structure above. Every mandatory key point must be assigned to exactly one section.
+
+Respond with JSON only:
+{{
+  "hook": "one sentence: the opening angle / curiosity gap",
+  "sections": [
+    {{"heading": "short section title", "summary": "1-2 sentences on what it covers", "key_points": ["..."]}}
+  ],
+  "outro": "one sentence: the recap and the specific call-to-action"
+}}"""
+
+        response = await ai_service.generate(
+            prompt=prompt,
+            model=request.ai_model,
+            temperature=0.5,
+            max_tokens=300 + 120 * count,
+            system_prompt=system_prompt,
+            response_format={"type": "json"},
+            use_cache=use_cache
+        )
+        outline = ai_service.parse_json_with_validation(response, schema=OUTLINE_SCHEMA)
+        if not isinstance(outline, dict):
+            raise ValueError("Outline response was not a JSON object")
+        sections = [s for s in outline.get("sections", []) if isinstance(s, dict) and s.get("heading")]
+        if not sections:
+            raise ValueError("Outline has no usable sections")
+        outline["sections"] = sections
+
+        # Any key point the outline forgot goes to the section with the fewest
+        assigned = {point.lower() for s in sections for point in s.get("key_points") or []}
+        for point in key_points:
+            if point.lower() not in assigned:
+                target = min(sections, key=lambda s: len(s.get("key_points") or []))
+                target["key_points"] = (target.get("key_points") or []) + [point]
+        return outline
+
+    def _plan(self, outline: Dict, timing: Dict[str, int]) -> List[Dict]:
+        """Hook, sections and outro with word budgets and time ranges"""
+        sections = outline["sections"]
+        section_seconds = timing["content"] / len(sections)
+
+        parts = [{"kind": "hook", "heading": "HOOK", "summary": outline.get("hook", ""), "seconds": timing["hook"]}]
+        for number, section in enumerate(sections, 1):
+            parts.append({
+                "kind": "section",
+                "heading": f"SECTION {number}: {section['heading'].upper()}",
+                "summary": section.get("summary", ""),
+                "key_points": section.get("key_points") or [],
+                "seconds": section_seconds
+            })
+        parts.append({"kind": "outro", "heading": "OUTRO/CALL-TO-ACTION", "summary": outline.get("outro", ""), "seconds": timing["outro"]})
+
+        start = 0.0
+        for part in parts:
+            part["words"] = max(40, int(part["seconds"] * WORDS_PER_SECOND))
+            part["header"] = f"[{part['heading']} - {_clock(start)}-{_clock(start + part['seconds'])}]"
+            start += part["seconds"]
+        return parts
+
+    async def _write_part(
+        self,
+        parts: List[Dict],
+        index: int,
+        request: ScriptGenerationRequest,
+        system_prompt: str,
+        brief: str,
+        temperature: float,
+        use_cache: bool
+    ) -> str:
+        part = parts[index]
+        plan = "\n".join(
+            f"{'>> ' if i == index else '   '}{p['header']} {p['summary']}" for i, p in enumerate(parts)
+        )
+
+        if part["kind"] == "hook":
+            role = "the HOOK: a powerful attention-grabbing opening followed by a brief intro that previews the value."
+        elif part["kind"] == "outro":
+            role = ("the CONCLUSION and OUTRO: recap the main takeaways of the sections above and end with a "
+                    "strong, specific call-to-action. Do not introduce new material.")
+        else:
+            previous, following = parts[index - 1], parts[index + 1]
+            role = (f"one MAIN CONTENT section. Open with a natural transition from \"{previous['heading']}\" "
+                    f"and end so it leads into \"{following['heading']}\". Do not greet the viewer, re-introduce "
+                    f"the topic, recap earlier sections or add a call-to-action.")
+            if part["key_points"]:
+                role += f"\nThis section MUST cover these key points explicitly: {', '.join(part['key_points'])}."
+
+        prompt = f"""You are writing part of a video script; other parts are written separately and
+joined in the order of the plan below, so stay strictly within your part.
+
+{brief}
+
+SCRIPT PLAN (your part is marked >>):
+{plan}
+
+Write {role}
+
+Requirements:
+- About {part['words']} words of WORD-FOR-WORD spoken narration (150 words/minute)
+- Start with exactly this header line: {part['header']}
+- Add [B-ROLL: ...] / [TEXT ON SCREEN: ...] notes where helpful
+- Short paragraphs (2-3 sentences) for teleprompter readability
+- Output only this part - no preamble or commentary"""
+
+        budget = estimate_script_tokens(part["words"] / SPEAKING_WORDS_PER_MINUTE, minimum=400)
+        text = await ai_service.generate(
+            prompt=prompt,
+            model=request.ai_model,
+            temperature=temperature,
+            max_tokens=budget,
+            system_prompt=system_prompt,
+            tool_type='script',
+            use_cache=use_cache,
+            output_budget=budget
+        )
+        text = text.strip()
+        if not text.startswith('['):
+            text = f"{part['header']}\n{text}"
+        return text
+
+
+script_sections = SectionedScriptGenerator()
@@ -0,0 +1,100 @@
+"""
+Single-flight request coalescing
+
+Concurrent calls with the same key share one underlying task instead of each
+running the expensive work. The shared task is only cancelled when every
+waiter has gone away, so one client disconnecting doesn't fail the others.
+A per-call timeout bounds how long each caller waits: a caller that times out
+just leaves, and the shared work keeps running for anyone still waiting.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(*parts: Any) -> str:
+    """Canonical digest of request data (dict key order doesn't matter)"""
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicate concurrent async calls by key"""
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._calls: Dict[str, _Call] = {}
+        self.stats = {"executions": 0, "coalesced": 0, "cancelled": 0, "timeouts": 0}
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        timeout: Optional[float] = None
+    ) -> Any:
+        """Run fn() once per key among concurrent callers and return its result.
+
+        Args:
+            key: Fingerprint identifying identical work
+            fn: Zero-arg coroutine factory; only the first caller's is used
+            timeout: Seconds this caller waits; others sharing the call keep waiting
+
+        Raises:
+            asyncio.TimeoutError: if this caller's timeout passed first
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = self._start(key, fn)
+        else:
+            self.stats["coalesced"] += 1
+            logger.info(f"[{self.name}] Joined in-flight call {key[:12]} ({call.waiters} waiting)")
+
+        call.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(call.task), timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            logger.warning(f"[{self.name}] Stopped waiting on {key[:12]} after {timeout}s ({call.waiters - 1} still waiting)")
+            raise asyncio.TimeoutError(f"{self.name} call timed out after {timeout}s")
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Last interested caller left - stop paying for the work
+                self.stats["cancelled"] += 1
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _start(self, key: str, fn: Callable[[], Awaitable[Any]]) -> _Call:
+        call = _Call(asyncio.ensure_future(fn()))
+        self._calls[key] = call
+        self.stats["executions"] += 1
+
+        def _done(task: asyncio.Task):
+            self._forget(key, call)
+            if not task.cancelled():
+                # Retrieve the exception so a failure nobody awaited isn't logged at GC
+                task.exception()
+
+        call.task.add_done_callback(_done)
+        return call
+
+    def _forget(self, key: str, call: _Call):
+        # New callers must not join a call that is finishing or being cancelled
+        if self._calls.get(key) is call:
+            del self._calls[key]
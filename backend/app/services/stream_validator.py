@@ -0,0 +1,176 @@
+"""
+Incremental validation of a script while it streams
+
+Mirrors the checks of CreatorToolsService.find_script_issues on the text
+received so far - word count against the duration budget, HOOK / OUTRO /
+timing markers and key-point coverage - in time linear in the streamed text.
+It also detects failures worth acting on before the completion is paid for:
+  - no HOOK marker at the start of the script
+  - outline-style output (mostly short lines) instead of a spoken script
+  - running far past the word budget without reaching the outro
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from app.schemas.schemas import ScriptGenerationRequest
+
+HOOK_MARKERS = ("[HOOK", "HOOK -", "HOOK:")
+OUTRO_MARKERS = ("[OUTRO", "[CALL", "[CTA", "OUTRO -")
+TIMING_MARKER = re.compile(r'\d+:\d+')
+# Longest marker, so one spanning two chunks is still seen
+MARKER_OVERLAP = 8
+
+# Early-abort reasons
+ABORT_NO_HOOK = "missing_hook"
+ABORT_OUTLINE = "outline"
+ABORT_TOO_LONG = "too_long"
+
+
+class IncrementalScriptValidator:
+    """Feed streamed deltas; read progress() and abort_reason as they change"""
+
+    def __init__(
+        self,
+        request: ScriptGenerationRequest,
+        timing: Dict[str, int],
+        outline_check_words: int = 200,
+        outline_short_line_ratio: float = 0.7,
+        too_long_ratio: float = 1.5
+    ):
+        self.expected_words = request.duration_minutes * 150
+        # The hook marker should open the script; allow a title / short preamble
+        self.hook_deadline_words = max(60, int(timing["hook"] * 2.5) // 2)
+        self.outline_check_words = outline_check_words
+        self.outline_short_line_ratio = outline_short_line_ratio
+        self.too_long_words = int(self.expected_words * too_long_ratio)
+
+        self.words = 0
+        self.has_hook = False
+        self.has_outro = False
+        self.has_timing = False
+        self.abort_reason: Optional[str] = None
+
+        self._text: List[str] = []
+        self._lower = ""  # lowercase text, only while key points remain uncovered
+        self._tail = ""  # last few characters, for markers split across chunks
+        self._in_word = False
+        self._line = ""
+        self._lines = 0  # completed non-empty, non-marker lines
+        self._short_lines = 0
+        self._substantial_lines = 0
+
+        # Same rule as find_script_issues: every word longer than 3 characters
+        # of a key point must appear somewhere in the script
+        self._point_words = {
+            point: {word for word in point.lower().split() if len(word) > 3}
+            for point in (request.key_points or [])
+        }
+        self._covered = {point for point, words in self._point_words.items() if not words}
+        self._scanned = 0
+
+    @property
+    def text(self) -> str:
+        return "".join(self._text)
+
+    def feed(self, delta: str) -> bool:
+        """Consume one chunk. Returns True if the validation state changed noticeably (an abort counts once)."""
+        if not delta:
+            return False
+        before = (self.has_hook, self.has_outro, self.has_timing, len(self._covered), self.words // 100, self.abort_reason)
+        self._text.append(delta)
+
+        # Word count across chunk boundaries: a chunk continuing a word isn't a new word
+        words = len(delta.split())
+        if words and self._in_word and not delta[0].isspace():
+            words -= 1
+        self.words += words
+        self._in_word = not delta[-1].isspace()
+
+        window = (self._tail + delta).upper()
+        if not self.has_hook:
+            self.has_hook = any(marker in window for marker in HOOK_MARKERS)
+        if not self.has_outro:
+            self.has_outro = any(marker in window for marker in OUTRO_MARKERS)
+        if not self.has_timing:
+            self.has_timing = bool(TIMING_MARKER.search(self._tail + delta))
+        self._tail = (self._tail + delta)[-MARKER_OVERLAP:]
+
+        self._track_lines(delta)
+        self._track_key_points(delta)
+        self._check_abort()
+
+        after = (self.has_hook, self.has_outro, self.has_timing, len(self._covered), self.words // 100, self.abort_reason)
+        return before != after
+
+    def _track_lines(self, delta: str):
+        *complete, self._line = (self._line + delta).split("\n")
+        for line in complete:
+            line = line.strip()
+            if not line or line.startswith("["):
+                continue
+            self._lines += 1
+            if len(line) > 50:
+                self._substantial_lines += 1
+            else:
+                self._short_lines += 1
+
+    def _track_key_points(self, delta: str):
+        if len(self._covered) == len(self._point_words):
+            return
+        self._lower += delta.lower()
+        longest = max(len(word) for words in self._point_words.values() for word in words)
+        # Only re-scan the new text (plus enough overlap for a word split across chunks)
+        start = max(0, self._scanned - longest)
+        for point, words in self._point_words.items():
+            if point in self._covered:
+                continue
+            remaining = {word for word in words if self._lower.find(word, start) == -1}
+            # Words found earlier are dropped from the set as they're seen
+            self._point_words[point] = remaining
+            if not remaining:
+                self._covered.add(point)
+        self._scanned = len(self._lower)
+        if len(self._covered) == len(self._point_words):
+            self._lower = ""
+
+    def _check_abort(self):
+        if self.abort_reason:
+            return
+        if not self.has_hook and self.words >= self.hook_deadline_words:
+            self.abort_reason = ABORT_NO_HOOK
+        elif (
+            self.words >= self.outline_check_words
+            and self._lines >= 8
+            and self._short_lines / self._lines >= self.outline_short_line_ratio
+        ):
+            self.abort_reason = ABORT_OUTLINE
+        elif not self.has_outro and self.words >= self.too_long_words:
+            self.abort_reason = ABORT_TOO_LONG
+
+    def progress(self) -> Dict:
+        """Validation snapshot for the SSE client"""
+        return {
+            "words": self.words,
+            "expected_words": self.expected_words,
+            "progress": round(min(1.0, self.words / self.expected_words), 3) if self.expected_words else 1.0,
+            "has_hook": self.has_hook,
+            "has_outro": self.has_outro,
+            "has_timing": self.has_timing,
+            "key_points_covered": sorted(self._covered),
+            "key_points_missing": sorted(set(self._point_words) - self._covered),
+            "abort_reason": self.abort_reason
+        }
+
+    @staticmethod
+    def steering_note(reason: str, expected_words: int) -> str:
+        """Correction prepended to the prompt of the re-steered attempt"""
+        if reason == ABORT_NO_HOOK:
+            return ("IMPORTANT: your previous attempt was stopped because it did not open with the hook. "
+                    "Start your response IMMEDIATELY with the [HOOK - 0:00-...] section marker - "
+                    "no title, no preamble.")
+        if reason == ABORT_OUTLINE:
+            return ("IMPORTANT: your previous attempt was stopped because it was an outline of short bullet "
+                    "lines. Write the COMPLETE word-for-word narration in full paragraphs - never bullet points.")
+        return (f"IMPORTANT: your previous attempt ran far past the length budget. Keep the whole script "
+                f"to about {expected_words} words and make sure it ends with the [OUTRO/CALL-TO-ACTION] section.")
@@ -5,12 +5,13 @@ This service generates actual thumbnail images using AI image generation
 instead of canvas-based layer rendering.
 """
 
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
 import logging
+from app.core.config import settings
 from app.services.ai_service import ai_service
 from app.schemas.schemas import ThumbnailIdeaRequest
-import base64
-import httpx
+from app.services.provider_clients import provider_clients
+from app.services.artifact_store import artifact_store
 import asyncio
 
 logger = logging.getLogger(__name__)
@@ -83,6 +84,10 @@ class ThumbnailImageService:
         "asymmetric": "dynamic off-center composition, diagonal energy"
     }
 
+    # With uploaded images, these models edit the first upload (Vertex Imagen, DALL-E 2
+    # edit as fallback) instead of generating from text with the uploads as layers
+    IMG2IMG_MODELS = {"imagen-3.0-generate-001"}
+
     async def generate_thumbnails(
         self,
         request: ThumbnailIdeaRequest,
@@ -101,8 +106,8 @@ class ThumbnailImageService:
         try:
             logger.info(f"Generating {request.count} thumbnail images for: {request.thumbnail_prompt[:100]}")
 
-            # Generate thumbnails using standard approach
-            # If user uploaded images, they'll be added as layers in the editor
+            # Uploaded images are added as layers in the editor, or used as the base
+            # image for IMG2IMG_MODELS (see stream_thumbnails)
             return await self._generate_standard_thumbnails(request, persona)
 
         except Exception as e:
@@ -115,17 +120,45 @@ class ThumbnailImageService:
         persona: Optional[Dict] = None
     ) -> List[Dict]:
         """Generate thumbnails using specified image model"""
+        thumbnails = [thumbnail async for thumbnail in self.stream_thumbnails(request, persona)]
+        # Completion order varies; keep the variation order callers have always had
+        thumbnails.sort(key=lambda t: t["variation"])
+        logger.info(f"Successfully generated {len(thumbnails)} thumbnails")
+        return thumbnails
+
+    async def stream_thumbnails(
+        self,
+        request: ThumbnailIdeaRequest,
+        persona: Optional[Dict] = None,
+        deadline: Optional[float] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Yield each thumbnail as soon as its image is generated and encoded
+
+        Every variation generates and downloads independently, so one slow
+        image no longer holds back the others. Variations that fail are
+        skipped. With a deadline (seconds), whatever is still running then
+        is cancelled and only the finished thumbnails are yielded.
+        """
         # Get the image model from request, default to dall-e-3
         image_model = getattr(request, 'image_model', 'dall-e-3')
         logger.info(f"Using image model: {image_model}")
 
+        if request.custom_images and image_model in self.IMG2IMG_MODELS:
+            async for thumbnail in self._stream_with_uploaded_images(request, persona, deadline):
+                yield thumbnail
+            return
+
         # If user uploaded images for GPT-Image 1.5, analyze them first
         enhanced_request = request
         if image_model == 'gpt-image-1.5' and request.custom_images and len(request.custom_images) > 0:
             logger.info(f"Analyzing {len(request.custom_images)} uploaded images with GPT-4o Vision")
 
-            # Extract base64 data from custom images
-            base64_images = [img.get('base64_data', '') for img in request.custom_images]
+            # Extract base64 data from custom images (images re-sent from history arrive as artifact URLs)
+            base64_images = [
+                await asyncio.to_thread(artifact_store.resolve_data_uri, img.get('base64_data', ''))
+                for img in request.custom_images
+            ]
 
             # Analyze images and get enhanced prompt
             enhanced_prompt = await ai_service.analyze_images_for_thumbnail(
@@ -143,87 +176,131 @@ class ThumbnailImageService:
         # Generate prompts based on user inputs (using enhanced prompt if available)
         prompts = await self._create_dalle_prompts(enhanced_request, persona)
 
-        # Generate images in parallel with selected model
-        image_urls = await ai_service.generate_multiple_images(
-            prompts=prompts,
-            size="1792x1024",  # YouTube thumbnail aspect ratio
-            quality="hd",
-            style="vivid",  # Vivid for eye-catching thumbnails
-            model=image_model
-        )
-
-        # Download and convert images to base64 for immediate display
-        thumbnails = []
-        for idx, image_url in enumerate(image_urls):
-            try:
-                # Check if image_url is valid
-                if not image_url:
-                    logger.error(f"Image {idx + 1}/{len(image_urls)}: Received None or empty URL, skipping")
-                    continue
-
-                image_preview = str(image_url)[:100] if image_url else "None"
-                logger.info(f"Processing image {idx + 1}/{len(image_urls)}: {image_preview}...")
-                base64_data = await self._download_and_encode_image(image_url)
-
-                if not base64_data:
-                    logger.error(f"Empty base64_data for image {idx + 1}, skipping")
-                    continue
-
-                thumbnail = {
-                    "id": f"thumb_{idx + 1}",
-                    "title": request.thumbnail_prompt[:50],  # First 50 chars as title
-                    "image_url": image_url,
-                    "base64_data": base64_data,
-                    "prompt": prompts[idx] if idx < len(prompts) else "",
-                    "emotion": request.emotion or "exciting",
-                    "color_scheme": request.color_scheme or "vibrant",
-                    "layout": request.layout_preference or "rule-of-thirds",
-                    "ctr_score": self._predict_ctr_score(request, idx),
-                    "optimized_for_mobile": request.optimize_for_mobile,
-                    "platform": request.target_platform or "youtube",
-                    "variation": idx + 1
-                }
-
-                # Add uploaded images as layers for editor
-                if request.custom_images and len(request.custom_images) > 0:
-                    thumbnail["uploaded_layers"] = request.custom_images
-                    logger.info(f"Added {len(request.custom_images)} uploaded images as layers for thumbnail {idx + 1}")
-
-                logger.info(f"Successfully processed thumbnail {idx + 1} with base64 data length: {len(base64_data)}")
-                thumbnails.append(thumbnail)
-            except Exception as e:
-                logger.error(f"Failed to process image {idx + 1}: {e}")
-                import traceback
-                logger.error(f"Traceback: {traceback.format_exc()}")
-                continue
+        # Uploaded images ride along as editor layers - as artifact URLs, not one base64 copy per thumbnail
+        uploaded_layers = None
+        if request.custom_images:
+            uploaded_layers = await asyncio.to_thread(artifact_store.externalize, request.custom_images)
 
-        logger.info(f"Successfully generated {len(thumbnails)} thumbnails")
-        return thumbnails
+        tasks = [
+            asyncio.create_task(self._generate_thumbnail(request, idx, prompt, image_model, uploaded_layers))
+            for idx, prompt in enumerate(prompts)
+        ]
+        async for thumbnail in self._as_completed(tasks, deadline):
+            yield thumbnail
 
-    async def _generate_with_uploaded_images(
+    async def _as_completed(self, tasks: List[asyncio.Task], deadline: Optional[float]) -> AsyncIterator[Dict]:
+        """Yield the thumbnails of tasks as they finish, cancelling the rest at the deadline"""
+        try:
+            for next_done in asyncio.as_completed(tasks, timeout=deadline):
+                thumbnail = await next_done
+                if thumbnail:
+                    yield thumbnail
+        except asyncio.TimeoutError:
+            unfinished = sum(1 for task in tasks if not task.done())
+            logger.warning(f"Thumbnail deadline of {deadline}s reached, dropping {unfinished} unfinished image(s)")
+        finally:
+            # Also runs when the consumer stops early (client disconnected)
+            for task in tasks:
+                task.cancel()
+
+    async def _generate_thumbnail(
         self,
         request: ThumbnailIdeaRequest,
-        persona: Optional[Dict] = None
-    ) -> List[Dict]:
+        idx: int,
+        prompt: str,
+        image_model: str,
+        uploaded_layers: Optional[List[Dict]] = None
+    ) -> Optional[Dict]:
+        """Generate and store one variation; None if it failed"""
+        try:
+            image_urls = await ai_service.generate_image(
+                prompt,
+                size="1792x1024",  # YouTube thumbnail aspect ratio
+                quality="hd",
+                style="vivid",  # Vivid for eye-catching thumbnails
+                n=1,
+                model=image_model
+            )
+            image_url = image_urls[0] if image_urls else None
+
+            # Check if image_url is valid
+            if not image_url:
+                logger.error(f"Image {idx + 1}: Received None or empty URL, skipping")
+                return None
+
+            logger.info(f"Processing image {idx + 1}: {str(image_url)[:100]}...")
+            # Provider URLs expire, so the image is kept in the artifact store
+            artifact_url = await self._store_image(image_url)
+
+            if not artifact_url:
+                logger.error(f"Could not store image {idx + 1}, skipping")
+                return None
+
+            thumbnail = {
+                "id": f"thumb_{idx + 1}",
+                "title": request.thumbnail_prompt[:50],  # First 50 chars as title
+                "image_url": artifact_url,
+                "prompt": prompt,
+                "emotion": request.emotion or "exciting",
+                "color_scheme": request.color_scheme or "vibrant",
+                "layout": request.layout_preference or "rule-of-thirds",
+                "ctr_score": self._predict_ctr_score(request, idx),
+                "optimized_for_mobile": request.optimize_for_mobile,
+                "platform": request.target_platform or "youtube",
+                "variation": idx + 1
+            }
+
+            # Add uploaded images as layers for editor
+            if uploaded_layers:
+                thumbnail["uploaded_layers"] = uploaded_layers
+                logger.info(f"Added {len(uploaded_layers)} uploaded images as layers for thumbnail {idx + 1}")
+
+            logger.info(f"Successfully processed thumbnail {idx + 1}: {artifact_url}")
+            return thumbnail
+        except Exception as e:
+            logger.error(f"Failed to generate image {idx + 1}: {e}")
+            return None
+
+    async def _stream_with_uploaded_images(
+        self,
+        request: ThumbnailIdeaRequest,
+        persona: Optional[Dict] = None,
+        deadline: Optional[float] = None
+    ) -> AsyncIterator[Dict]:
         """
         Generate thumbnails using image-to-image generation with uploaded images
 
         Uses Google Vertex Imagen to incorporate the user's uploaded images
-        directly into the thumbnail design.
+        directly into the thumbnail design. Yields like stream_thumbnails.
         """
-        thumbnails = []
-
         # Get the primary uploaded image
         base_image = request.custom_images[0]
-        base_image_data = base_image.get('base64_data', '')
+        base_image_data = await asyncio.to_thread(artifact_store.resolve_data_uri, base_image.get('base64_data', ''))
 
         # Create thumbnail-specific prompts
         prompts = await self._create_thumbnail_prompts_for_img2img(request, persona)
 
         logger.info(f"Generating {len(prompts)} thumbnail variations using uploaded image")
 
-        # Generate each variation
-        for idx, prompt in enumerate(prompts):
+        # Variations run concurrently, each with its own Vertex -> DALL-E fallback
+        limit = asyncio.Semaphore(settings.IMG2IMG_MAX_CONCURRENCY)
+        tasks = [
+            asyncio.create_task(self._generate_img2img_variation(request, idx, prompt, base_image_data, limit))
+            for idx, prompt in enumerate(prompts)
+        ]
+        async for thumbnail in self._as_completed(tasks, deadline):
+            yield thumbnail
+
+    async def _generate_img2img_variation(
+        self,
+        request: ThumbnailIdeaRequest,
+        idx: int,
+        prompt: str,
+        base_image_data: str,
+        limit: asyncio.Semaphore
+    ) -> Optional[Dict]:
+        """One image-to-image variation; None if both providers failed"""
+        async with limit:
             try:
                 # Try Vertex Imagen first (best for img2img)
                 try:
@@ -234,7 +311,7 @@ class ThumbnailImageService:
                     )
                     logger.info(f"Generated thumbnail {idx + 1} with Vertex Imagen")
                 except Exception as vertex_error:
-                    logger.warning(f"Vertex Imagen failed: {vertex_error}, trying DALL-E 2")
+                    logger.warning(f"Vertex Imagen failed for thumbnail {idx + 1}: {vertex_error}, trying DALL-E 2")
                     # Fallback to DALL-E 2 variation
                     generated_data = await ai_service.generate_image_with_base(
                         prompt=prompt,
@@ -242,34 +319,28 @@ class ThumbnailImageService:
                         model="dalle"
                     )
                     logger.info(f"Generated thumbnail {idx + 1} with DALL-E 2")
-
-                thumbnail = {
-                    "id": f"thumb_{idx + 1}",
-                    "title": request.video_title,
-                    "image_url": "",  # No URL for base64 data
-                    "base64_data": generated_data,
-                    "prompt": prompt,
-                    "emotion": request.emotion or "exciting",
-                    "color_scheme": request.color_scheme or "vibrant",
-                    "layout": request.layout_preference or "rule-of-thirds",
-                    "ctr_score": self._predict_ctr_score(request, idx),
-                    "optimized_for_mobile": request.optimize_for_mobile,
-                    "platform": request.target_platform or "youtube",
-                    "variation": idx + 1,
-                    "generation_method": "img2img"  # Mark as image-to-image
-                }
-
-                thumbnails.append(thumbnail)
-
             except Exception as e:
                 logger.error(f"Failed to generate thumbnail {idx + 1} with uploaded image: {e}")
-                continue
-
-        if len(thumbnails) == 0:
-            raise Exception("Failed to generate any thumbnails with uploaded images")
-
-        logger.info(f"Successfully generated {len(thumbnails)} thumbnails using uploaded images")
-        return thumbnails
+                return None
+
+        artifact_url = await self._store_image(generated_data)
+        if not artifact_url:
+            return None
+
+        return {
+            "id": f"thumb_{idx + 1}",
+            "title": request.thumbnail_prompt[:50],
+            "image_url": artifact_url,
+            "prompt": prompt,
+            "emotion": request.emotion or "exciting",
+            "color_scheme": request.color_scheme or "vibrant",
+            "layout": request.layout_preference or "rule-of-thirds",
+            "ctr_score": self._predict_ctr_score(request, idx),
+            "optimized_for_mobile": request.optimize_for_mobile,
+            "platform": request.target_platform or "youtube",
+            "variation": idx + 1,
+            "generation_method": "img2img"  # Mark as image-to-image
+        }
 
     async def _create_thumbnail_prompts_for_img2img(
         self,
@@ -289,11 +360,11 @@ class ThumbnailImageService:
         color_palette = self.COLOR_PALETTES.get(color_scheme, self.COLOR_PALETTES["vibrant"])
 
         base_prompt_parts = [
-            f"Transform this image into a professional YouTube thumbnail for '{request.video_title}'",
+            f"Transform this image into a professional YouTube thumbnail for '{request.thumbnail_prompt}'",
             "",
             "REQUIREMENTS:",
             f"- Keep the main subject/person from the original image",
-            f"- Add bold, eye-catching text: \"{self._extract_key_words(request.video_title)}\"",
+            f"- Add bold, eye-catching text: \"{self._extract_key_words(request.thumbnail_prompt)}\"",
             f"- Text style: {emotion_style['text_style']}",
             f"- Enhance with {emotion_style['effects']}",
             f"- Apply color scheme: {color_palette}",
@@ -509,34 +580,30 @@ class ThumbnailImageService:
 
         return key_text.upper() if len(key_text) < 20 else key_text
 
-    async def _download_and_encode_image(self, image_url: str) -> str:
+    async def _store_image(self, image_url: str) -> str:
         """
-        Download image from URL and encode to base64, or return if already base64
+        Put a generated image into the artifact store
 
         Args:
             image_url: URL of the image or base64 data URI
 
         Returns:
-            Base64 encoded image data URI
+            Artifact URL, or "" if the image could not be fetched
         """
         try:
-            # Check if it's already a base64 data URI
+            # Some models return the image inline as a base64 data URI
             if image_url.startswith('data:image/'):
-                logger.info(f"Image is already base64 encoded, returning as-is")
-                return image_url
-
-            # Otherwise, download the image from URL
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(image_url)
-                response.raise_for_status()
+                return await asyncio.to_thread(artifact_store.put_data_uri, image_url)
 
-                image_data = response.content
-                base64_encoded = base64.b64encode(image_data).decode('utf-8')
+            # Otherwise, download the image from URL over the shared keep-alive pool
+            response = await provider_clients.http().get(image_url)
+            response.raise_for_status()
 
-                return f"data:image/png;base64,{base64_encoded}"
+            media_type = response.headers.get('content-type', 'image/png').split(';')[0].strip()
+            return await asyncio.to_thread(artifact_store.put, response.content, media_type)
 
         except Exception as e:
-            logger.error(f"Failed to download/encode image: {e}")
+            logger.error(f"Failed to download/store image: {e}")
             return ""
 
     def _predict_ctr_score(self, request: ThumbnailIdeaRequest, variation: int) -> float:
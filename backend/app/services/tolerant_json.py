@@ -0,0 +1,569 @@
+"""
+Tolerant JSON parsing for LLM responses
+
+Models wrap JSON in markdown fences and prose, leave trailing commas and
+comments in, switch to single quotes, drop commas between values or stop
+mid-array when they run out of tokens. parse() scans the response once,
+left to right: every '{' / '[' is a candidate start, well-formed values are
+taken by the C decoder and anything else by a small recursive-descent parser
+that repairs those mistakes in place (apostrophes inside strings are left
+alone). Of the recovered values that pass the schema, the largest one wins.
+
+IncrementalJSONArrayParser applies the same leniency to a streamed array,
+handing back each element as soon as it is complete.
+
+Schema format (every key optional):
+    {"type": "object" | "array" | "string" | ..., "required": ["field"],
+     "types": {"field": "string"}, "properties": {"field": {...}},
+     "items": {...}, "min_items": 1}
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_DECODER = json.JSONDecoder(strict=False)
+
+# Whitespace plus // and /* */ comments (an unclosed block comment runs to the end)
+SKIP = re.compile(r'(?:\s+|//[^\n]*|/\*.*?(?:\*/|\Z))*', re.DOTALL)
+CANDIDATE = re.compile(r'[\[{]')
+NUMBER = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+BARE_KEY = re.compile(r'[\w$][\w$.-]*')
+LITERAL = re.compile(r'(?:true|false|null|True|False|None)\b')
+LITERALS = {"true": True, "false": False, "null": None, "True": True, "False": False, "None": None}
+# A quote only ends a string if what follows could come after a string
+# (including the next string on the same line, its comma dropped);
+# otherwise it's an apostrophe / unescaped quote inside the text
+CLOSES_STRING = re.compile(r'[ \t]*(?:[,:}\]]|//|/\*|\r?\n|\Z)|[ \t]+["\']')
+INLINE_SPACE = re.compile(r'[ \t]*')
+# Fast path for the common defects: group 1 is the next comment, a run of doubled
+# commas, a comma that may be stray (before a closer or a comment), or the end. What
+# comes before it is matched possessively in one run - strings whole, so their
+# contents are never cut, and a lone unterminated quote as itself - so every
+# match starts where the last one ended and the pass stays linear
+CLEANUP = re.compile(
+    r'(?:[^"/,]++|"[^"\\]*+(?:\\.[^"\\]*+)*+"|"|,(?!\s*+(?:[\]},]|//|/\*))|/(?![/*]))*+'
+    r'(//[^\n]*|/\*.*?(?:\*/|\Z)|(?:,\s*+)+(?=,)|,|\Z)',
+    re.DOTALL
+)
+# How far past the first defect the cleaned window reaches at first
+CLEANUP_WINDOW = 16
+PLAIN_RUN = {'"': re.compile(r'[^"\\]*'), "'": re.compile(r"[^'\\]*")}
+ESCAPES = {'"': '"', "'": "'", '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+MAX_DEPTH = 100
+
+TYPE_CHECKS = {
+    "string": str,
+    "number": (int, float),
+    "integer": int,
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+}
+
+
+class JSONRecoveryError(ValueError):
+    """No JSON value could be recovered from the text"""
+
+
+class JSONSchemaError(ValueError):
+    """JSON was recovered but does not match the schema"""
+
+
+class _Truncated(Exception):
+    """Input ended inside a value"""
+
+
+class _Invalid(Exception):
+    """Text at this position can't be read as JSON, even leniently"""
+
+
+class _Parser:
+    """Lenient recursive-descent parser over one response"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.n = len(text)
+        self.truncated = False
+
+    def skip(self, pos: int) -> int:
+        return SKIP.match(self.text, pos).end()
+
+    def container(self, pos: int, depth: int = 0) -> Tuple[Any, int]:
+        if depth > MAX_DEPTH:
+            raise _Invalid()
+        return self.object(pos, depth) if self.text[pos] == '{' else self.array(pos, depth)
+
+    def value(self, pos: int, depth: int) -> Tuple[Any, int]:
+        if pos >= self.n:
+            raise _Truncated()
+        char = self.text[pos]
+        if char in '{[':
+            # Not retried with the C decoder: every failure there builds a
+            # JSONDecodeError, which counts newlines from the start of the text
+            return self.container(pos, depth + 1)
+        if char in '"\'':
+            return self.string(pos)
+
+        match = NUMBER.match(self.text, pos)
+        if match:
+            if match.end() >= self.n:
+                raise _Truncated()  # may have been cut mid-number
+            number = match.group()
+            try:
+                return int(number), match.end()
+            except ValueError:
+                return float(number), match.end()
+        match = LITERAL.match(self.text, pos)
+        if match:
+            return LITERALS[match.group()], match.end()
+        rest = self.text[pos:]
+        if len(rest) < 5 and any(literal.startswith(rest) for literal in LITERALS):
+            raise _Truncated()
+        raise _Invalid()
+
+    def string(self, pos: int) -> Tuple[str, int]:
+        if self.text[pos] == '"':
+            try:
+                value, end = json.decoder.scanstring(self.text, pos + 1, False)
+                if CLOSES_STRING.match(self.text, end):
+                    return value, end
+            except json.JSONDecodeError:
+                pass
+        return self.quoted(pos)
+
+    def quoted(self, pos: int) -> Tuple[str, int]:
+        """Single-quoted strings, stray inner quotes and unknown escapes"""
+        text, quote = self.text, self.text[pos]
+        plain = PLAIN_RUN[quote]
+        chunks = []
+        pos += 1
+        while True:
+            match = plain.match(text, pos)
+            chunks.append(match.group())
+            pos = match.end()
+            if pos >= self.n:
+                raise _Truncated()
+            if text[pos] == quote:
+                if CLOSES_STRING.match(text, pos + 1):
+                    return "".join(chunks), pos + 1
+                chunks.append(quote)
+                pos += 1
+                continue
+            # Backslash escape
+            if pos + 1 >= self.n:
+                raise _Truncated()
+            escape = text[pos + 1]
+            if escape != 'u':
+                chunks.append(ESCAPES.get(escape, escape))
+                pos += 2
+                continue
+            if pos + 6 > self.n:
+                raise _Truncated()
+            try:
+                code = int(text[pos + 2:pos + 6], 16)
+            except ValueError:
+                raise _Invalid()
+            pos += 6
+            if 0xD800 <= code < 0xDC00 and text.startswith('\\u', pos):
+                try:
+                    low = int(text[pos + 2:pos + 6], 16)
+                except ValueError:
+                    low = 0
+                if 0xDC00 <= low < 0xE000:
+                    code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)
+                    pos += 6
+            chunks.append(chr(code))
+
+    def key(self, pos: int) -> Tuple[str, int]:
+        if self.text[pos] in '"\'':
+            return self.string(pos)
+        match = BARE_KEY.match(self.text, pos)
+        if not match:
+            raise _Invalid()
+        return match.group(), match.end()
+
+    def object(self, pos: int, depth: int) -> Tuple[Dict, int]:
+        result = {}
+        pos = self.skip(pos + 1)
+        while True:
+            if pos >= self.n:
+                self.truncated = True
+                return result, pos
+            char = self.text[pos]
+            if char == '}':
+                return result, pos + 1
+            if char == ',':
+                # Trailing, doubled or leading commas
+                pos = self.skip(pos + 1)
+                continue
+            try:
+                key, end = self.key(pos)
+                end = self.skip(end)
+                if end >= self.n:
+                    raise _Truncated()
+                if self.text[end] != ':':
+                    raise _Invalid()
+                value, end = self.value(self.skip(end + 1), depth)
+            except _Truncated:
+                self.truncated = True
+                return result, self.n
+            if self.truncated:
+                # The member was cut off; keep the ones before it
+                return result, self.n
+            result[key] = value
+            pos = self.skip(end)
+
+    def array(self, pos: int, depth: int) -> Tuple[list, int]:
+        result = []
+        pos = self.skip(pos + 1)
+        while True:
+            if pos >= self.n:
+                self.truncated = True
+                return result, pos
+            char = self.text[pos]
+            if char == ']':
+                return result, pos + 1
+            if char == ',':
+                pos = self.skip(pos + 1)
+                continue
+            try:
+                value, end = self.value(pos, depth)
+            except _Truncated:
+                self.truncated = True
+                return result, self.n
+            if self.truncated:
+                return result, self.n
+            result.append(value)
+            pos = self.skip(end)
+
+
+def _strip_commas_and_comments(text: str, start: int, stop: int) -> Tuple[str, List[Tuple[int, int]]]:
+    """
+    text[start:stop] without comments and trailing / doubled commas (outside strings)
+    -> (cleaned, cuts) with the (position in cleaned, length) of each cut
+    """
+    pieces, cuts = [], []
+    last, kept = start, 0
+    for match in CLEANUP.finditer(text, start, stop):
+        token = match.group(1)
+        if not token:
+            break
+        if token == ',':
+            after = SKIP.match(text, match.end(), stop).end()
+            if after < stop and text[after] not in ']},':
+                continue  # a separator with a comment after it
+        pieces.append(text[last:match.start(1)])
+        kept += match.start(1) - last
+        cuts.append((kept, len(token)))
+        last = match.end()
+    pieces.append(text[last:stop])
+    return "".join(pieces), cuts
+
+
+def _decode_cleaned(text: str, start: int, defect: int) -> Tuple[Any, int]:
+    """
+    raw_decode after dropping stray commas and comments; returns the end in text
+
+    Cleans a window from start to a little past the first defect, growing it only
+    while the decoder runs off its end, so a small value early in a long response
+    doesn't pay for the rest of it.
+    """
+    size = defect - start + CLEANUP_WINDOW
+    while True:
+        stop = min(len(text), start + size)
+        cleaned, cuts = _strip_commas_and_comments(text, start, stop)
+        try:
+            value, end = _DECODER.raw_decode(cleaned)
+        except json.JSONDecodeError as e:
+            # Failing in the last quarter (or inside a string that closes past the
+            # end) means the window was too small; anything earlier is a real defect
+            cut_off = e.pos >= len(cleaned) * 3 // 4 or (
+                e.msg.startswith("Unterminated string") and text.find('"', stop) != -1
+            )
+            if stop < len(text) and cut_off:
+                # Grow 8x, or to the end if that would leave less than the window
+                size *= 8
+                if start + 2 * size > len(text):
+                    size = len(text) - start
+                continue
+            raise
+        return value, start + end + sum(length for position, length in cuts if position < end)
+
+
+def _scan(text: str) -> Iterator[Tuple[Any, Dict]]:
+    """Every top-level object/array in text, left to right, without overlaps"""
+    parser = _Parser(text)
+    pos = 0
+    while True:
+        match = CANDIDATE.search(text, pos)
+        if not match:
+            return
+        start = match.start()
+        try:
+            value, end = _DECODER.raw_decode(text, start)
+            repaired = False
+        except json.JSONDecodeError as e:
+            value = None
+            if e.pos < len(text) and text[e.pos] in ']},/':
+                # Stopped at a stray comma or a comment: one regex pass and the
+                # C decoder again, instead of the per-character parser
+                try:
+                    value, end = _decode_cleaned(text, start, e.pos)
+                except json.JSONDecodeError:
+                    value = None
+            if value is not None:
+                yield value, {"start": start, "end": end, "repaired": True, "truncated": False}
+                pos = end
+                continue
+            parser.truncated = False
+            try:
+                value, end = parser.container(start)
+            except (_Invalid, _Truncated, RecursionError):
+                pos = start + 1
+                continue
+            repaired = True
+            if parser.truncated and not value:
+                pos = start + 1
+                continue
+        yield value, {"start": start, "end": end, "repaired": repaired, "truncated": parser.truncated and repaired}
+        pos = end
+
+
+def parse(text: str, schema: Optional[Dict] = None) -> Tuple[Any, Dict]:
+    """
+    Recover the JSON value in text -> (value, info)
+
+    info has the start/end offsets of the value in text, repaired (False if
+    it was well-formed JSON) and truncated (the text ended inside it; the
+    unfinished member was dropped). Raises JSONRecoveryError if nothing
+    parses and JSONSchemaError if nothing that parses matches the schema.
+    """
+    if not isinstance(text, str) or not text.strip():
+        raise JSONRecoveryError("Empty response")
+
+    try:
+        candidates = [(json.loads(text), {"start": 0, "end": len(text), "repaired": False, "truncated": False})]
+    except ValueError:
+        candidates = _scan(text)
+
+    best, schema_error = None, None
+    for value, info in candidates:
+        if schema:
+            try:
+                validate(value, schema)
+            except JSONSchemaError as e:
+                schema_error = schema_error or e
+                continue
+        if best is None or info["end"] - info["start"] > best[1]["end"] - best[1]["start"]:
+            best = (value, info)
+
+    if best is not None:
+        return best
+    if schema_error is not None:
+        raise schema_error
+    raise JSONRecoveryError(f"No JSON found in response: {text[:200]!r}")
+
+
+def loads(text: str, schema: Optional[Dict] = None) -> Any:
+    """parse() without the info dict"""
+    return parse(text, schema)[0]
+
+
+def _is_type(value: Any, expected: str) -> bool:
+    python_type = TYPE_CHECKS.get(expected)
+    return python_type is None or isinstance(value, python_type)
+
+
+def validate(data: Any, schema: Dict, path: str = "$") -> bool:
+    """Check data against the schema format above; raises JSONSchemaError"""
+    if not isinstance(schema, dict):
+        return True
+
+    expected = schema.get("type")
+    if expected and not _is_type(data, expected):
+        raise JSONSchemaError(f"{path} should be {expected}, got {type(data).__name__}")
+
+    if isinstance(data, dict):
+        for field in schema.get("required", []):
+            if field not in data:
+                raise JSONSchemaError(f"Required field '{field}' missing from JSON response")
+        for field, field_type in schema.get("types", {}).items():
+            if field in data and not _is_type(data[field], field_type):
+                raise JSONSchemaError(f"Field '{field}' should be {field_type}, got {type(data[field]).__name__}")
+        for field, field_schema in schema.get("properties", {}).items():
+            if field in data:
+                validate(data[field], field_schema, f"{path}.{field}")
+
+    if isinstance(data, list):
+        if len(data) < schema.get("min_items", 0):
+            raise JSONSchemaError(f"{path} should have at least {schema['min_items']} items, got {len(data)}")
+        if "items" in schema:
+            for index, item in enumerate(data):
+                validate(item, schema["items"], f"{path}[{index}]")
+
+    return True
+
+
+def _parse_element(text: str) -> Any:
+    """One array element's text, strictly if possible"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    parser = _Parser(text)
+    value, end = parser.value(parser.skip(0), 0)
+    if parser.truncated:
+        raise _Truncated()
+    return value
+
+
+class IncrementalJSONArrayParser:
+    """
+    Parse a JSON array as it streams in, returning each element once complete
+
+    The array is the first '[' followed by an element or ']', so fences and
+    "[1]"-style references in leading prose are skipped. Element boundaries
+    are tracked through strings, comments and nesting in one forward pass
+    over the stream; each finished element is parsed on its own with the
+    same leniency as parse(). An element cut off at the end is dropped.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.done = False
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._quote: Optional[str] = None
+        self._escape = False
+        self._comment: Optional[str] = None
+        self._element_start: Optional[int] = None
+        self._element_done = False  # a string/container element just closed
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far"""
+        return self._buffer
+
+    def feed(self, delta: str) -> List[Any]:
+        """Add a streamed delta; returns the elements it completed"""
+        if not delta:
+            return []
+        self._buffer += delta
+        return self._scan(final=False)
+
+    def finish(self) -> List[Any]:
+        """End of stream; returns any elements completed by it"""
+        items = self._scan(final=True)
+        self._element_start = None
+        return items
+
+    def _find_start(self) -> bool:
+        text, n = self._buffer, len(self._buffer)
+        while True:
+            start = text.find('[', self._pos)
+            if start == -1:
+                self._pos = n
+                return False
+            after = SKIP.match(text, start + 1).end()
+            if after >= n or (text[after] == '/' and after + 1 >= n):
+                # Can't tell yet whether this bracket opens the array
+                self._pos = start
+                return False
+            if text[after] in '{[]"\'':
+                self.started = True
+                self._pos = start + 1
+                return True
+            self._pos = start + 1
+
+    def _scan(self, final: bool) -> List[Any]:
+        items = []
+        if self.done or (not self.started and not self._find_start()):
+            return items
+
+        text, n = self._buffer, len(self._buffer)
+        pos = self._pos
+        while pos < n:
+            char = text[pos]
+
+            if self._quote:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == self._quote:
+                    # Same closing rule as the parser; it needs up to two
+                    # characters after the quote ("//"), which may be in the next chunk
+                    if INLINE_SPACE.match(text, pos + 1).end() + 1 >= n and not final:
+                        break
+                    if CLOSES_STRING.match(text, pos + 1):
+                        self._quote = None
+                        self._element_done = self._depth == 0
+                pos += 1
+                continue
+
+            if self._comment:
+                if self._comment == '//' and char == '\n':
+                    self._comment = None
+                elif self._comment == '/*' and char == '*':
+                    if pos + 1 >= n and not final:
+                        break
+                    if text.startswith('*/', pos):
+                        self._comment = None
+                        pos += 1
+                pos += 1
+                continue
+
+            if char == '/':
+                if pos + 1 >= n and not final:
+                    break
+                if text[pos + 1:pos + 2] in ('/', '*'):
+                    self._comment = text[pos:pos + 2]
+                    pos += 2
+                    continue
+
+            if self._element_done and not char.isspace() and char not in ',]}':
+                # Next element began without a comma
+                items.extend(self._emit(pos))
+
+            if char in '"\'':
+                self._quote = char
+                if self._element_start is None:
+                    self._element_start = pos
+            elif char in '[{':
+                if self._element_start is None:
+                    self._element_start = pos
+                self._depth += 1
+            elif char in ']}':
+                if self._depth == 0:
+                    # End of the array
+                    items.extend(self._emit(pos))
+                    self.done = True
+                    pos += 1
+                    break
+                self._depth -= 1
+                self._element_done = self._depth == 0
+            elif char == ',' and self._depth == 0:
+                items.extend(self._emit(pos))
+            elif not char.isspace():
+                if self._element_start is None:
+                    self._element_start = pos
+            elif self._depth == 0 and self._element_start is not None:
+                # Whitespace ends a bare number / literal element
+                self._element_done = True
+            pos += 1
+
+        self._pos = pos
+        return items
+
+    def _emit(self, end: int) -> List[Any]:
+        start, self._element_start = self._element_start, None
+        self._element_done = False
+        if start is None:
+            # Empty slot: trailing / doubled comma or an empty array
+            return []
+        try:
+            return [_parse_element(self._buffer[start:end])]
+        except (_Invalid, _Truncated, RecursionError):
+            return []
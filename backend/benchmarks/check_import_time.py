@@ -0,0 +1,118 @@
+"""
+Cold-start budget for `import app.main`
+
+Runs `python -X importtime -c "import app.main"` in fresh interpreters
+(--runs, the fastest counts, since a loaded machine only ever adds time) and
+exits non-zero if the total cumulative import time exceeds the budget or if
+a provider SDK that should be imported lazily (openai, groq, vertexai,
+google.cloud.aiplatform, google.genai, razorpay) was pulled in at import time.
+
+To act on a failure it reports the app modules with the most import-time
+work of their own (self time, at any nesting depth) and the slowest
+third-party packages (cumulative time of each package's first import).
+
+The default budget is set from a measured baseline: the fastest of 5 runs on
+a development container was ~2.2s, nearly all of it fastapi, pydantic model
+building, sqlalchemy and httpx. Provider SDKs imported eagerly add seconds
+more. Override with --budget-ms or IMPORT_TIME_BUDGET_MS for slower CI hosts.
+
+Run from backend/ (suitable as a CI gate):
+    python -m benchmarks.check_import_time --runs 3
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+LAZY_MODULES = ("openai", "groq", "vertexai", "google.cloud.aiplatform", "google.genai", "razorpay")
+# Measured baseline (see above) plus headroom for run-to-run noise
+DEFAULT_BUDGET_MS = 3000
+
+
+def measure(module: str) -> list:
+    """Return (self_us, cumulative_us, depth, name) rows from -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # One space after the separator, then two per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    if result.returncode != 0:
+        print(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+        sys.exit(2)
+    return rows
+
+
+def total_ms(rows: list, package: str) -> float:
+    """Cumulative time of the top-level imports triggered by `import <module>` itself
+
+    Interpreter start-up (site, encodings) is outside the app's control.
+    """
+    own = [row for row in rows if row[2] == 0 and (row[3] == package or row[3].startswith(package + "."))]
+    return sum(row[1] for row in own) / 1000
+
+
+def third_party(rows: list, package: str) -> list:
+    """(cumulative_us, name) of each third-party package's first (costliest) import"""
+    first = {}
+    for _, cumulative_us, _, name in rows:
+        root = name.split(".")[0]
+        if root == package or root in sys.stdlib_module_names or root.startswith("_"):
+            continue
+        if cumulative_us > first.get(root, (0, ""))[0]:
+            first[root] = (cumulative_us, name)
+    return sorted(first.values(), reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.environ.get("IMPORT_TIME_BUDGET_MS", DEFAULT_BUDGET_MS)))
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters; the fastest counts")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    package = args.module.split(".")[0]
+    runs = [measure(args.module) for _ in range(max(1, args.runs))]
+    totals = [total_ms(rows, package) for rows in runs]
+    rows = runs[totals.index(min(totals))]
+
+    print(f"Slowest {package}.* modules for {args.module} (self time, any depth):")
+    own = [row for row in rows if row[3] == package or row[3].startswith(package + ".")]
+    for self_us, cumulative_us, _, name in sorted(own, reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:9.1f}ms  {name}  (cumulative {cumulative_us / 1000:.1f}ms)")
+
+    print("Slowest third-party packages (cumulative, first import):")
+    for cumulative_us, name in third_party(rows, package)[:args.top]:
+        print(f"  {cumulative_us / 1000:9.1f}ms  {name}")
+
+    runs_note = f", fastest of {len(totals)}: " + " / ".join(f"{t:.0f}" for t in totals) if len(totals) > 1 else ""
+    print(f"Total: {min(totals):.1f}ms (budget {args.budget_ms:.0f}ms{runs_note})")
+
+    imported = {name for _, _, _, name in rows}
+    eager = [m for m in LAZY_MODULES if m in imported]
+
+    failed = False
+    if eager:
+        print(f"FAIL: provider SDKs imported eagerly: {', '.join(eager)}")
+        failed = True
+    if min(totals) > args.budget_ms:
+        print(f"FAIL: cold start {min(totals):.1f}ms exceeds budget {args.budget_ms:.0f}ms")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Event-loop lag under concurrent requests: sync SessionLocal vs AsyncSession
+
+Each simulated request does what an endpoint does against Postgres - the
+get_current_user lookup plus one slow query (pg_sleep) - while a heartbeat
+task measures how late the event loop wakes up. With the sync session every
+round-trip blocks the loop; with the async session the heartbeat stays on time.
+
+Run from backend/ against a real Postgres (DATABASE_URL from env / .env):
+    python -m benchmarks.event_loop_lag --concurrency 50 --query-delay 0.05
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.core.database import SessionLocal, AsyncSessionLocal, engine, async_engine
+
+
+async def heartbeat(stop: asyncio.Event, interval: float, lags: list):
+    """Record how late each tick fires (0 = loop never blocked)"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(loop.time() - start - interval)
+
+
+async def sync_request(delay: float):
+    """An async endpoint using the blocking session (pre-change behaviour)"""
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT 1"))
+        db.execute(text("SELECT pg_sleep(:d)"), {"d": delay})
+    finally:
+        db.close()
+    await asyncio.sleep(0)
+
+
+async def async_request(delay: float):
+    """The same endpoint on AsyncSession"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT pg_sleep(:d)"), {"d": delay})
+
+
+async def run_variant(name: str, handler, concurrency: int, delay: float, interval: float):
+    lags = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(stop, interval, lags))
+    await asyncio.sleep(interval * 2)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(handler(delay) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await beat
+
+    lags_ms = sorted(l * 1000 for l in lags) or [0.0]
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    print(
+        f"{name:<6} wall={elapsed:7.3f}s  "
+        f"loop lag p50={statistics.median(lags_ms):8.2f}ms  "
+        f"p99={p99:8.2f}ms  max={lags_ms[-1]:8.2f}ms  ticks={len(lags)}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--query-delay", type=float, default=0.05, help="seconds of pg_sleep per request")
+    parser.add_argument("--interval", type=float, default=0.01, help="heartbeat interval in seconds")
+    args = parser.parse_args()
+
+    print(f"{args.concurrency} concurrent requests, {args.query_delay * 1000:.0f}ms query each")
+    await run_variant("sync", sync_request, args.concurrency, args.query_delay, args.interval)
+    await run_variant("async", async_request, args.concurrency, args.query_delay, args.interval)
+
+    engine.dispose()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""
+/images/analyze: Python pixel lists + Counter vs NumPy on a downscaled copy
+
+  legacy   the previous handler body: full-resolution RGB conversion,
+           Counter over the exact RGB tuples of a 150x150 resize, and three
+           sum(list(getdata())) passes over full-resolution grayscale
+           (whole image, top third, bottom third)
+  numpy    image_worker.analyze_image: draft()/thumbnail to <=512px, one
+           quantized-colour histogram (np.bincount), one luma array with
+           per-row means reused for every region
+
+Reports median time per image and how the results compare: average and
+per-region brightness should agree within a few levels; the top palette
+entry's share shows what merging near-identical shades changes (with
+exact-colour counting a noisy photo's "dominant" colour covers almost
+nothing).
+
+Run from backend/ (needs Pillow and NumPy):
+    python -m benchmarks.image_analysis -n 10
+"""
+
+import argparse
+import io
+import statistics
+import time
+from collections import Counter
+
+from PIL import Image
+
+from app.services.image_worker import analyze_image
+
+SIZES = [(1920, 1080), (3840, 2160)]
+
+
+def photo_like(width: int, height: int) -> bytes:
+    """Gradients plus sensor-style noise, saved as JPEG like a real upload"""
+    gradient = Image.linear_gradient("L").resize((width, height))
+    noise = Image.effect_noise((width, height), 24)
+    img = Image.merge("RGB", (gradient, Image.blend(gradient, noise, 0.5), noise))
+    output = io.BytesIO()
+    img.save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+def flat_graphic(width: int, height: int) -> bytes:
+    """Few flat colours (a screenshot / graphic), saved as PNG"""
+    img = Image.new("RGB", (width, height), (20, 24, 40))
+    img.paste((240, 200, 30), (0, 0, width, height // 4))
+    img.paste((250, 250, 250), (width // 3, height // 2, width, height))
+    output = io.BytesIO()
+    img.save(output, format="PNG")
+    return output.getvalue()
+
+
+def legacy_analyze(contents: bytes) -> dict:
+    """The previous analyze_image handler body, returning the analysis dict"""
+    img = Image.open(io.BytesIO(contents))
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    img_small = img.resize((150, 150))
+    pixels = list(img_small.getdata())
+    dominant_colors = Counter(pixels).most_common(5)
+    hex_colors = [{
+        "hex": '#{:02x}{:02x}{:02x}'.format(*color),
+        "rgb": color,
+        "percentage": (count / len(pixels)) * 100
+    } for color, count in dominant_colors]
+
+    pixels_gray = list(img.convert('L').getdata())
+    avg_brightness = sum(pixels_gray) / len(pixels_gray)
+
+    width, height = img.size
+    top_section = img.crop((0, 0, width, height // 3))
+    top_brightness = sum(list(top_section.convert('L').getdata())) / (width * height // 3)
+    bottom_section = img.crop((0, height * 2 // 3, width, height))
+    bottom_brightness = sum(list(bottom_section.convert('L').getdata())) / (width * height // 3)
+
+    return {
+        "colors": {"dominant": hex_colors, "average_brightness": avg_brightness},
+        "top_brightness": top_brightness,
+        "bottom_brightness": bottom_brightness,
+        "recommended_zone": "top" if top_brightness < bottom_brightness else "bottom"
+    }
+
+
+def timed(fn, data: bytes, n: int):
+    samples, result = [], None
+    for _ in range(n):
+        start = time.perf_counter()
+        result = fn(data)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", type=int, default=10, help="runs per image (median reported)")
+    args = parser.parse_args()
+
+    print(f"{'image':<22} {'legacy ms':>10} {'numpy ms':>9} {'speedup':>8} {'avg L diff':>11} "
+          f"{'zone':>11} {'top colour % legacy/numpy':>26}")
+    for width, height in SIZES:
+        for label, build in (("photo", photo_like), ("graphic", flat_graphic)):
+            data = build(width, height)
+            legacy_ms, legacy = timed(legacy_analyze, data, args.n)
+            numpy_ms, new = timed(analyze_image, data, args.n)
+
+            brightness_diff = abs(legacy["colors"]["average_brightness"] - new["colors"]["average_brightness"])
+            zone = "same" if legacy["recommended_zone"] == new["text_placement"]["recommended_zone"] else "DIFFERS"
+            legacy_top = legacy["colors"]["dominant"][0]["percentage"]
+            new_top = new["colors"]["dominant"][0]["percentage"]
+            print(f"{f'{label} {width}x{height}':<22} {legacy_ms:10.1f} {numpy_ms:9.1f} {legacy_ms / numpy_ms:7.1f}x "
+                  f"{brightness_diff:11.2f} {zone:>11} {legacy_top:12.1f} / {new_top:<11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Upload image processing: inline in the handler vs the image_worker process pool
+
+For each source size, N synthetic photos (gradient + noise, JPEG) are pushed
+through the upload optimization path:
+
+  inline   the previous handler code: optimize_image on the event loop, then a
+           second decode of the output just to read width/height, one upload
+           after another (what /upload-multiple did)
+  pool     image_worker.run(optimize_image) with --concurrency uploads in
+           flight; dimensions come back with the result
+
+Reports uploads/sec and the worst event-loop stall seen by a heartbeat task
+(the inline variant blocks the loop for the whole decode/resize/encode).
+
+Run from backend/ (needs Pillow):
+    python -m benchmarks.image_upload_throughput -n 20 --processes 4 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import io
+import time
+
+from PIL import Image
+
+from app.core.config import settings
+from app.services.image_worker import image_worker, optimize_image, ImageWorkerBusy
+
+SIZES = [(640, 360), (1920, 1080), (3840, 2160), (6000, 4000)]
+
+
+def synthetic_photo(width: int, height: int) -> bytes:
+    """Noisy gradient - compresses like a photo, unlike a flat fill"""
+    gradient = Image.linear_gradient("L").resize((width, height))
+    noise = Image.effect_noise((width, height), 64)
+    img = Image.merge("RGB", (gradient, noise, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+    output = io.BytesIO()
+    img.save(output, format="JPEG", quality=92)
+    return output.getvalue()
+
+
+def legacy_optimize(image_data: bytes, max_size: tuple = (1920, 1080)) -> bytes:
+    """optimize_image as it was, returning only the bytes"""
+    img = Image.open(io.BytesIO(image_data))
+    if img.mode == 'RGBA':
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[3])
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+    if img.size[0] > max_size[0] or img.size[1] > max_size[1]:
+        img.thumbnail(max_size, Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    img.save(output, format='JPEG', quality=85, optimize=True)
+    return output.getvalue()
+
+
+async def heartbeat(stop: asyncio.Event, interval: float, lags: list):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(loop.time() - start - interval)
+
+
+async def inline_upload(data: bytes):
+    optimized = legacy_optimize(data)
+    width, height = Image.open(io.BytesIO(optimized)).size
+    await asyncio.sleep(0)
+    return width, height
+
+
+async def run_inline(data: bytes, n: int, concurrency: int):
+    for _ in range(n):
+        await inline_upload(data)
+    return 0
+
+
+async def run_pool(data: bytes, n: int, concurrency: int):
+    limit = asyncio.Semaphore(concurrency)
+    rejected = 0
+
+    async def upload():
+        nonlocal rejected
+        async with limit:
+            try:
+                await image_worker.run(optimize_image, data)
+            except ImageWorkerBusy:
+                rejected += 1
+
+    await asyncio.gather(*(upload() for _ in range(n)))
+    return rejected
+
+
+async def measure(variant, data: bytes, n: int, concurrency: int):
+    lags = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(stop, 0.005, lags))
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    rejected = await variant(data, n, concurrency)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    return (n - rejected) / elapsed, max(lags, default=0.0) * 1000, rejected
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", type=int, default=20, help="uploads per size and variant")
+    parser.add_argument("--processes", type=int, default=settings.IMAGE_WORKER_PROCESSES)
+    parser.add_argument("--concurrency", type=int, default=8, help="uploads in flight (pool variant)")
+    args = parser.parse_args()
+
+    settings.IMAGE_WORKER_PROCESSES = args.processes
+    settings.IMAGE_WORKER_MAX_PENDING = max(settings.IMAGE_WORKER_MAX_PENDING, args.concurrency)
+
+    # Start the pool's processes before timing anything
+    await asyncio.gather(*(image_worker.run(optimize_image, synthetic_photo(64, 64)) for _ in range(args.processes)))
+
+    print(f"{args.processes} worker processes, {args.concurrency} uploads in flight, {args.n} uploads per cell\n")
+    print(f"{'source':>11} {'input KB':>9} {'inline/s':>9} {'pool/s':>8} {'speedup':>8} "
+          f"{'inline stall ms':>16} {'pool stall ms':>14}")
+    try:
+        for width, height in SIZES:
+            data = synthetic_photo(width, height)
+            inline_rate, inline_lag, _ = await measure(run_inline, data, args.n, args.concurrency)
+            pool_rate, pool_lag, rejected = await measure(run_pool, data, args.n, args.concurrency)
+            note = f"  ({rejected} rejected as busy)" if rejected else ""
+            print(f"{f'{width}x{height}':>11} {len(data) / 1024:9.0f} {inline_rate:9.1f} {pool_rate:8.1f} "
+                  f"{pool_rate / inline_rate:7.1f}x {inline_lag:16.1f} {pool_lag:14.1f}{note}")
+    finally:
+        image_worker.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""
+Per-call overhead: fresh provider clients vs the shared provider_clients registry
+
+Measures, per call:
+  - httpx: new AsyncClient per download (new TCP + TLS handshake) vs the pooled
+    keep-alive client, against --url
+  - Vertex: GenerativeModel(...) / ImageGenerationModel.from_pretrained(...) per
+    call vs the cached handle (only with --vertex; needs credentials)
+
+Run from backend/:
+    python -m benchmarks.provider_client_overhead --url https://www.gstatic.com/generate_204 -n 30
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.services.provider_clients import provider_clients
+
+
+def report(label: str, samples: list):
+    samples_ms = sorted(s * 1000 for s in samples)
+    p95 = samples_ms[min(len(samples_ms) - 1, int(len(samples_ms) * 0.95))]
+    print(f"{label:<42} median={statistics.median(samples_ms):8.2f}ms  p95={p95:8.2f}ms")
+
+
+async def bench_http(url: str, n: int):
+    fresh = []
+    for _ in range(n):
+        start = time.perf_counter()
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            (await client.get(url)).raise_for_status()
+        fresh.append(time.perf_counter() - start)
+
+    pooled = []
+    client = provider_clients.http()
+    (await client.get(url)).raise_for_status()  # open the keep-alive connection once
+    for _ in range(n):
+        start = time.perf_counter()
+        (await client.get(url)).raise_for_status()
+        pooled.append(time.perf_counter() - start)
+
+    report("httpx: new AsyncClient per call", fresh)
+    report("httpx: shared pooled client", pooled)
+
+
+def bench_vertex(n: int):
+    from vertexai.preview.generative_models import GenerativeModel
+    from vertexai.preview.vision_models import ImageGenerationModel
+    from app.services.ai_service import ai_service, PROVIDER_MODELS
+
+    if not ai_service.vertex_available:
+        print("Vertex not configured - skipping model handle benchmark")
+        return
+
+    name = PROVIDER_MODELS['vertex']
+    fresh, cached = [], []
+    for _ in range(n):
+        start = time.perf_counter()
+        GenerativeModel(name)
+        fresh.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        provider_clients.generative_model(name)
+        cached.append(time.perf_counter() - start)
+    report("GenerativeModel() per call", fresh)
+    report("GenerativeModel cached", cached)
+
+    fresh, cached = [], []
+    for _ in range(max(3, n // 5)):
+        start = time.perf_counter()
+        ImageGenerationModel.from_pretrained("imagegeneration@006")
+        fresh.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        provider_clients.image_model("imagegeneration@006")
+        cached.append(time.perf_counter() - start)
+    report("ImageGenerationModel.from_pretrained()", fresh)
+    report("ImageGenerationModel cached", cached)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="https://www.gstatic.com/generate_204")
+    parser.add_argument("-n", type=int, default=30)
+    parser.add_argument("--vertex", action="store_true", help="also benchmark Vertex model handles")
+    args = parser.parse_args()
+
+    await bench_http(args.url, args.n)
+    if args.vertex:
+        bench_vertex(args.n)
+    await provider_clients.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,147 @@
+"""
+Script post-processing: equivalence check and timing vs the previous implementation
+
+legacy_post_process_script below is a verbatim copy of post_process_script /
+_fix_script_timestamps before the single-pass rewrite (7 regex passes plus a
+re.search over the remaining script for every timestamp).
+
+  --check N   property check: N random scripts (markers in mixed case, bare and
+              parenthesised timestamps, blank-line runs, unicode whitespace,
+              glued brackets) must produce byte-identical output
+  timing      median time of both implementations on synthetic 60-minute
+              (~9000 word) scripts with a marker every --section-words words
+
+Run from backend/:
+    python -m benchmarks.script_postprocess --check 5000 --minutes 60 -n 20
+"""
+
+import argparse
+import random
+import re
+import statistics
+import time
+
+from app.services.creator_tools_service import CreatorToolsService
+
+
+def legacy_fix_script_timestamps(script: str) -> str:
+    timestamp_pattern = r'\(?(\d+):(\d{2})\s*[-–—]\s*(\d+):(\d{2})\)?'
+    sections = re.split(r'\[.*?\]|\(.*?\d+:\d+.*?\)', script)
+    cumulative_seconds = 0
+
+    def replace_timestamp(match):
+        nonlocal cumulative_seconds
+        match_end_pos = match.end()
+        next_marker_match = re.search(r'\[|\((?=\d+:\d+)', script[match_end_pos:])
+        if next_marker_match:
+            section_text = script[match_end_pos:match_end_pos + next_marker_match.start()]
+        else:
+            section_text = script[match_end_pos:]
+        clean_text = re.sub(r'\[.*?\]', '', section_text)
+        word_count = len(clean_text.split())
+        section_duration_seconds = int(word_count / 2.5)
+        start_seconds = cumulative_seconds
+        end_seconds = cumulative_seconds + section_duration_seconds
+        cumulative_seconds = end_seconds
+        start_min, start_sec = divmod(start_seconds, 60)
+        end_min, end_sec = divmod(end_seconds, 60)
+        return f"{start_min}:{start_sec:02d}-{end_min}:{end_sec:02d}"
+
+    return re.sub(timestamp_pattern, replace_timestamp, script)
+
+
+def legacy_post_process_script(script: str) -> str:
+    script = re.sub(r'\n{4,}', '\n\n\n', script)
+    script = re.sub(r'\[HOOK\s*-?\s*', '[HOOK - ', script, flags=re.IGNORECASE)
+    script = re.sub(r'\[OUTRO\s*-?\s*', '[OUTRO - ', script, flags=re.IGNORECASE)
+    script = re.sub(r'\[INTRODUCTION\s*-?\s*', '[INTRODUCTION - ', script, flags=re.IGNORECASE)
+    script = re.sub(r'\[B-ROLL\s*:\s*', '[B-ROLL: ', script, flags=re.IGNORECASE)
+    script = re.sub(r'\[TEXT ON SCREEN\s*:\s*', '[TEXT ON SCREEN: ', script, flags=re.IGNORECASE)
+    script = re.sub(r'\[PAUSE\s*-?\s*', '[PAUSE - ', script, flags=re.IGNORECASE)
+    script = legacy_fix_script_timestamps(script)
+    return script.strip()
+
+
+FRAGMENTS = [
+    "[HOOK - 0:00-0:15]", "[hook]", "[Hook-", "[HOOK\n\n- ", "[OUTRO/CALL-TO-ACTION - 9:00-10:00]", "[outro -",
+    "[INTRODUCTION-0:15-0:35]", "[B-ROLL:city]", "[b-roll :  ", "[TEXT ON SCREEN:\"70%\"]", "[text on screen : x]",
+    "[PAUSE-2s]", "[pause]", "[Section 1: Basics - 0:35-1:30]", "(0:35-1:30)", "(1:30 – 2:45)", "2:45—3:10",
+    "10:05 - 11:00", "(12:00-)", "(3:1-3:22)", "(4:00", "4:00)", "[", "]", "(", ")", "((0:00-0:01))",
+    "[nested [brackets] here]", "word[glued]word", "mid(0:00-0:05)word", "ſ", "K", "İ",
+    "\n", "\n\n", "\n\n\n\n", "\n\n\n\n\n\n", " ", "\t", " ", " ", "　", "\x1c",
+]
+WORDS = "the quick brown fox jumps over lazy dogs while creators edit videos faster every week".split()
+
+
+def random_script(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(0, 60)):
+        if rng.random() < 0.35:
+            parts.append(rng.choice(FRAGMENTS))
+        else:
+            parts.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 30))))
+        parts.append(rng.choice(["", " ", "\n", "\n\n", " "]))
+    return "".join(parts)
+
+
+def long_script(minutes: int, section_words: int, rng: random.Random) -> str:
+    """~150 words/minute with a header + timestamp every section_words words"""
+    lines, total, cursor = ["[HOOK - 0:00-0:30]"], minutes * 150, 0
+    while cursor < total:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(15)).capitalize() + "."
+        lines.append(sentence)
+        cursor += 15
+        if cursor % section_words < 15:
+            lines.append(f"\n[Section {cursor // section_words}: Point - 0:00-0:00]")
+            lines.append("[B-ROLL : screen recording]")
+            lines.append(f"(0:{cursor % 60:02d}-1:00)")
+        if cursor % 600 < 15:
+            lines.append("\n\n\n\n\n[pause-2 seconds]")
+    lines.append("[OUTRO - 59:00-60:00]\nSubscribe for more!")
+    return "\n".join(lines)
+
+
+def check(n: int, seed: int) -> bool:
+    rng = random.Random(seed)
+    for i in range(n):
+        script = random_script(rng)
+        expected = legacy_post_process_script(script)
+        actual = CreatorToolsService.post_process_script(script, None)
+        if expected != actual:
+            print(f"MISMATCH on case {i}:\n{script!r}\nexpected: {expected!r}\nactual:   {actual!r}")
+            return False
+    print(f"equivalence: {n} random scripts identical")
+    return True
+
+
+def bench(minutes: int, section_words: int, n: int):
+    rng = random.Random(0)
+    script = long_script(minutes, section_words, rng)
+    assert legacy_post_process_script(script) == CreatorToolsService.post_process_script(script, None)
+    print(f"{minutes}-minute script: {len(script.split())} words, {len(script)} chars")
+    for label, fn in (("legacy", legacy_post_process_script),
+                      ("single-pass", lambda s: CreatorToolsService.post_process_script(s, None))):
+        samples = []
+        for _ in range(n):
+            start = time.perf_counter()
+            fn(script)
+            samples.append(time.perf_counter() - start)
+        print(f"  {label:<12} median={statistics.median(samples) * 1000:8.2f}ms  max={max(samples) * 1000:8.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--check", type=int, default=2000, help="random scripts for the equivalence check")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--minutes", type=int, default=60)
+    parser.add_argument("--section-words", type=int, default=60, help="words between timestamped markers")
+    parser.add_argument("-n", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.check and not check(args.check, args.seed):
+        raise SystemExit(1)
+    bench(args.minutes, args.section_words, args.n)
+
+
+if __name__ == "__main__":
+    main()
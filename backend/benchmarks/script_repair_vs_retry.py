@@ -0,0 +1,124 @@
+"""
+Validation failure handling: targeted repair vs full regeneration with feedback
+
+For each run a script is generated, then damaged the way real failures look
+(HOOK/OUTRO markers and timestamps stripped, the paragraphs covering one key
+point removed). The same damaged script is then fixed both ways:
+  - retry:  CreatorToolsService._regenerate_with_feedback (previous behaviour)
+  - repair: script_repair.repair (local fixes + per-issue LLM inserts)
+and the wall time, number of LLM calls and estimated prompt/output tokens of
+each path are reported, along with the issues left afterwards.
+
+Run from backend/ with provider keys configured:
+    python -m benchmarks.script_repair_vs_retry --model openai --duration 10 -n 3
+"""
+
+import argparse
+import asyncio
+import re
+import statistics
+import time
+
+from app.schemas.schemas import ScriptGenerationRequest
+from app.services.ai_service import ai_service, estimate_script_tokens
+from app.services.creator_tools_service import creator_tools_service
+from app.services.rate_limiter import estimate_tokens
+from app.services import script_repair as repair
+
+KEY_POINTS = ["morning routine", "deep work blocks", "digital minimalism"]
+
+
+class UsageMeter:
+    """Counts calls and estimated tokens going through ai_service.generate"""
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self._generate = ai_service.generate
+
+    async def generate(self, prompt, *args, system_prompt=None, **kwargs):
+        self.calls += 1
+        self.prompt_tokens += estimate_tokens(system_prompt, prompt)
+        text = await self._generate(prompt, *args, system_prompt=system_prompt, **kwargs)
+        self.output_tokens += estimate_tokens(text)
+        return text
+
+    def reset(self):
+        self.calls = self.prompt_tokens = self.output_tokens = 0
+
+
+def damage(script: str, key_point: str) -> str:
+    """Strip structure markers/timestamps and drop the paragraphs covering key_point"""
+    paragraphs = [p for p in re.split(r'\n\s*\n', script) if key_point.split()[0] not in p.lower()]
+    damaged = "\n\n".join(paragraphs)
+    damaged = re.sub(r'\[(HOOK|OUTRO|CALL|CTA)[^\]]*\]', '', damaged, flags=re.IGNORECASE)
+    return re.sub(r'\(?\d+:\d{2}\s*[-–—]?\s*(\d+:\d{2})?\)?', '', damaged)
+
+
+async def run_once(request: ScriptGenerationRequest, meter: UsageMeter):
+    service = creator_tools_service
+    system_prompt, prompt, timing = service._build_script_prompt(request)
+    output_budget = estimate_script_tokens(request.duration_minutes)
+
+    script = await ai_service.generate(
+        prompt=prompt, model=request.ai_model, max_tokens=output_budget,
+        system_prompt=system_prompt, tool_type='script', use_cache=False, output_budget=output_budget
+    )
+    damaged = damage(script, KEY_POINTS[1])
+    issues = [i for i in service.find_script_issues(damaged, request) if i["code"] not in repair.IGNORED]
+    print(f"  issues injected: {[i['code'] for i in issues]}")
+
+    results = {}
+    meter.reset()
+    start = time.perf_counter()
+    retried = await service._regenerate_with_feedback(
+        request, system_prompt, prompt, timing, 0.7, output_budget, [i["message"] for i in issues]
+    )
+    results["retry"] = (time.perf_counter() - start, meter.calls, meter.prompt_tokens, meter.output_tokens,
+                        service.find_script_issues(retried, request))
+
+    meter.reset()
+    start = time.perf_counter()
+    repaired, _ = await repair.script_repair.repair(damaged, issues, request, system_prompt, timing)
+    results["repair"] = (time.perf_counter() - start, meter.calls, meter.prompt_tokens, meter.output_tokens,
+                         service.find_script_issues(repaired, request))
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default="openai", choices=["openai", "groq", "vertex"])
+    parser.add_argument("--duration", type=int, default=10)
+    parser.add_argument("-n", type=int, default=3)
+    args = parser.parse_args()
+
+    meter = UsageMeter()
+    ai_service.generate = meter.generate
+
+    request = ScriptGenerationRequest(
+        topic="How to double your productivity without burning out",
+        duration_minutes=args.duration,
+        key_points=KEY_POINTS,
+        style="educational",
+        ai_model=args.model
+    )
+
+    totals = {"retry": [], "repair": []}
+    for run in range(args.n):
+        print(f"run {run + 1}/{args.n}")
+        for strategy, result in (await run_once(request, meter)).items():
+            totals[strategy].append(result)
+
+    print(f"\n{'strategy':<8} {'median s':>9} {'calls':>6} {'prompt tok':>11} {'output tok':>11}  issues left")
+    for strategy, results in totals.items():
+        seconds = statistics.median(r[0] for r in results)
+        calls = statistics.mean(r[1] for r in results)
+        prompt_tokens = statistics.mean(r[2] for r in results)
+        output_tokens = statistics.mean(r[3] for r in results)
+        left = sorted({i["code"] for r in results for i in r[4]})
+        print(f"{strategy:<8} {seconds:9.1f} {calls:6.1f} {prompt_tokens:11.0f} {output_tokens:11.0f}  {left or '-'}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,268 @@
+"""
+tolerant_json: corpus recovery rate, fuzzing and timing vs the previous cascade
+
+legacy_parse below is a copy of AIService.parse_json_with_validation before
+tolerant_json (json.loads, then three markdown/brace regexes, then a global
+' -> " replacement plus comma/comment regexes).
+
+  corpus   hand-written responses in the shapes the tools actually get back
+           (fences, prose, trailing commas, comments, single quotes with
+           apostrophes, missing commas, truncation); both parsers must
+           produce the expected value
+  --fuzz   N random JSON documents rendered with random recoverable damage
+           must round-trip exactly, both through parse() and, for arrays fed
+           in random chunks, through IncrementalJSONArrayParser; N random
+           byte mutations must either parse or raise ValueError (never
+           anything else) within --max-ms
+  timing   median parse time of both parsers over the corpus and on a large
+           template array: well-formed, with trailing commas, with comments
+
+Run from backend/:
+    python -m benchmarks.tolerant_json_fuzz --fuzz 20000 -n 200
+"""
+
+import argparse
+import json
+import random
+import re
+import statistics
+import time
+
+from app.services import tolerant_json
+
+
+def legacy_parse(response, fallback=None):
+    try:
+        return json.loads(response)
+    except json.JSONDecodeError:
+        extracted = _legacy_extract(response)
+        if extracted:
+            try:
+                return json.loads(extracted)
+            except json.JSONDecodeError:
+                pass
+        fixed = _legacy_fix(response)
+        if fixed:
+            try:
+                return json.loads(fixed)
+            except json.JSONDecodeError:
+                pass
+        return fallback if fallback is not None else {"error": "JSON parsing failed", "raw": response[:500]}
+
+
+def _legacy_extract(text):
+    match = re.search(r'```json\s*\n(.*?)\n```', text, re.DOTALL)
+    if match:
+        return match.group(1).strip()
+    match = re.search(r'```\s*\n(.*?)\n```', text, re.DOTALL)
+    if match:
+        content = match.group(1).strip()
+        if content.startswith('{') or content.startswith('['):
+            return content
+    if '{' in text and '}' in text:
+        return text[text.find('{'):text.rfind('}') + 1]
+    if '[' in text and ']' in text:
+        return text[text.find('['):text.rfind(']') + 1]
+    return None
+
+
+def _legacy_fix(text):
+    text = text.strip().replace("'", '"')
+    text = re.sub(r',\s*}', '}', text)
+    text = re.sub(r',\s*]', ']', text)
+    text = re.sub(r'"\s*\n\s*"', '",\n"', text)
+    text = re.sub(r'//.*\n', '\n', text)
+    return re.sub(r'/\*.*?\*/', '', text, flags=re.DOTALL)
+
+
+TITLES = ["I Tried Waking Up at 5AM for 30 Days", "Don't Buy a Laptop Before Watching This", "Why 90% of Creators Quit"]
+TEMPLATE = {"template_id": "t1", "layers": [{"type": "text", "content": "STOP!", "font_size": 96}], "ctr": 8.5}
+SEO = {"optimized_content": "It's the creator's guide", "meta_title": "Guide", "meta_description": "Learn",
+       "suggested_keywords": ["tips", "growth"], "seo_score": 82.5}
+
+CORPUS = [
+    ("plain", json.dumps(TITLES), TITLES),
+    ("fenced", "```json\n" + json.dumps(TITLES, indent=2) + "\n```", TITLES),
+    ("prose around", "Here are your titles:\n\n" + json.dumps(TITLES) + "\n\nLet me know if you want more!", TITLES),
+    ("footnote before", "Based on [1] trends:\n" + json.dumps(TITLES), TITLES),
+    ("trailing comma", '["A", "B", "C",]', ["A", "B", "C"]),
+    ("missing commas", '[\n  "A"\n  "B"\n  "C"\n]', ["A", "B", "C"]),
+    ("missing commas inline", '["A" "B" "C"]', ["A", "B", "C"]),
+    ("missing comma in object", '{"meta_title": "Guide" "meta_description": "Learn"}',
+     {"meta_title": "Guide", "meta_description": "Learn"}),
+    ("single quotes", "['Don\\'t Quit', 'Start Now']", ["Don't Quit", "Start Now"]),
+    ("apostrophe in double quotes", '{"optimized_content": "It\'s the creator\'s guide", "meta_title": "Guide", '
+     '"meta_description": "Learn", "suggested_keywords": ["tips", "growth"], "seo_score": 82.5}', SEO),
+    ("comments", '[\n  // best performer\n  {"template_id": "t1", /* bold */ "layers": '
+     '[{"type": "text", "content": "STOP!", "font_size": 96}], "ctr": 8.5}\n]', [TEMPLATE]),
+    ("python literals", "{'a': True, 'b': None, 'c': False}", {"a": True, "b": None, "c": False}),
+    ("bare keys", '{template_id: "t1", ctr: 8.5}', {"template_id": "t1", "ctr": 8.5}),
+    ("truncated array", "```json\n[" + json.dumps(TEMPLATE) + ", " + json.dumps(TEMPLATE)[:40], [TEMPLATE]),
+    ("truncated object", '{"optimized_content": "x", "meta_title": "Gui', {"optimized_content": "x"}),
+    ("unescaped inner quotes", '{"title": "The "Secret" Nobody Tells You"}', {"title": 'The "Secret" Nobody Tells You'}),
+    ("fence no newline", "```[" + json.dumps(TEMPLATE) + "]```", [TEMPLATE]),
+    ("two blocks, larger wins", '{"note": "example"}\n\n```json\n' + json.dumps([TEMPLATE, TEMPLATE]) + "\n```",
+     [TEMPLATE, TEMPLATE]),
+]
+
+WORDS = ["creator", "it's", 'say "hi"', "emoji 🎬", "back\\slash", "tab\tsep", "line\nbreak", "50% off", "", "x"]
+
+
+def random_value(rng, depth=0):
+    kind = rng.random()
+    if depth > 3 or kind < 0.35:
+        return rng.choice([rng.choice(WORDS), rng.randint(-1000, 1000), round(rng.uniform(-10, 10), 3),
+                           True, False, None])
+    if kind < 0.65:
+        return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 5))]
+    return {f"k{i}_{rng.choice(['a', 'b'])}": random_value(rng, depth + 1) for i in range(rng.randint(0, 5))}
+
+
+def damage(rng, value):
+    """Render value as JSON with damage tolerant_json promises to undo"""
+    text = json.dumps(value, ensure_ascii=rng.random() < 0.3, indent=rng.choice([None, 2]))
+    if rng.random() < 0.5:
+        text = re.sub(r'([}\]])', lambda m: (", " if rng.random() < 0.5 else "") + m.group(1), text)
+        text = re.sub(r'\[, |\{, ', lambda m: m.group()[0], text)  # no comma in empty containers
+    if rng.random() < 0.3:
+        text = text.replace('", "', '" "')  # comma dropped after a string
+    if rng.random() < 0.3:
+        text = text.replace("\n", " // note\n")
+    if rng.random() < 0.3:
+        text = re.sub(r'(?<=[,\[{])', lambda m: " /* c */" if rng.random() < 0.3 else "", text)
+    if rng.random() < 0.5:
+        text = rng.choice(["```json\n", "```\n", "Sure! Here it is:\n", "Result [draft]: "]) + text
+    if rng.random() < 0.5:
+        text += rng.choice(["\n```", "\n\nHope this helps!", "\n```\nAnything else?"])
+    return text
+
+
+def stream(rng, text):
+    """Feed text to an IncrementalJSONArrayParser in random 1-12 character deltas"""
+    parser = tolerant_json.IncrementalJSONArrayParser()
+    items, cut = [], 0
+    while cut < len(text):
+        step = rng.randint(1, 12)
+        items += parser.feed(text[cut:cut + step])
+        cut += step
+    return items + parser.finish()
+
+
+def fuzz(n, seed, max_ms):
+    rng = random.Random(seed)
+    checked = streamed = 0
+    for i in range(n):
+        value = random_value(rng)
+        if not isinstance(value, (list, dict)) or not value:
+            continue
+        text = damage(rng, value)
+        try:
+            result = tolerant_json.loads(text)
+        except ValueError as e:
+            print(f"round-trip FAILED on case {i}: {e}\n{text!r}")
+            return False
+        if result != value:
+            print(f"round-trip MISMATCH on case {i}:\n{text!r}\nexpected {value!r}\ngot      {result!r}")
+            return False
+        checked += 1
+        # Streamed arrays are found by an element-like first value, like real title/template output
+        if isinstance(value, list) and isinstance(value[0], (str, list, dict)):
+            result = stream(rng, text)
+            if result != value:
+                print(f"stream MISMATCH on case {i}:\n{text!r}\nexpected {value!r}\ngot      {result!r}")
+                return False
+            streamed += 1
+    print(f"fuzz round-trip: {checked} damaged documents recovered exactly ({streamed} also streamed)")
+
+    alphabet = list('{}[]",:\'\\/*\n tfn0123456789.-eE') + ["true", "null", "//", "/*", "```"]
+    slowest = 0.0
+    for i in range(n):
+        text = json.dumps(random_value(rng))
+        for _ in range(rng.randint(1, 6)):
+            pos = rng.randint(0, len(text))
+            op = rng.random()
+            if op < 0.4:
+                text = text[:pos] + rng.choice(alphabet) + text[pos:]
+            elif op < 0.8:
+                text = text[:pos] + text[pos + 1:]
+            else:
+                text = text[:pos]
+        start = time.perf_counter()
+        try:
+            tolerant_json.parse(text, {"type": "array"} if rng.random() < 0.3 else None)
+        except ValueError:
+            pass
+        except Exception as e:
+            print(f"mutation case {i} raised {type(e).__name__}: {e}\n{text!r}")
+            return False
+        slowest = max(slowest, time.perf_counter() - start)
+    print(f"fuzz mutations: {n} inputs, only ValueError raised, slowest {slowest * 1000:.2f}ms")
+    if slowest * 1000 > max_ms:
+        print(f"slowest mutation case exceeded {max_ms}ms")
+        return False
+    return True
+
+
+def corpus_check():
+    ok = True
+    print(f"{'case':<28} {'legacy':>7} {'tolerant':>9}")
+    for name, text, expected in CORPUS:
+        legacy_ok = legacy_parse(text) == expected
+        try:
+            tolerant_ok = tolerant_json.loads(text) == expected
+        except ValueError:
+            tolerant_ok = False
+        ok = ok and tolerant_ok
+        print(f"{name:<28} {'ok' if legacy_ok else 'FAIL':>7} {'ok' if tolerant_ok else 'FAIL':>9}")
+    return ok
+
+
+def timed(fn, text, n):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn(text)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def bench(n):
+    big = json.dumps([dict(TEMPLATE, template_id=f"t{i}") for i in range(500)], indent=2)
+    inputs = [("corpus (all cases)", None), ("500 templates, fenced", "```json\n" + big + "\n```"),
+              ("500 templates, trailing commas", big.replace("}\n", "},\n").replace("]", ",]")),
+              ("500 templates, comments", big.replace("{\n", "{ // template\n").replace("]", "/* end */]"))]
+    print(f"\n{'input':<32} {'legacy ms':>10} {'tolerant ms':>12}")
+    for label, text in inputs:
+        if text is None:
+            legacy = sum(timed(legacy_parse, t, n) for _, t, _ in CORPUS)
+            tolerant = sum(timed(_quiet_loads, t, n) for _, t, _ in CORPUS)
+        else:
+            legacy, tolerant = timed(legacy_parse, text, n), timed(_quiet_loads, text, n)
+        print(f"{label:<32} {legacy:10.3f} {tolerant:12.3f}")
+
+
+def _quiet_loads(text):
+    try:
+        return tolerant_json.loads(text)
+    except ValueError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fuzz", type=int, default=5000, help="documents per fuzz phase")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-ms", type=float, default=50.0, help="slowest allowed mutation case")
+    parser.add_argument("-n", type=int, default=50)
+    args = parser.parse_args()
+
+    ok = corpus_check()
+    if args.fuzz:
+        ok = fuzz(args.fuzz, args.seed, args.max_ms) and ok
+    bench(args.n)
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Peak RSS per upload: whole-body read + full-resolution decode vs streamed ingestion
+
+Each measurement runs in a fresh process. The input is built first, then the
+kernel's peak-RSS counter is reset (/proc/self/clear_refs), so the number
+reported is the extra memory the upload path itself needed.
+
+  before   await file.read() of the whole body, size check afterwards, then
+           the previous optimize_image (mode conversion first, i.e. a
+           full-resolution decode, then thumbnail) and a second decode of
+           the output for width/height
+  after    read_limited (1MB chunks, aborts past MAX_UPLOAD_SIZE) and
+           optimize_image (pixel-count guard from the header, JPEG draft()
+           and reduce() before LANCZOS, no re-decode)
+
+Linux only (needs /proc). Run from backend/ (needs Pillow):
+    python -m benchmarks.upload_memory
+"""
+
+import argparse
+import asyncio
+import io
+import multiprocessing
+import os
+
+from PIL import Image
+
+# name, builder args
+CASES = [
+    ("jpeg 4000x3000", ("jpeg", 4000, 3000)),
+    ("jpeg 6000x4000", ("jpeg", 6000, 4000)),
+    ("png rgba 4000x3000", ("png", 4000, 3000)),
+    ("25MB body (over limit)", ("junk", 25, 0)),
+    ("png bomb 12000x12000", ("bomb", 12000, 12000)),
+]
+
+
+def build_input(kind: str, width: int, height: int) -> bytes:
+    output = io.BytesIO()
+    if kind == "junk":
+        return os.urandom(width * 1024 * 1024)
+    if kind == "bomb":
+        # One flat colour: tiny file, huge canvas
+        Image.new("L", (width, height), 128).save(output, format="PNG", optimize=True)
+        return output.getvalue()
+    gradient = Image.linear_gradient("L").resize((width, height))
+    noise = Image.effect_noise((width, height), 64)
+    if kind == "png":
+        Image.merge("RGBA", (gradient, noise, gradient, gradient)).save(output, format="PNG")
+    else:
+        Image.merge("RGB", (gradient, noise, gradient)).save(output, format="JPEG", quality=92)
+    return output.getvalue()
+
+
+class FakeUpload:
+    """The parts of starlette's UploadFile the readers use (size unknown, like a chunked request)"""
+
+    def __init__(self, data: bytes):
+        self._file = io.BytesIO(data)
+        self.size = None
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+
+def legacy_optimize(image_data: bytes, max_size: tuple = (1920, 1080)) -> bytes:
+    img = Image.open(io.BytesIO(image_data))
+    if img.mode == 'RGBA':
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[3])
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+    if img.size[0] > max_size[0] or img.size[1] > max_size[1]:
+        img.thumbnail(max_size, Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    img.save(output, format='JPEG', quality=85, optimize=True)
+    return output.getvalue()
+
+
+async def before(upload: FakeUpload, limit: int, max_pixels: int) -> str:
+    contents = await upload.read()
+    if len(contents) > limit:
+        return "413"
+    try:
+        optimized = legacy_optimize(contents)
+    except Exception as e:
+        return type(e).__name__
+    width, height = Image.open(io.BytesIO(optimized)).size
+    return f"{width}x{height}"
+
+
+async def after(upload: FakeUpload, limit: int, max_pixels: int) -> str:
+    from app.api.v1.endpoints.image_upload import read_limited, UploadTooLarge
+    from app.services.image_worker import optimize_image, ImageTooLarge
+
+    try:
+        contents = await read_limited(upload, limit)
+    except UploadTooLarge:
+        return "413"
+    try:
+        _, width, height = optimize_image(contents, (1920, 1080), max_pixels)
+    except ImageTooLarge:
+        return "400 (pixel guard)"
+    except Exception as e:
+        return type(e).__name__
+    return f"{width}x{height}"
+
+
+def _vm_kb(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise RuntimeError(f"{field} not in /proc/self/status")
+
+
+def measure(case, variant_name: str, limit: int, max_pixels: int, results):
+    data = build_input(*case)
+    upload = FakeUpload(data)
+    variant = before if variant_name == "before" else after
+    if variant is after:
+        # Import cost is not per-upload
+        import app.api.v1.endpoints.image_upload  # noqa: F401
+
+    baseline = _vm_kb("VmRSS")
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")  # reset VmHWM to the current RSS
+    outcome = asyncio.run(variant(upload, limit, max_pixels))
+    results.put(((_vm_kb("VmHWM") - baseline) / 1024, len(data) / 1024 / 1024, outcome))
+
+
+def run_isolated(case, variant_name: str, limit: int, max_pixels: int):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=measure, args=(case, variant_name, limit, max_pixels, results))
+    proc.start()
+    result = results.get()
+    proc.join()
+    return result
+
+
+def main():
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--limit", type=int, default=settings.MAX_UPLOAD_SIZE)
+    parser.add_argument("--max-pixels", type=int, default=settings.IMAGE_MAX_PIXELS)
+    args = parser.parse_args()
+
+    print(f"{'case':<24} {'input MB':>9} {'before MB':>10} {'after MB':>9}  outcome before -> after")
+    for name, case in CASES:
+        before_mb, size_mb, before_outcome = run_isolated(case, "before", args.limit, args.max_pixels)
+        after_mb, _, after_outcome = run_isolated(case, "after", args.limit, args.max_pixels)
+        print(f"{name:<24} {size_mb:9.1f} {before_mb:10.1f} {after_mb:9.1f}  {before_outcome} -> {after_outcome}")
+
+
+if __name__ == "__main__":
+    main()
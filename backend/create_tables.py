@@ -0,0 +1,18 @@
+"""
+Create all database tables from the SQLAlchemy models
+Run before starting the app when DB_CREATE_ALL_ON_STARTUP is disabled: python create_tables.py
+"""
+from app.core.database import engine, Base
+import app.models.models  # noqa: F401  (registers the models on Base.metadata)
+
+def migrate():
+    try:
+        Base.metadata.create_all(bind=engine)
+        print(f'✓ Tables up to date: {", ".join(sorted(Base.metadata.tables))}')
+    except Exception as e:
+        print(f'❌ Error creating tables: {e}')
+
+if __name__ == '__main__':
+    print('Creating database tables...')
+    migrate()
+    print('\n✅ Done!')
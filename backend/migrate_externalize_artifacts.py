@@ -0,0 +1,69 @@
+"""
+Migration script to move inline base64 images out of existing content rows
+Generated images in meta_data (thumbnail templates) and prompt_used are
+written to the artifact store and replaced by their artifact URLs.
+Safe to re-run: rows without inline images are skipped. --dry-run reports
+what would change (artifact files are still written; they are harmless
+and deduplicated by hash).
+Run this once: python migrate_externalize_artifacts.py [--dry-run]
+"""
+import sys
+from sqlalchemy import String, cast, or_
+from app.core.database import SessionLocal
+from app.models.models import Content
+from app.services.artifact_store import artifact_store
+
+BATCH_SIZE = 20  # rows carry megabytes each before migration
+
+
+def migrate(dry_run: bool = False):
+    db = SessionLocal()
+    migrated = saved_bytes = 0
+    last_id = 0
+    try:
+        while True:
+            rows = db.query(Content).filter(
+                Content.id > last_id,
+                or_(
+                    cast(Content.meta_data, String).contains('base64,'),
+                    Content.prompt_used.contains('base64,')
+                )
+            ).order_by(Content.id).limit(BATCH_SIZE).all()
+            if not rows:
+                break
+
+            for content in rows:
+                last_id = content.id
+                before = len(str(content.meta_data or '')) + len(content.prompt_used or '')
+                # Assigning new objects marks the JSON column as changed
+                updated = artifact_store.externalize_content({
+                    "meta_data": content.meta_data,
+                    "prompt_used": content.prompt_used
+                })
+                after = len(str(updated["meta_data"] or '')) + len(updated["prompt_used"] or '')
+                if after == before:
+                    continue
+                if not dry_run:
+                    content.meta_data = updated["meta_data"]
+                    content.prompt_used = updated["prompt_used"]
+                migrated += 1
+                saved_bytes += before - after
+                print(f'✓ Content #{content.id}: {before / 1024:.0f}KB -> {after / 1024:.1f}KB')
+
+            if not dry_run:
+                db.commit()
+            # Drop the loaded batch before fetching the next one
+            db.expunge_all()
+
+        action = 'Would migrate' if dry_run else 'Migrated'
+        print(f'\n✅ {action} {migrated} content rows, {saved_bytes / 1024 / 1024:.1f}MB moved to the artifact store')
+    except Exception as e:
+        print(f'❌ Error: {e}')
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    migrate(dry_run='--dry-run' in sys.argv)
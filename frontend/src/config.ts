@@ -13,3 +13,6 @@ const apiBaseUrl = Capacitor.isNativePlatform()
 export const API_BASE_URL = apiBaseUrl;
 
 export const apiUrl = (path: string) => `${API_BASE_URL}${path}`;
+
+// Generated images come back as API-relative artifact URLs; data URIs and absolute URLs pass through
+export const assetUrl = (url?: string) => (url && url.startsWith('/api/') ? apiUrl(url) : url || '');
@@ -330,6 +330,14 @@ export default function ScriptGeneratorPage() {
               } else if (data.type === 'chunk') {
                 accumulatedScript += data.content
                 setGeneratedScript(accumulatedScript)
+              } else if (data.type === 'validation') {
+                // Incremental checks on the streamed draft
+                setProgressMessage(`Writing... ${data.words}/${data.expected_words} words`)
+              } else if (data.type === 'replace') {
+                // Server sends the post-processed script after the raw stream ends,
+                // or empty content when it restarts a draft that went off track
+                accumulatedScript = data.content
+                setGeneratedScript(accumulatedScript)
               } else if (data.type === 'complete') {
                 setGeneratedScript(data.script)
                 setCurrentContentId(data.id.toString())
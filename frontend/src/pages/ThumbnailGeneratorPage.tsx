@@ -4,7 +4,7 @@ import ThumbnailImageViewer from '../components/ThumbnailImageViewer'
 import { Image, Sparkles, Loader, Clock, Trash2, TrendingUp, RefreshCw, X, Check, ChevronDown, ChevronUp, Target, BarChart3, Lightbulb, Upload, XCircle } from 'lucide-react'
 import toast from 'react-hot-toast'
 import { apiPost } from '../services/api'
-import { apiUrl } from '../config'
+import { apiUrl, assetUrl } from '../config'
 
 interface ThumbnailTemplate {
   id: string
@@ -145,6 +145,14 @@ interface HistoryItem {
 //   { value: 'vlog', label: 'Vlog', description: 'Casual, friendly, warm colors' }
 // ]
 
+// Stored thumbnails reference artifact URLs (older ones inline base64); resolve them against the API origin
+const withAssetUrls = (t: any) => ({
+  ...t,
+  image_url: assetUrl(t.image_url),
+  base64_data: assetUrl(t.base64_data),
+  uploaded_layers: (t.uploaded_layers || []).map((layer: any) => ({ ...layer, base64_data: assetUrl(layer.base64_data) }))
+})
+
 export default function ThumbnailGeneratorPage() {
   const [formData, setFormData] = useState({
     thumbnailPrompt: '', // Combined field for title and description
@@ -237,7 +245,7 @@ export default function ThumbnailGeneratorPage() {
               id: item.id.toString(),
               title: item.meta_data?.video_title || 'Untitled',
               topic: item.meta_data?.video_topic || '',
-              templates: (item.meta_data?.templates || []).map((t: any) => ({
+              templates: (item.meta_data?.templates || []).map(withAssetUrls).map((t: any) => ({
                 ...t,
                 qualityScore: calculateQualityScore(t)
               })),
@@ -375,44 +383,84 @@ export default function ThumbnailGeneratorPage() {
       }
 
       console.log('[Thumbnail Generation] Advanced Request:', requestBody)
-      const response = await apiPost('/api/v1/creator-tools/generate-thumbnail-ideas', requestBody)
+      // Stream thumbnails so each image shows up as soon as it is generated
+      const token = localStorage.getItem('token')
+      const response = await fetch(apiUrl('/api/v1/creator-tools/generate-thumbnails-stream'), {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'Authorization': `Bearer ${token}`
+        },
+        body: JSON.stringify(requestBody)
+      })
 
       if (!response.ok) {
         const errorData = await response.json().catch(() => ({}))
         throw new Error(errorData.detail || 'Failed to generate thumbnails')
       }
 
-      const data = await response.json()
-      // Handle both new format (thumbnails) and old format (templates with layers)
-      let generatedTemplates = data.meta_data?.templates || data.thumbnails || []
+      const reader = response.body?.getReader()
+      const decoder = new TextDecoder()
 
-      // Convert to new format if needed and add quality scores
-      generatedTemplates = generatedTemplates.map((t: any) => {
-        const template = {
-          id: t.id,
-          title: t.title || formData.thumbnailPrompt.substring(0, 50),
-          image_url: t.image_url || '',
-          base64_data: t.base64_data || '',
-          prompt: t.prompt || '',
-          emotion: t.emotion || formData.emotion,
-          color_scheme: t.color_scheme || formData.color_scheme,
-          layout: t.layout || formData.layout_preference,
-          ctr_score: t.ctr_score,
-          optimized_for_mobile: t.optimized_for_mobile || formData.optimize_for_mobile,
-          platform: t.platform || formData.target_platform,
-          variation: t.variation,
-          uploaded_layers: t.uploaded_layers || []
-        }
-        return {
-          ...template,
-          qualityScore: calculateQualityScore(template)
+      if (!reader) {
+        throw new Error('No response body')
+      }
+
+      const generatedTemplates: any[] = []
+      setTemplates([])
+
+      let buffer = ''
+      let data: any = null
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+
+        buffer += decoder.decode(value, { stream: true })
+        const events = buffer.split('\n\n')
+        buffer = events.pop() || ''
+
+        for (const event of events) {
+          if (!event.startsWith('data: ')) continue
+          const message = JSON.parse(event.slice(6))
+
+          if (message.type === 'thumbnail') {
+            const t = withAssetUrls(message.thumbnail)
+            const template = {
+              id: t.id,
+              title: t.title || formData.thumbnailPrompt.substring(0, 50),
+              image_url: t.image_url || '',
+              base64_data: t.base64_data || '',
+              prompt: t.prompt || '',
+              emotion: t.emotion || formData.emotion,
+              color_scheme: t.color_scheme || formData.color_scheme,
+              layout: t.layout || formData.layout_preference,
+              ctr_score: t.ctr_score,
+              optimized_for_mobile: t.optimized_for_mobile || formData.optimize_for_mobile,
+              platform: t.platform || formData.target_platform,
+              variation: t.variation,
+              uploaded_layers: t.uploaded_layers || []
+            }
+            generatedTemplates.push({
+              ...template,
+              qualityScore: calculateQualityScore(template)
+            })
+            setTemplates([...generatedTemplates])
+            if (generatedTemplates.length === 1) {
+              setSelectedTemplate(generatedTemplates[0])
+            }
+          } else if (message.type === 'complete') {
+            data = message
+          } else if (message.type === 'error') {
+            throw new Error(message.message)
+          }
         }
-      })
+      }
 
-      setTemplates(generatedTemplates)
-      if (generatedTemplates.length > 0) {
-        setSelectedTemplate(generatedTemplates[0])
+      if (!data) {
+        throw new Error('Thumbnail generation was interrupted')
       }
+      generatedTemplates.sort((a, b) => a.variation - b.variation)
+      setTemplates([...generatedTemplates])
 
       // Add to history
       const newHistoryItem: HistoryItem = {
@@ -424,7 +472,11 @@ export default function ThumbnailGeneratorPage() {
       }
       setHistory([newHistoryItem, ...history])
 
-      toast.success('Thumbnail generated successfully!')
+      if (data.partial) {
+        toast.success(`Generated ${data.count} of ${requestBody.count} thumbnails (the rest took too long)`)
+      } else {
+        toast.success('Thumbnail generated successfully!')
+      }
     } catch (error) {
       console.error('Thumbnail generation error:', error)
       const errorMessage = error instanceof Error ? error.message : 'Failed to generate thumbnail'
@@ -533,7 +585,7 @@ export default function ThumbnailGeneratorPage() {
       let refinedTemplates = data.meta_data?.templates || data.thumbnails || []
 
       // Convert to new format if needed
-      refinedTemplates = refinedTemplates.map((t: any) => {
+      refinedTemplates = refinedTemplates.map(withAssetUrls).map((t: any) => {
         const template = {
           id: t.id,
           title: t.title || formData.thumbnailPrompt.substring(0, 50),
@@ -287,7 +287,16 @@ export default function TitleGeneratorPage() {
       requestBody.tone = formData.tone || 'engaging'
       requestBody.platform = formData.platform || 'youtube'
 
-      const response = await apiPost('/api/v1/creator-tools/generate-titles', requestBody)
+      // Stream titles so each one shows up as soon as the model finishes it
+      const token = localStorage.getItem('token')
+      const response = await fetch(apiUrl('/api/v1/creator-tools/generate-titles-stream'), {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'Authorization': `Bearer ${token}`
+        },
+        body: JSON.stringify(requestBody)
+      })
 
       if (!response.ok) {
         const errorData = await response.json().catch(() => ({}))
@@ -298,29 +307,54 @@ export default function TitleGeneratorPage() {
         throw new Error(errorData.detail || 'Failed to generate titles')
       }
 
-      const data = await response.json()
-      const generatedTitles = data.meta_data?.titles || []
-      const keywords = formData.keywords.split(',').map(k => k.trim()).filter(k => k)
-
-      // Analyze each title
-      const titlesWithScores = generatedTitles.map((t: string) => ({
-        text: t,
-        ...analyzeTitleQuality(t, keywords)
-      }))
+      const reader = response.body?.getReader()
+      const decoder = new TextDecoder()
 
-      setTitles(titlesWithScores)
-
-      // Add to history
-      const newHistoryItem: HistoryItem = {
-        id: data.id?.toString() || Date.now().toString(),
-        topic: formData.topic,
-        titles: titlesWithScores,
-        timestamp: new Date(),
-        formData: { ...formData }
+      if (!reader) {
+        throw new Error('No response body')
       }
-      setHistory([newHistoryItem, ...history])
 
-      toast.success('Titles generated successfully!')
+      const keywords = formData.keywords.split(',').map(k => k.trim()).filter(k => k)
+      const titlesWithScores: TitleWithScore[] = []
+      setTitles([])
+
+      let buffer = ''
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+
+        buffer += decoder.decode(value, { stream: true })
+        const events = buffer.split('\n\n')
+        buffer = events.pop() || ''
+
+        for (const event of events) {
+          if (!event.startsWith('data: ')) continue
+          const data = JSON.parse(event.slice(6))
+
+          if (data.type === 'title') {
+            // Analyze each title as it arrives
+            titlesWithScores.push({
+              text: data.title,
+              ...analyzeTitleQuality(data.title, keywords)
+            })
+            setTitles([...titlesWithScores])
+          } else if (data.type === 'complete') {
+            // Add to history
+            const newHistoryItem: HistoryItem = {
+              id: data.id?.toString() || Date.now().toString(),
+              topic: formData.topic,
+              titles: titlesWithScores,
+              timestamp: new Date(),
+              formData: { ...formData }
+            }
+            setHistory([newHistoryItem, ...history])
+
+            toast.success('Titles generated successfully!')
+          } else if (data.type === 'error') {
+            throw new Error(data.message)
+          }
+        }
+      }
     } catch (error) {
       console.error('Title generation error:', error)
       const errorMessage = error instanceof Error ? error.message : 'Failed to generate titles'